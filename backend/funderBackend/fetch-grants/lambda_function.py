@@ -1,10 +1,12 @@
 import json
-import boto3
 import os
 import logging
 from botocore.exceptions import ClientError
 from decimal import Decimal
 from typing import Dict, Any, List
+import aws_clients
+import metrics
+from grants_repository import GrantsRepository
 
 # Configure logging
 logger = logging.getLogger()
@@ -14,8 +16,11 @@ logger.setLevel(logging.INFO)
 GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
+dynamodb = aws_clients.lazy_resource('dynamodb')
+grants_repository = GrantsRepository()
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Fetch grants from DynamoDB filtered by issuer
@@ -56,26 +61,15 @@ def fetch_grants_by_issuer(issuer: str) -> List[Dict[str, Any]]:
     Fetch all grants for a specific issuer from DynamoDB
     """
     try:
-        table = dynamodb.Table(GRANTS_TABLE)
+        # Query the issuer index, newest first; reads only this issuer's grants
+        grants = grants_repository.list_by_issuer(issuer)
         
-        # Scan the table with filter for issuer
-        # Note: In production, you might want to use a GSI (Global Secondary Index) for better performance
-        response = table.scan(
-            FilterExpression='issuer = :issuer',
-            ExpressionAttributeValues={
-                ':issuer': issuer
-            }
-        )
-        
-        grants = response.get('Items', [])
+        # Embedding vectors are only used by matchmaking
+        for grant in grants:
+            grant.pop('embedding', None)
         
         # Convert Decimal objects to float for JSON serialization
-        grants = convert_decimals_to_float(grants)
-        
-        # Sort by created_at (newest first)
-        grants.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        return grants
+        return convert_decimals_to_float(grants)
         
     except ClientError as e:
         logger.error(f"Error fetching grants from DynamoDB: {str(e)}")
@@ -101,6 +95,8 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create API Gateway response with proper CORS headers
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, default=str)
     return {
         'statusCode': status_code,
         'headers': {
@@ -111,7 +107,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Credentials': 'false',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body, default=str)
+        'body': response_body
     }
 
 # Test function for local development
@@ -1,14 +1,19 @@
 import json
-import boto3
 import uuid
 import os
-import requests
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 import re
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from decimal import Decimal
+import bedrock_cache
+import aws_clients
+import grant_catalog
+import grant_embeddings
+import metrics
+from log_utils import Payload
 
 # Configure logging
 logger = logging.getLogger()
@@ -20,12 +25,16 @@ S3_BUCKET = os.environ.get('S3_BUCKET', 'grant-documents-bucket')
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
 BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')
 FIRECRAWL_API_KEY = os.environ.get('FIRECRAWL_API_KEY')
+PROMPT_VERSION = 'grant-url-extraction-v1'  # Bump whenever the extraction prompt changes
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bedrock = boto3.client('bedrock-runtime', region_name=BEDROCK_REGION)
-s3 = boto3.client('s3')
+dynamodb = aws_clients.lazy_resource('dynamodb')
+bedrock = aws_clients.lazy_client('bedrock-runtime', region_name=BEDROCK_REGION)
+s3 = aws_clients.lazy_client('s3')
+grant_embedder = grant_embeddings.create_embedder()  # Matchmaking retrieval vectors, computed once per grant
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for grant URL scraping and processing
@@ -67,36 +76,29 @@ def lambda_handler(event, context):
         logger.info(f"URL to scrape: {url}")
         
         # Scrape website content using Firecrawl
-        extracted_text = scrape_website_with_firecrawl(url)
+        with metrics.stage('scrape'):
+            extracted_text = scrape_website_with_firecrawl(url)
         if not extracted_text:
             return create_response(400, {'error': 'Failed to extract content from URL'})
+        metrics.record_size('extracted_text', len(extracted_text))
         
         logger.info(f"Extracted {len(extracted_text)} characters from URL")
-        logger.info(f"First 500 chars of extracted text: {extracted_text[:500]}")
-        logger.info(f"Last 500 chars of extracted text: {extracted_text[-500:]}")
+        logger.debug("Extracted text: %s", Payload(extracted_text))
         
-        # Store scraped content in S3
+        # Archive the scraped content to S3 while Bedrock analyses it. Both
+        # stages are joined before the DynamoDB write, so a grant record never
+        # points at a missing object and no upload is left running on return.
         s3_key = f"grants/{issuer}/{grant_id}/scraped_content.txt"
-        s3.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=extracted_text.encode('utf-8'),
-            ContentType='text/plain',
-            Metadata={
-                'grant_id': grant_id,
-                'issuer': issuer,
-                'title': title or 'AI-extracted',
-                'source_url': url,
-                'scraped_at': datetime.utcnow().isoformat()
-            }
-        )
-        
-        logger.info(f"Scraped content stored in S3: {s3_key}")
-        
-        # Use Bedrock to extract structured information
-        logger.info("Sending scraped text to Bedrock for analysis...")
-        grant_data = extract_grant_info_with_bedrock(extracted_text, title, issuer)
-        logger.info(f"Bedrock analysis complete. Extracted data: {grant_data}")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            archive_future = executor.submit(archive_scraped_content_to_s3, s3_key, extracted_text, grant_id, issuer, title, url)
+            
+            # Use Bedrock to extract structured information
+            logger.info("Sending scraped text to Bedrock for analysis...")
+            grant_data = extract_grant_info_with_bedrock(extracted_text, title, issuer)
+            logger.info("Bedrock analysis complete")
+            logger.debug("Extracted data: %s", Payload(grant_data))
+            
+            archive_future.result()
         
         # Store grant information in DynamoDB
         save_grant_to_dynamodb(grant_id, grant_data, s3_key, url)
@@ -115,10 +117,35 @@ def lambda_handler(event, context):
             'message': str(e)
         })
 
+def archive_scraped_content_to_s3(s3_key: str, extracted_text: str, grant_id: str, issuer: str, title: Optional[str], url: str):
+    """
+    Store the scraped website content in S3
+    """
+    with metrics.stage('s3_put'):
+        s3.put_object(
+            Bucket=S3_BUCKET,
+            Key=s3_key,
+            Body=extracted_text.encode('utf-8'),
+            ContentType='text/plain',
+            Metadata={
+                'grant_id': grant_id,
+                'issuer': issuer,
+                'title': title or 'AI-extracted',
+                'source_url': url,
+                'scraped_at': datetime.utcnow().isoformat()
+            }
+        )
+    
+    logger.info(f"Scraped content stored in S3: {s3_key}")
+
 def scrape_website_with_firecrawl(url: str) -> str:
     """
     Scrape website content using Firecrawl API
     """
+    # Deferred: requests pulls in urllib3, charset_normalizer and idna, which
+    # preflight and validation-failure requests never need
+    import requests
+    
     try:
         if not FIRECRAWL_API_KEY:
             logger.error("FIRECRAWL_API_KEY environment variable not set")
@@ -306,17 +333,12 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
             logger.info("Using Claude model format")
         
         logger.info(f"Sending request to Bedrock model: {BEDROCK_MODEL_ID}")
-        logger.info(f"Prompt being sent (first 1000 chars): {prompt[:1000]}")
+        logger.debug("Prompt being sent: %s", Payload(prompt, max_chars=1000))
         
-        # Call Bedrock
-        response = bedrock.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(request_body),
-            contentType='application/json'
-        )
+        # Call Bedrock (memoized across retries and re-uploads)
+        response_body = bedrock_cache.invoke_model_cached(bedrock, BEDROCK_MODEL_ID, request_body, PROMPT_VERSION)
         
         # Parse response - Different format for Nova vs Claude
-        response_body = json.loads(response['body'].read())
         
         if "nova" in BEDROCK_MODEL_ID.lower():
             # Nova response format: output.message.content[0].text
@@ -325,9 +347,9 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
             # Claude response format: content[0].text
             extracted_info = response_body.get('content', [{}])[0].get('text', '{}')
         
-        logger.info(f"Raw Bedrock response body: {response_body}")
-        logger.info(f"Extracted info from Bedrock: {extracted_info}")
-        logger.info(f"Response parsing method: {'Nova format' if 'nova' in BEDROCK_MODEL_ID.lower() else 'Claude format'}")
+        logger.debug("Raw Bedrock response body: %s", Payload(response_body))
+        logger.debug("Extracted info from Bedrock: %s", Payload(extracted_info))
+        logger.debug("Response parsing method: %s", 'Nova format' if 'nova' in BEDROCK_MODEL_ID.lower() else 'Claude format')
         
         # Clean and parse the JSON response
         try:
@@ -493,7 +515,7 @@ def validate_sector_tags(value) -> List[str]:
     # Log invalid sectors for debugging
     if invalid_sectors:
         logger.warning(f"Invalid sectors found (not in predefined list): {invalid_sectors}")
-        logger.info(f"Valid sectors that were accepted: {validated_sectors}")
+        logger.debug("Valid sectors that were accepted: %s", validated_sectors)
     
     return validated_sectors
 
@@ -520,7 +542,7 @@ def save_grant_to_dynamodb(grant_id: str, grant_data: Dict[str, Any], s3_key: st
         table = dynamodb.Table(GRANTS_TABLE)
         
         # Log the sector_tags before saving for debugging
-        logger.info(f"Sector tags before saving to DynamoDB: {grant_data['sector_tags']} (type: {type(grant_data['sector_tags'])})")
+        logger.debug("Sector tags before saving to DynamoDB: %s", grant_data['sector_tags'])
         
         # Ensure sector_tags is a proper list for DynamoDB
         sector_tags = grant_data.get('sector_tags', [])
@@ -555,11 +577,18 @@ def save_grant_to_dynamodb(grant_id: str, grant_data: Dict[str, Any], s3_key: st
                 else:
                     item[field] = grant_data[field]
         
+        # Index the item by updated_at so matchmaking can refresh its catalog incrementally
+        item.update(grant_catalog.catalog_attributes())
+        
+        # Embed once here so matchmaking only has to embed the SME's goals
+        item.update(grant_embeddings.embedding_attributes(grant_embedder, item))
+        
         # Log the final item structure before saving
-        logger.info(f"Final DynamoDB item structure: {json.dumps(item, default=str)}")
+        logger.debug("Final DynamoDB item structure: %s", Payload(item))
         
         # Save to DynamoDB
-        table.put_item(Item=item)
+        with metrics.stage('dynamodb_put'):
+            table.put_item(Item=item)
         
         logger.info(f"Successfully saved grant {grant_id} to DynamoDB")
         
@@ -574,6 +603,8 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create API Gateway response with proper CORS headers
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, default=str)
     return {
         'statusCode': status_code,
         'headers': {
@@ -584,7 +615,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Credentials': 'false',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body, default=str)
+        'body': response_body
     }
 
 # Test function for local development
@@ -0,0 +1,123 @@
+import json
+import os
+import zlib
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import aws_clients
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANT_CACHE_BACKEND = os.environ.get('GRANT_CACHE_BACKEND', 'dynamodb')  # dynamodb | file | none
+GRANT_CACHE_TABLE = os.environ.get('GRANT_CACHE_TABLE', 'GrantDocumentCache')
+GRANT_CACHE_DIR = os.environ.get('GRANT_CACHE_DIR', '/tmp/grant-cache')
+COMPRESS_PAYLOAD_OVER = 64 * 1024  # Bytes; keeps full-document text under DynamoDB's 400 KB item limit
+
+def compute_cache_key(pdf_bytes: bytes, model_id: str, prompt_version: str) -> str:
+    """
+    Content-addressed cache key: SHA-256 of the document plus the model and prompt that analysed it
+    """
+    content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    return f"{content_hash}#{model_id}#{prompt_version}"
+
+class GrantCacheStore(ABC):
+    """
+    Backing store for previously extracted grant documents.
+
+    Records are plain dicts with 'extracted_text' and 'grant_data' keys.
+    """
+
+    @abstractmethod
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """The stored record, or None on a miss"""
+
+    @abstractmethod
+    def put(self, cache_key: str, record: Dict[str, Any]) -> None:
+        """Store or overwrite the record for cache_key"""
+
+class NullGrantCacheStore(GrantCacheStore):
+    """Store that never hits, used when caching is disabled"""
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def put(self, cache_key: str, record: Dict[str, Any]) -> None:
+        pass
+
+class DynamoDBGrantCacheStore(GrantCacheStore):
+    """
+    DynamoDB-backed store. Table key: cache_key (string).
+
+    The record is kept as a JSON string so float amounts don't need
+    converting to Decimal; large records (full-document text) are stored
+    zlib-compressed in payload_gz instead.
+    """
+
+    def __init__(self, table_name: str = GRANT_CACHE_TABLE, dynamodb_resource=None):
+        self.table = (dynamodb_resource or aws_clients.resource('dynamodb')).Table(table_name)
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        response = self.table.get_item(Key={'cache_key': cache_key})
+        item = response.get('Item')
+        if not item:
+            return None
+        if 'payload_gz' in item:
+            return json.loads(zlib.decompress(bytes(item['payload_gz'].value)))
+        return json.loads(item['payload'])
+
+    def put(self, cache_key: str, record: Dict[str, Any]) -> None:
+        payload = json.dumps(record, default=str)
+        item = {
+            'cache_key': cache_key,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        if len(payload) > COMPRESS_PAYLOAD_OVER:
+            item['payload_gz'] = zlib.compress(payload.encode('utf-8'))
+        else:
+            item['payload'] = payload
+        self.table.put_item(Item=item)
+
+class LocalFileGrantCacheStore(GrantCacheStore):
+    """
+    Local JSON-file store for tests and local development, one file per key
+    """
+
+    def __init__(self, directory: str = GRANT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, cache_key: str) -> str:
+        filename = hashlib.sha256(cache_key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{filename}.json")
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(cache_key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, cache_key: str, record: Dict[str, Any]) -> None:
+        path = self._path(cache_key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, path)
+
+def create_grant_cache_store(backend: str = GRANT_CACHE_BACKEND) -> GrantCacheStore:
+    """
+    Build the configured cache store
+    """
+    backend = (backend or 'none').lower()
+    if backend == 'dynamodb':
+        return DynamoDBGrantCacheStore()
+    if backend == 'file':
+        return LocalFileGrantCacheStore()
+    if backend != 'none':
+        logger.warning(f"Unknown GRANT_CACHE_BACKEND '{backend}', caching disabled")
+    return NullGrantCacheStore()
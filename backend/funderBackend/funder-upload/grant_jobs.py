@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import uuid
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+import aws_clients
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANT_JOBS_BACKEND = os.environ.get('GRANT_JOBS_BACKEND', 'aws')  # aws | local
+GRANT_JOBS_TABLE = os.environ.get('GRANT_JOBS_TABLE', 'GrantJobs')
+GRANT_JOBS_QUEUE_URL = os.environ.get('GRANT_JOBS_QUEUE_URL')
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', str(7 * 24 * 3600)))
+
+def new_job(grant_id: str, issuer: str, title: Optional[str], s3_key: str) -> Dict[str, Any]:
+    """
+    Build a queued job record for a document already stored in S3
+
+    Job lifecycle: queued -> extracting -> analysing -> saving -> completed | failed
+    """
+    now = datetime.utcnow().isoformat()
+    return {
+        'job_id': str(uuid.uuid4()),
+        'grant_id': grant_id,
+        'issuer': issuer,
+        'title': title,
+        's3_key': s3_key,
+        'status': 'queued',
+        'created_at': now,
+        'updated_at': now
+    }
+
+class DynamoDBJobStore:
+    """
+    Job records in DynamoDB. Table key: job_id (string), TTL attribute: expires_at.
+
+    grant_data is kept as a JSON string so float amounts don't need
+    converting to Decimal.
+    """
+
+    def __init__(self, table_name: str = GRANT_JOBS_TABLE, dynamodb_resource=None):
+        self.table = (dynamodb_resource or aws_clients.resource('dynamodb')).Table(table_name)
+
+    def create(self, job: Dict[str, Any]) -> None:
+        item = {key: value for key, value in job.items() if value is not None}
+        item['expires_at'] = int(time.time()) + JOB_TTL_SECONDS
+        self.table.put_item(Item=item, ConditionExpression='attribute_not_exists(job_id)')
+
+    def update(self, job_id: str, **fields) -> None:
+        fields['updated_at'] = datetime.utcnow().isoformat()
+        if 'grant_data' in fields:
+            fields['grant_data'] = json.dumps(fields['grant_data'], default=str)
+
+        self.table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET ' + ', '.join(f'#{key} = :{key}' for key in fields),
+            ExpressionAttributeNames={f'#{key}': key for key in fields},
+            ExpressionAttributeValues={f':{key}': value for key, value in fields.items()}
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={'job_id': job_id}).get('Item')
+        if item and isinstance(item.get('grant_data'), str):
+            item['grant_data'] = json.loads(item['grant_data'])
+        return item
+
+class InMemoryJobStore:
+    """Dict-backed job store for tests and local development"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def create(self, job: Dict[str, Any]) -> None:
+        if job['job_id'] in self.jobs:
+            raise ValueError(f"Job already exists: {job['job_id']}")
+        self.jobs[job['job_id']] = dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        fields['updated_at'] = datetime.utcnow().isoformat()
+        self.jobs.setdefault(job_id, {'job_id': job_id}).update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+class SQSJobQueue:
+    """Hands jobs to the worker through an SQS queue"""
+
+    def __init__(self, queue_url: str = GRANT_JOBS_QUEUE_URL, sqs_client=None):
+        self.queue_url = queue_url
+        self.sqs = sqs_client or aws_clients.client('sqs')
+
+    def send(self, message: Dict[str, Any]) -> None:
+        if not self.queue_url:
+            raise ValueError("GRANT_JOBS_QUEUE_URL environment variable not set")
+        self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(message))
+
+class LocalJobQueue:
+    """
+    In-process stand-in for SQS: messages are held until drain() runs them
+    through the worker function, one at a time, in FIFO order.
+    """
+
+    def __init__(self, worker: Callable[[Dict[str, Any]], None]):
+        self.worker = worker
+        self.messages = deque()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+
+    def drain(self) -> int:
+        processed = 0
+        while self.messages:
+            self.worker(self.messages.popleft())
+            processed += 1
+        return processed
+
+def create_job_store(backend: str = GRANT_JOBS_BACKEND):
+    """
+    Build the configured job store
+    """
+    if backend == 'local':
+        return InMemoryJobStore()
+    return DynamoDBJobStore()
+
+def create_job_queue(worker: Callable[[Dict[str, Any]], None], backend: str = GRANT_JOBS_BACKEND):
+    """
+    Build the configured job queue; worker is only used by the local queue
+    """
+    if backend == 'local':
+        return LocalJobQueue(worker)
+    return SQSJobQueue()
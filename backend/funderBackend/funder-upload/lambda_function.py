@@ -1,16 +1,30 @@
 import json
-import boto3
 import uuid
 import base64
 import os
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-import PyPDF2
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 import io
 import re
+import math
+import time
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote, unquote, unquote_plus
 from botocore.exceptions import ClientError
 from decimal import Decimal
+import grant_cache
+import grant_jobs
+import grant_catalog
+import grant_embeddings
+import bedrock_cache
+import aws_clients
+import metrics
+import pdf_classifier
+import textract_extraction
+from log_utils import Payload
 
 # Configure logging
 logger = logging.getLogger()
@@ -21,21 +35,72 @@ GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
 S3_BUCKET = os.environ.get('S3_BUCKET', 'grant-documents-bucket')
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
 BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')  # Default to us-east-1
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '40'))  # Smaller PDFs are parsed in-process
+PDF_EXTRACTION_WORKERS = int(os.environ.get('PDF_EXTRACTION_WORKERS', '0'))  # 0 = one worker per vCPU
+PDF_WORKER_TIMEOUT_SECONDS = float(os.environ.get('PDF_WORKER_TIMEOUT_SECONDS', '20'))  # Then fall back to sequential parsing
+PROMPT_TEXT_BUDGET = int(os.environ.get('PROMPT_TEXT_BUDGET', '7000'))  # Document characters sent to Bedrock
+PROMPT_VERSION = 'grant-extraction-v1'  # Bump whenever build_grant_extraction_prompt changes
+EXTRACTION_MODE = os.environ.get('EXTRACTION_MODE', 'single')  # single = first PROMPT_TEXT_BUDGET chars, chunked = whole document
+CHUNK_OVERLAP_CHARS = int(os.environ.get('CHUNK_OVERLAP_CHARS', '500'))  # Shared text between neighbouring chunks
+MAX_EXTRACTION_CHUNKS = int(os.environ.get('MAX_EXTRACTION_CHUNKS', '20'))
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get('BEDROCK_MAX_CONCURRENCY', '4'))  # Parallel Bedrock calls per container
+UPLOAD_PREFIX = os.environ.get('UPLOAD_PREFIX', 'uploads/')  # Direct-to-S3 uploads land here
+PRESIGNED_URL_EXPIRY = int(os.environ.get('PRESIGNED_URL_EXPIRY', '900'))  # Seconds
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(200 * 1024 * 1024)))
+MULTIPART_UPLOAD_THRESHOLD = int(os.environ.get('MULTIPART_UPLOAD_THRESHOLD', str(50 * 1024 * 1024)))
+MULTIPART_PART_SIZE = int(os.environ.get('MULTIPART_PART_SIZE', str(10 * 1024 * 1024)))  # S3 minimum is 5 MiB
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))  # Should match the queue's maxReceiveCount
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '200'))  # Documents per batch manifest
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '0'))  # 0 = BEDROCK_MAX_CONCURRENCY
+
+GRANT_STATUSES = ["open", "closed", "upcoming"]
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bedrock = boto3.client('bedrock-runtime', region_name=BEDROCK_REGION)
-s3 = boto3.client('s3')
+dynamodb = aws_clients.lazy_resource('dynamodb')
+bedrock = aws_clients.lazy_client('bedrock-runtime', region_name=BEDROCK_REGION)
+s3 = aws_clients.lazy_client('s3')
+textract = aws_clients.lazy_client('textract')  # OCR for scanned PDFs
+grant_embedder = grant_embeddings.create_embedder()  # Matchmaking retrieval vectors, computed once per grant
+document_cache = grant_cache.create_grant_cache_store()
+job_store = grant_jobs.create_job_store()
+job_queue = grant_jobs.create_job_queue(lambda message: run_grant_job(message['job_id']))
+bedrock_slots = threading.BoundedSemaphore(BEDROCK_MAX_CONCURRENCY)  # Shared by chunked and batch processing
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for grant document upload and processing
+    
+    Besides the inline upload (Base64 PDF in the JSON body) this handles the
+    direct-to-S3 flow: POST .../upload-session issues presigned upload URLs,
+    POST .../upload-session/complete finishes multipart uploads, and S3
+    ObjectCreated notifications under UPLOAD_PREFIX trigger processing.
+    
+    With "mode": "async" the inline upload only stores the PDF and queues a
+    job (202); the SQS-triggered worker does the processing and
+    GET ?job_id=... reports progress.
+    
+    POST .../batch (or any body with a "manifest") processes a list of PDFs
+    already in S3 and reports per-document status.
     """
     
+    # S3 notifications for documents uploaded straight to the bucket
+    if is_s3_event(event):
+        return handle_s3_upload_event(event)
+    
+    # Queued grant-processing jobs
+    if is_sqs_event(event):
+        return handle_job_queue_event(event)
+    
     # Handle preflight OPTIONS request
     if event.get('httpMethod') == 'OPTIONS':
         return create_response(200, {'message': 'CORS preflight successful'})
     
+    # Job status lookups
+    if event.get('httpMethod') == 'GET':
+        return handle_job_status(event)
+    
     try:
         # Parse the incoming request
         if 'body' in event:
@@ -43,6 +108,15 @@ def lambda_handler(event, context):
         else:
             body = event
         
+        # Route presigned upload and batch requests
+        path = event.get('path') or ''
+        if '/batch' in path or 'manifest' in body:
+            return handle_batch_upload(body)
+        if '/upload-session/complete' in path:
+            return handle_complete_upload_session(body)
+        if '/upload-session' in path:
+            return handle_create_upload_session(body)
+        
         # Extract required fields
         title = body.get('title')  # Optional, will be extracted by AI if not provided
         issuer = body.get('issuer')  # This should be the funder_id
@@ -64,13 +138,76 @@ def lambda_handler(event, context):
         
         # Decode PDF content
         try:
-            pdf_bytes = base64.b64decode(pdf_content)
+            with metrics.stage('base64_decode'):
+                pdf_bytes = base64.b64decode(pdf_content)
+            metrics.record_size('pdf', len(pdf_bytes))
         except Exception as e:
             logger.error(f"Failed to decode PDF content: {str(e)}")
             return create_response(400, {'error': 'Invalid PDF content encoding'})
         
-        # Store PDF in S3
         s3_key = f"grants/{issuer}/{grant_id}/original.pdf"
+        
+        # Job mode: the worker reads the PDF back from S3, so store it before queueing
+        if body.get('mode') == 'async':
+            archive_pdf_to_s3(s3_key, pdf_bytes, grant_id, issuer, title)
+            
+            job = grant_jobs.new_job(grant_id, issuer, title, s3_key)
+            job_store.create(job)
+            job_queue.send({'job_id': job['job_id']})
+            logger.info(f"Queued grant processing job {job['job_id']} for grant {grant_id}")
+            
+            return create_response(202, {
+                'message': 'Grant uploaded, processing queued',
+                'job_id': job['job_id'],
+                'grant_id': grant_id,
+                'status': job['status']
+            })
+        
+        # Archive the PDF to S3 while the text is extracted and analysed. Both
+        # stages are joined before the DynamoDB write, so a grant record never
+        # points at a missing object and no upload is left running on return.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            archive_future = executor.submit(archive_pdf_to_s3, s3_key, pdf_bytes, grant_id, issuer, title)
+            
+            # Extract text and analyse it with Bedrock
+            result = process_grant_document(pdf_bytes, title, issuer, s3_location=(S3_BUCKET, s3_key),
+                                            s3_ready=archive_future.result,
+                                            ocr_timeout=textract_extraction.TEXTRACT_REQUEST_POLL_TIMEOUT)
+            archive_future.result()
+        
+        if result is None:
+            return create_response(400, {'error': 'Failed to extract text from PDF'})
+        grant_data = result['grant_data']
+        
+        # Store grant information in DynamoDB
+        save_grant_to_dynamodb(grant_id, grant_data, s3_key)
+        
+        # Return success response
+        return create_response(200, {
+            'message': 'Grant uploaded and processed successfully',
+            'grant_id': grant_id,
+            'grant_data': grant_data,
+            'cache_hit': result['cache_hit']
+        })
+        
+    except TimeoutError as e:
+        logger.error(f"Grant upload timed out: {str(e)}")
+        return create_response(504, {
+            'error': 'Failed to extract text from PDF',
+            'message': f'{str(e)}; upload with "mode": "async" for long scanned documents'
+        })
+    except Exception as e:
+        logger.error(f"Error processing grant upload: {str(e)}")
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+
+def archive_pdf_to_s3(s3_key: str, pdf_bytes: bytes, grant_id: str, issuer: str, title: Optional[str]):
+    """
+    Store the original PDF in S3
+    """
+    with metrics.stage('s3_put'):
         s3.put_object(
             Bucket=S3_BUCKET,
             Key=s3_key,
@@ -83,66 +220,683 @@ def lambda_handler(event, context):
                 'uploaded_at': datetime.utcnow().isoformat()
             }
         )
+    
+    logger.info(f"PDF stored in S3: {s3_key}")
+
+def process_grant_document(pdf_bytes: bytes, title: Optional[str], issuer: str,
+                           on_stage: Optional[Callable[[str], None]] = None,
+                           allow_parallel: bool = True,
+                           s3_location: Optional[Tuple[str, str]] = None,
+                           s3_ready: Optional[Callable[[], Any]] = None,
+                           ocr_timeout: float = textract_extraction.TEXTRACT_POLL_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    Extract text from a grant PDF and analyse it with Bedrock
+    
+    Identical documents reuse the cached analysis. Returns a dict with
+    'grant_data' and 'cache_hit', or None if no text could be extracted;
+    OCR errors are raised with their reason.
+    on_stage, if given, is called with 'extracting' and 'analysing' as
+    the pipeline progresses. allow_parallel=False keeps PDF parsing in this
+    thread (see extract_text_from_pdf). s3_location (bucket, key) lets
+    scanned documents too large to send inline be OCRed from S3; s3_ready
+    is called first if the object may still be uploading. ocr_timeout caps
+    the wait for a multi-page Textract job.
+    """
+    # Look for a previous analysis of the exact same document
+    cache_key = grant_cache.compute_cache_key(pdf_bytes, BEDROCK_MODEL_ID, get_prompt_version())
+    with metrics.stage('cache_lookup'):
+        cached = lookup_cached_extraction(cache_key)
+    if cached:
+        # Identical document already analysed - skip PyPDF2 and Bedrock
+        logger.info(f"Document cache hit, reusing previous extraction: {cache_key}")
+        grant_data = dict(cached['grant_data'])
+        grant_data['issuer'] = issuer
+        metrics.record_count('document_cache_hits')
+        return {'grant_data': grant_data, 'cache_hit': True}
+    
+    # Chunked mode analyses the whole document; otherwise extract only what the prompt uses
+    chunked = EXTRACTION_MODE == 'chunked'
+    if on_stage:
+        on_stage('extracting')
+    with metrics.stage('extract_text'):
+        extracted_text = extract_document_text(pdf_bytes, max_chars=None if chunked else PROMPT_TEXT_BUDGET,
+                                               allow_parallel=allow_parallel, s3_location=s3_location,
+                                               s3_ready=s3_ready, ocr_timeout=ocr_timeout)
+    if not extracted_text:
+        return None
+    metrics.record_size('extracted_text', len(extracted_text))
+    
+    logger.info(f"Extracted {len(extracted_text)} characters from PDF")
+    logger.debug("Extracted text: %s", Payload(extracted_text))
+    
+    # Use Bedrock to extract structured information
+    if on_stage:
+        on_stage('analysing')
+    logger.info("Sending text to Bedrock for analysis...")
+    try:
+        if chunked:
+            grant_data = extract_grant_info_chunked(extracted_text, title, issuer, strict=True)
+        else:
+            grant_data = extract_grant_info_with_bedrock(extracted_text, title, issuer, strict=True)
+        store_cached_extraction(cache_key, extracted_text, grant_data)
+    except Exception:
+        # Fallback results are not cached so the next upload retries Bedrock
+        grant_data = create_fallback_grant_info(title, issuer)
+    logger.info("Bedrock analysis complete")
+    logger.debug("Extracted data: %s", Payload(grant_data))
+    
+    return {'grant_data': grant_data, 'cache_hit': False}
+
+def handle_create_upload_session(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Issue presigned S3 upload URL(s) so the client can send the PDF straight to S3
+    
+    Files above MULTIPART_UPLOAD_THRESHOLD get a multipart upload with one
+    presigned URL per part; the client then calls .../upload-session/complete
+    with the part ETags (the bucket's CORS rules must expose the ETag header).
+    """
+    issuer = body.get('issuer')  # This should be the funder_id
+    title = body.get('title')  # Optional, will be extracted by AI if not provided
+    file_size = body.get('file_size')  # Optional, in bytes
+    
+    if not issuer:
+        return create_response(400, {'error': 'Missing required field: issuer'})
+    if '/' in issuer:
+        return create_response(400, {'error': 'Invalid issuer'})
+    
+    try:
+        file_size = int(file_size) if file_size is not None else None
+    except (TypeError, ValueError):
+        return create_response(400, {'error': 'file_size must be a number of bytes'})
+    
+    if file_size is not None and (file_size <= 0 or file_size > MAX_UPLOAD_BYTES):
+        return create_response(400, {'error': f'file_size must be between 1 and {MAX_UPLOAD_BYTES} bytes'})
+    
+    grant_id = str(uuid.uuid4())
+    s3_key = f"{UPLOAD_PREFIX}{issuer}/{grant_id}/original.pdf"
+    
+    # Title travels as object metadata; S3 metadata must be ASCII so it is URL-quoted
+    metadata = {'title': quote(title)} if title else {}
+    
+    if file_size is not None and file_size > MULTIPART_UPLOAD_THRESHOLD:
+        upload = create_multipart_upload_urls(s3_key, metadata, file_size)
+    else:
+        url = s3.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': S3_BUCKET,
+                'Key': s3_key,
+                'ContentType': 'application/pdf',
+                'Metadata': metadata
+            },
+            ExpiresIn=PRESIGNED_URL_EXPIRY
+        )
+        headers = {'Content-Type': 'application/pdf'}
+        headers.update({f'x-amz-meta-{key}': value for key, value in metadata.items()})
+        upload = {'method': 'PUT', 'url': url, 'headers': headers}
+    
+    logger.info(f"Created {upload['method']} upload session for grant {grant_id}: {s3_key}")
+    
+    return create_response(200, {
+        'message': 'Upload session created',
+        'grant_id': grant_id,
+        's3_key': s3_key,
+        'upload': upload,
+        'expires_in': PRESIGNED_URL_EXPIRY
+    })
+
+def create_multipart_upload_urls(s3_key: str, metadata: Dict[str, str], file_size: int) -> Dict[str, Any]:
+    """
+    Start a multipart upload and presign one URL per part
+    """
+    part_count = math.ceil(file_size / MULTIPART_PART_SIZE)
+    
+    response = s3.create_multipart_upload(
+        Bucket=S3_BUCKET,
+        Key=s3_key,
+        ContentType='application/pdf',
+        Metadata=metadata
+    )
+    upload_id = response['UploadId']
+    
+    parts = []
+    for part_number in range(1, part_count + 1):
+        url = s3.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': S3_BUCKET,
+                'Key': s3_key,
+                'UploadId': upload_id,
+                'PartNumber': part_number
+            },
+            ExpiresIn=PRESIGNED_URL_EXPIRY
+        )
+        parts.append({'part_number': part_number, 'url': url})
+    
+    return {
+        'method': 'MULTIPART',
+        'upload_id': upload_id,
+        'part_size': MULTIPART_PART_SIZE,
+        'parts': parts
+    }
+
+def handle_complete_upload_session(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Complete a multipart upload; processing starts from the resulting S3 notification
+    """
+    s3_key = body.get('s3_key')
+    upload_id = body.get('upload_id')
+    parts = body.get('parts')  # [{"part_number": 1, "etag": "..."}]
+    
+    if not all([s3_key, upload_id, parts]):
+        return create_response(400, {
+            'error': 'Missing required fields: s3_key, upload_id, parts'
+        })
+    if not s3_key.startswith(UPLOAD_PREFIX):
+        return create_response(400, {'error': 'Invalid s3_key'})
+    
+    try:
+        completed_parts = sorted(
+            [{'PartNumber': int(part['part_number']), 'ETag': part['etag']} for part in parts],
+            key=lambda part: part['PartNumber']
+        )
+    except (KeyError, TypeError, ValueError):
+        return create_response(400, {'error': 'Each part needs part_number and etag'})
+    
+    s3.complete_multipart_upload(
+        Bucket=S3_BUCKET,
+        Key=s3_key,
+        UploadId=upload_id,
+        MultipartUpload={'Parts': completed_parts}
+    )
+    
+    logger.info(f"Completed multipart upload: {s3_key}")
+    
+    return create_response(200, {
+        'message': 'Upload completed, processing started',
+        's3_key': s3_key
+    })
+
+def is_s3_event(event: Dict[str, Any]) -> bool:
+    """Check whether the event is an S3 notification"""
+    records = event.get('Records') or []
+    return bool(records) and records[0].get('eventSource') == 'aws:s3'
+
+def handle_s3_upload_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process documents uploaded directly to S3
+    
+    Errors are raised so Lambda retries the asynchronous invocation.
+    """
+    processed = []
+    for record in event['Records']:
+        bucket = record['s3']['bucket']['name']
+        s3_key = unquote_plus(record['s3']['object']['key'])
+        processed.append(process_uploaded_object(bucket, s3_key))
+    
+    return {'processed': processed}
+
+def process_uploaded_object(bucket: str, s3_key: str) -> Dict[str, Any]:
+    """
+    Run extraction, Bedrock analysis and the DynamoDB write for one uploaded object
+    """
+    match = re.match(rf'^{re.escape(UPLOAD_PREFIX)}([^/]+)/([^/]+)/original\.pdf$', s3_key)
+    if not match:
+        logger.warning(f"Ignoring object outside the upload layout: {s3_key}")
+        return {'s3_key': s3_key, 'status': 'skipped'}
+    
+    issuer, grant_id = match.groups()
+    logger.info(f"Processing direct upload for grant {grant_id}: s3://{bucket}/{s3_key}")
+    
+    # Read the object body straight into bytes - no Base64 round trip
+    with metrics.stage('s3_get'):
+        s3_object = s3.get_object(Bucket=bucket, Key=s3_key)
+        title = unquote(s3_object.get('Metadata', {}).get('title', '')) or None
+        pdf_bytes = s3_object['Body'].read()
+    metrics.record_size('pdf', len(pdf_bytes))
+    
+    result = process_grant_document(pdf_bytes, title, issuer, s3_location=(bucket, s3_key))
+    if result is None:
+        logger.error(f"Failed to extract text from uploaded PDF: {s3_key}")
+        return {'s3_key': s3_key, 'grant_id': grant_id, 'status': 'failed', 'error': 'Failed to extract text from PDF'}
+    
+    # grant_id comes from the key, so a redelivered notification overwrites the same record
+    save_grant_to_dynamodb(grant_id, result['grant_data'], s3_key)
+    
+    return {'s3_key': s3_key, 'grant_id': grant_id, 'status': 'processed'}
+
+def is_sqs_event(event: Dict[str, Any]) -> bool:
+    """Check whether the event is an SQS batch"""
+    records = event.get('Records') or []
+    return bool(records) and records[0].get('eventSource') == 'aws:sqs'
+
+def handle_job_queue_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run queued grant-processing jobs
+    
+    Failed messages are reported individually (the event source mapping
+    needs ReportBatchItemFailures) so only they are redelivered.
+    """
+    batch_item_failures = []
+    for record in event['Records']:
+        try:
+            message = json.loads(record['body'])
+            attempt = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+            run_grant_job(message['job_id'], attempt)
+        except Exception as e:
+            logger.error(f"Grant processing job failed for message {record.get('messageId')}: {str(e)}")
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': batch_item_failures}
+
+def run_grant_job(job_id: str, attempt: int = 1):
+    """
+    Process one queued job: extraction, Bedrock analysis and the DynamoDB write
+    
+    Transient errors are re-raised for redelivery until JOB_MAX_ATTEMPTS,
+    after which the job is marked failed.
+    """
+    job = job_store.get(job_id)
+    if not job:
+        logger.warning(f"Unknown grant processing job: {job_id}")
+        return
+    if job['status'] in ('completed', 'failed'):
+        logger.info(f"Job {job_id} already {job['status']}, skipping redelivered message")
+        return
+    
+    try:
+        with metrics.stage('s3_get'):
+            s3_object = s3.get_object(Bucket=S3_BUCKET, Key=job['s3_key'])
+            pdf_bytes = s3_object['Body'].read()
+        metrics.record_size('pdf', len(pdf_bytes))
         
-        logger.info(f"PDF stored in S3: {s3_key}")
+        result = process_grant_document(
+            pdf_bytes, job.get('title'), job['issuer'],
+            on_stage=lambda stage: job_store.update(job_id, status=stage),
+            s3_location=(S3_BUCKET, job['s3_key'])
+        )
+        if result is None:
+            job_store.update(job_id, status='failed', error='Failed to extract text from PDF')
+            return
         
-        # Extract text from PDF
-        extracted_text = extract_text_from_pdf(pdf_bytes)
-        if not extracted_text:
-            return create_response(400, {'error': 'Failed to extract text from PDF'})
+        job_store.update(job_id, status='saving')
+        save_grant_to_dynamodb(job['grant_id'], result['grant_data'], job['s3_key'])
         
-        logger.info(f"Extracted {len(extracted_text)} characters from PDF")
-        logger.info(f"First 500 chars of extracted text: {extracted_text[:500]}")
-        logger.info(f"Last 500 chars of extracted text: {extracted_text[-500:]}")
+        job_store.update(job_id, status='completed', grant_data=result['grant_data'], cache_hit=result['cache_hit'], error=None)
+        logger.info(f"Grant processing job {job_id} completed")
         
-        # Use Bedrock to extract structured information
-        logger.info("Sending text to Bedrock for analysis...")
-        grant_data = extract_grant_info_with_bedrock(extracted_text, title, issuer)
-        logger.info(f"Bedrock analysis complete. Extracted data: {grant_data}")
+    except Exception as e:
+        if attempt >= JOB_MAX_ATTEMPTS:
+            job_store.update(job_id, status='failed', error=str(e))
+            logger.error(f"Grant processing job {job_id} failed after {attempt} attempts: {str(e)}")
+            return
+        job_store.update(job_id, status='queued', error=str(e), attempts=attempt)
+        raise
+
+def handle_job_status(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Report the progress of a grant-processing job, including grant_data once completed
+    """
+    try:
+        query_params = event.get('queryStringParameters') or {}
+        job_id = query_params.get('job_id')
+        if not job_id:
+            return create_response(400, {'error': 'Missing required query parameter: job_id'})
         
-        # Store grant information in DynamoDB
-        save_grant_to_dynamodb(grant_id, grant_data, s3_key)
+        job = job_store.get(job_id)
+        if not job:
+            return create_response(404, {'error': f'Job not found: {job_id}'})
         
-        # Return success response
         return create_response(200, {
-            'message': 'Grant uploaded and processed successfully',
-            'grant_id': grant_id,
-            'grant_data': grant_data
+            'job_id': job_id,
+            'grant_id': job.get('grant_id'),
+            'status': job.get('status'),
+            'error': job.get('error'),
+            'grant_data': job.get('grant_data'),
+            'created_at': job.get('created_at'),
+            'updated_at': job.get('updated_at')
         })
         
     except Exception as e:
-        logger.error(f"Error processing grant upload: {str(e)}")
+        logger.error(f"Error fetching job status: {str(e)}")
         return create_response(500, {
             'error': 'Internal server error',
             'message': str(e)
         })
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+def handle_batch_upload(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process a manifest of grant PDFs already stored in S3_BUCKET
+    
+    Body: {"issuer": "...", "manifest": [{"s3_key": "...", "title": "..."}, ...]}
+    
+    Documents are processed on a thread pool of BATCH_MAX_WORKERS (Bedrock
+    calls stay capped at BEDROCK_MAX_CONCURRENCY) and the grants are written
+    with a DynamoDB batch writer. Returns a per-item status report. Large
+    batches outlast API Gateway's 29 s limit; invoke the function directly
+    with the same body for those.
+    """
+    issuer = body.get('issuer')  # This should be the funder_id
+    manifest = body.get('manifest')
+    
+    if not issuer:
+        return create_response(400, {'error': 'Missing required field: issuer'})
+    if not isinstance(manifest, list) or not manifest:
+        return create_response(400, {'error': 'manifest must be a non-empty list of S3 objects'})
+    if len(manifest) > BATCH_MAX_ITEMS:
+        return create_response(400, {'error': f'manifest is limited to {BATCH_MAX_ITEMS} documents'})
+    if not all(isinstance(entry, dict) and isinstance(entry.get('s3_key'), str) for entry in manifest):
+        return create_response(400, {'error': 'Every manifest entry needs an s3_key'})
+    
+    try:
+        worker_count = min(BATCH_MAX_WORKERS or BEDROCK_MAX_CONCURRENCY, len(manifest))
+        logger.info(f"Processing batch of {len(manifest)} documents for {issuer} with {worker_count} workers")
+        
+        report = [None] * len(manifest)
+        table = dynamodb.Table(GRANTS_TABLE)
+        
+        # The batch writer is not thread-safe, so workers extract, analyse and
+        # build (and embed) each item; all writes happen here as results come in.
+        with ThreadPoolExecutor(max_workers=worker_count) as executor, table.batch_writer() as batch:
+            futures = {
+                executor.submit(process_batch_entry, entry, issuer): index
+                for index, entry in enumerate(manifest)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                s3_key = manifest[index]['s3_key']
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Batch item {s3_key} failed: {str(e)}")
+                    report[index] = {'s3_key': s3_key, 'status': 'failed', 'error': str(e)}
+                    continue
+                
+                with metrics.stage('dynamodb_batch_put'):
+                    batch.put_item(Item=result['item'])
+                report[index] = {
+                    's3_key': s3_key,
+                    'status': 'processed',
+                    'grant_id': result['item']['grant_id'],
+                    'title': result['grant_data'].get('title'),
+                    'cache_hit': result['cache_hit']
+                }
+        
+        processed = sum(1 for item in report if item['status'] == 'processed')
+        metrics.record_count('batch_processed', processed)
+        metrics.record_count('batch_failed', len(report) - processed)
+        
+        return create_response(200, {
+            'message': f'Processed {processed} of {len(report)} documents',
+            'processed': processed,
+            'failed': len(report) - processed,
+            'items': report
+        })
+        
+    except Exception as e:
+        logger.error(f"Error processing batch upload: {str(e)}")
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+
+def process_batch_entry(entry: Dict[str, Any], issuer: str) -> Dict[str, Any]:
+    """
+    Read one manifest document from S3, extract its grant data and build its item
+    
+    Returns process_grant_document's result plus the Grants table 'item'.
+    """
+    with metrics.stage('s3_get'):
+        s3_object = s3.get_object(Bucket=S3_BUCKET, Key=entry['s3_key'])
+        pdf_bytes = s3_object['Body'].read()
+    metrics.record_size('pdf', len(pdf_bytes))
+    
+    # Documents already run side by side here, so skip per-document worker processes
+    result = process_grant_document(pdf_bytes, entry.get('title'), issuer, allow_parallel=False,
+                                    s3_location=(S3_BUCKET, entry['s3_key']))
+    if result is None:
+        raise ValueError('Failed to extract text from PDF')
+    
+    # Building the item embeds the grant, another Bedrock call kept off the writer thread
+    result['item'] = build_grant_item(str(uuid.uuid4()), result['grant_data'], entry['s3_key'])
+    return result
+
+def get_prompt_version() -> str:
+    """Identify the prompt a cached result was produced with"""
+    return f"{PROMPT_VERSION}:{PROMPT_TEXT_BUDGET}:{EXTRACTION_MODE}"
+
+def lookup_cached_extraction(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a previous extraction for this document; cache errors are never fatal
+    """
+    try:
+        cached = document_cache.get(cache_key)
+        if cached and cached.get('extracted_text') and cached.get('grant_data'):
+            return cached
+    except Exception as e:
+        logger.warning(f"Document cache lookup failed: {str(e)}")
+    return None
+
+def store_cached_extraction(cache_key: str, extracted_text: str, grant_data: Dict[str, Any]):
+    """
+    Remember the extraction for identical future uploads; cache errors are never fatal
+    """
+    try:
+        document_cache.put(cache_key, {
+            'extracted_text': extracted_text,
+            'grant_data': grant_data,
+            'cached_at': datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        logger.warning(f"Document cache write failed: {str(e)}")
+
+def extract_document_text(pdf_bytes: bytes, max_chars: Optional[int] = None, allow_parallel: bool = True,
+                          s3_location: Optional[Tuple[str, str]] = None,
+                          s3_ready: Optional[Callable[[], Any]] = None,
+                          ocr_timeout: float = textract_extraction.TEXTRACT_POLL_TIMEOUT) -> str:
+    """
+    Extract text with the cheapest extractor that will succeed
+    
+    A quick pre-pass classifies the PDF. Scanned documents skip PyPDF2 and
+    go straight to Textract OCR; everything else is parsed with PyPDF2 and
+    only falls back to OCR if no text comes back. OCR failures are raised
+    (see extract_text_with_textract).
+    """
+    classification = pdf_classifier.classify_pdf(pdf_bytes)
+    if not pdf_classifier.needs_ocr(classification):
+        extracted_text = extract_text_from_pdf(pdf_bytes, max_chars=max_chars, allow_parallel=allow_parallel)
+        if extracted_text:
+            return extracted_text
+        logger.info(f"No text layer found in {classification['kind']} PDF, falling back to OCR")
+    
+    with metrics.stage('ocr'):
+        extracted_text = normalize_extracted_text(extract_text_with_textract(pdf_bytes, s3_location, s3_ready,
+                                                                             ocr_timeout))
+    return extracted_text[:max_chars] if max_chars is not None else extracted_text
+
+def extract_text_with_textract(pdf_bytes: bytes, s3_location: Optional[Tuple[str, str]] = None,
+                               s3_ready: Optional[Callable[[], Any]] = None,
+                               timeout: float = textract_extraction.TEXTRACT_POLL_TIMEOUT) -> str:
+    """
+    OCR a PDF with Amazon Textract, inline when small enough, otherwise from S3
+    
+    Failures are raised with the reason rather than returned as empty text:
+    TimeoutError when the job outlives timeout, RuntimeError when Textract
+    fails, ValueError when the PDF needs S3-based OCR but has no S3 location.
+    """
+    route = textract_extraction.choose_route(pdf_bytes)
+    if route != textract_extraction.ROUTE_INLINE and not s3_location:
+        raise ValueError("PDF needs S3-based OCR (multi-page or large) but has no S3 location")
+    
+    try:
+        if route == textract_extraction.ROUTE_INLINE:
+            return textract_extraction.detect_text(textract, {'Bytes': pdf_bytes})
+        
+        if s3_ready:
+            s3_ready()
+        bucket, key = s3_location
+        if route == textract_extraction.ROUTE_SYNC_S3:
+            return textract_extraction.detect_text(textract, {'S3Object': {'Bucket': bucket, 'Name': key}})
+        return textract_extraction.extract_text_async(textract, bucket, key, timeout=timeout)
+        
+    except TimeoutError as e:
+        logger.error(f"Textract OCR did not finish in time: {str(e)}")
+        raise TimeoutError(f"Textract OCR did not finish in time: {str(e)}") from e
+    except Exception as e:
+        logger.error(f"Textract OCR failed: {str(e)}")
+        raise RuntimeError(f"Textract OCR failed: {str(e)}") from e
+
+def extract_text_from_pdf(pdf_bytes: bytes, max_chars: Optional[int] = None, allow_parallel: bool = True) -> str:
     """
     Extract text from PDF using PyPDF2
+    
+    With max_chars set, pages are parsed lazily and parsing stops as soon as
+    the budget is filled; the result is the first max_chars characters of the
+    full normalized text. Without a budget, large documents are split into
+    page ranges and parsed in parallel across the Lambda's vCPUs, unless
+    allow_parallel is False (callers that already run documents concurrently).
     """
     try:
+        if max_chars is not None:
+            return extract_text_within_budget(pdf_bytes, max_chars)
+        
+        import PyPDF2  # Deferred: heavy, and not needed by preflight, status or cache-hit requests
         pdf_file = io.BytesIO(pdf_bytes)
         pdf_reader = PyPDF2.PdfReader(pdf_file)
+        page_count = len(pdf_reader.pages)
         
-        extracted_text = ""
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            extracted_text += page.extract_text() + "\n"
+        page_texts = None
+        worker_count = get_extraction_worker_count(page_count) if allow_parallel else 1
+        if worker_count > 1:
+            try:
+                page_texts = extract_pages_in_parallel(pdf_bytes, page_count, worker_count)
+                logger.info(f"Extracted {page_count} pages using {worker_count} worker processes")
+            except Exception as e:
+                logger.warning(f"Parallel PDF extraction failed, falling back to sequential: {str(e)}")
         
-        # Clean up the text
-        extracted_text = re.sub(r'\n+', '\n', extracted_text)
-        extracted_text = re.sub(r'\s+', ' ', extracted_text)
+        if page_texts is None:
+            page_texts = [page.extract_text() for page in pdf_reader.pages]
         
-        return extracted_text.strip()
+        return normalize_extracted_text("\n".join(page_texts))
         
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         return ""
 
-def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[str, Any]:
+def iter_pdf_page_text(pdf_bytes: bytes) -> Iterator[str]:
     """
-    Use AWS Bedrock to extract structured grant information from text
+    Lazily yield the normalized text of each non-empty page, in page order
+    """
+    import PyPDF2  # Deferred, see extract_text_from_pdf
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    for page in pdf_reader.pages:
+        page_text = normalize_extracted_text(page.extract_text())
+        if page_text:
+            yield page_text
+
+def extract_text_within_budget(pdf_bytes: bytes, max_chars: int) -> str:
+    """
+    Extract pages only until max_chars characters of normalized text are available
+    """
+    page_texts = []
+    total_chars = 0
+    
+    for page_text in iter_pdf_page_text(pdf_bytes):
+        # Pages are joined with a single space, matching full-document normalization
+        total_chars += len(page_text) + (1 if page_texts else 0)
+        page_texts.append(page_text)
+        if total_chars >= max_chars:
+            logger.info(f"Text budget of {max_chars} characters reached after {len(page_texts)} pages")
+            break
+    
+    return " ".join(page_texts)[:max_chars]
+
+def normalize_extracted_text(text: str) -> str:
+    """Collapse line breaks and whitespace runs in extracted PDF text"""
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def get_extraction_worker_count(page_count: int) -> int:
+    """
+    Number of worker processes to use for a document of the given size
+    """
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return 1
+    
+    workers = PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+    return max(1, min(workers, page_count))
+
+def extract_pages_in_parallel(pdf_bytes: bytes, page_count: int, worker_count: int) -> List[str]:
+    """
+    Extract page text across worker processes, one contiguous page range each.
+    
+    Lambda has no /dev/shm, so multiprocessing.Pool and Queue are unavailable;
+    each worker is a plain Process that reports back through its own Pipe.
+    Workers are forked while other threads (the S3 archive upload) may hold
+    boto3, urllib3 or logging locks, so a child can deadlock; results are
+    awaited for at most PDF_WORKER_TIMEOUT_SECONDS before the workers are
+    terminated and the caller falls back to sequential parsing.
+    """
+    import multiprocessing  # Deferred: only large documents take this path
+    ctx = multiprocessing.get_context('fork')
+    bounds = [page_count * i // worker_count for i in range(worker_count + 1)]
+    deadline = time.monotonic() + PDF_WORKER_TIMEOUT_SECONDS
+    
+    workers = []
+    try:
+        for start, end in zip(bounds, bounds[1:]):
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=_extract_page_range_worker,
+                args=(pdf_bytes, start, end, child_conn),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            workers.append((process, parent_conn))
+        
+        # Collect results in page order; each worker has its own pipe so reading
+        # them one after another cannot deadlock
+        page_texts = []
+        for process, conn in workers:
+            if not conn.poll(max(0.0, deadline - time.monotonic())):
+                metrics.record_count('pdf_worker_timeouts')
+                raise TimeoutError(f"PDF workers did not finish within {PDF_WORKER_TIMEOUT_SECONDS}s")
+            status, payload = conn.recv()
+            if status != 'ok':
+                raise RuntimeError(payload)
+            page_texts.extend(payload)
+        
+        return page_texts
+        
+    finally:
+        for process, conn in workers:
+            conn.close()
+            process.join(timeout=max(0.0, deadline - time.monotonic()))  # Workers that replied exit right away
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+def _extract_page_range_worker(pdf_bytes: bytes, start: int, end: int, conn) -> None:
+    """
+    Worker process entry point: open a private PdfReader and extract pages [start, end)
+    """
+    try:
+        import PyPDF2  # Already loaded in the parent before forking
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        conn.send(('ok', [pdf_reader.pages[i].extract_text() for i in range(start, end)]))
+    except Exception as e:
+        conn.send(('error', f"pages {start}-{end}: {type(e).__name__}: {str(e)}"))
+    finally:
+        conn.close()
+
+def build_grant_extraction_prompt(text: str, issuer: str) -> str:
+    """
+    Build the structured-extraction prompt for a grant document
+    
+    Only the first PROMPT_TEXT_BUDGET characters of the text are included,
+    so callers can stop extracting text once that much is available.
     """
     
     # Define the predefined sector list
@@ -157,8 +911,7 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
         "Social Enterprise", "Non-profit & Community Services", "Personal Services"
     ]
     
-    # Construct the prompt for Bedrock
-    prompt = f"""
+    return f"""
     Analyze this grant document and extract structured information. Return ONLY a valid JSON object with this exact schema:
 
     {{
@@ -188,10 +941,23 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
     - Required documents should list document types needed for application
 
     Document text:
-    {text[:7000]}
+    {text[:PROMPT_TEXT_BUDGET]}
 
     Return only the JSON object, no additional text or explanations.
     """
+
+def extract_grant_info_with_bedrock(text: str, title: str, issuer: str, strict: bool = False,
+                                    validate: bool = True) -> Dict[str, Any]:
+    """
+    Use AWS Bedrock to extract structured grant information from text
+    
+    On failure the basic fallback structure is returned, unless strict is set,
+    in which case the error is re-raised. With validate=False the parsed JSON
+    is returned as the model gave it, without defaults filled in, for callers
+    that merge several results before validating.
+    """
+    
+    prompt = build_grant_extraction_prompt(text, issuer)
     
     try:
         # Prepare request for Bedrock - Different format for Nova vs Claude
@@ -230,17 +996,13 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
             logger.info("Using Claude model format")
         
         logger.info(f"Sending request to Bedrock model: {BEDROCK_MODEL_ID}")
-        logger.info(f"Prompt being sent (first 1000 chars): {prompt[:1000]}")
+        logger.debug("Prompt being sent: %s", Payload(prompt, max_chars=1000))
         
-        # Call Bedrock
-        response = bedrock.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(request_body),
-            contentType='application/json'
-        )
+        # Call Bedrock (memoized across retries and re-uploads)
+        with bedrock_slots:
+            response_body = bedrock_cache.invoke_model_cached(bedrock, BEDROCK_MODEL_ID, request_body, PROMPT_VERSION)
         
         # Parse response - Different format for Nova vs Claude
-        response_body = json.loads(response['body'].read())
         
         if "nova" in BEDROCK_MODEL_ID.lower():
             # Nova response format: output.message.content[0].text
@@ -249,9 +1011,9 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
             # Claude response format: content[0].text
             extracted_info = response_body.get('content', [{}])[0].get('text', '{}')
         
-        logger.info(f"Raw Bedrock response body: {response_body}")
-        logger.info(f"Extracted info from Bedrock: {extracted_info}")
-        logger.info(f"Response parsing method: {'Nova format' if 'nova' in BEDROCK_MODEL_ID.lower() else 'Claude format'}")
+        logger.debug("Raw Bedrock response body: %s", Payload(response_body))
+        logger.debug("Extracted info from Bedrock: %s", Payload(extracted_info))
+        logger.debug("Response parsing method: %s", 'Nova format' if 'nova' in BEDROCK_MODEL_ID.lower() else 'Claude format')
         
         # Clean and parse the JSON response
         try:
@@ -269,6 +1031,11 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
             else:
                 raise ValueError("No valid JSON found in Bedrock response")
         
+        if not isinstance(grant_info, dict):
+            raise ValueError("Bedrock response is not a JSON object")
+        if not validate:
+            return grant_info
+        
         # Validate and clean the extracted information
         grant_info = validate_and_clean_grant_info(grant_info, title, issuer)
         
@@ -280,19 +1047,152 @@ def extract_grant_info_with_bedrock(text: str, title: str, issuer: str) -> Dict[
         logger.error(f"Exception type: {type(e).__name__}")
         logger.error(f"Full error details: {e}", exc_info=True)
         
+        if strict:
+            raise
+        
         # Fallback: return basic structure with provided information
-        return {
-            "title": title or f"Grant Document - {datetime.utcnow().strftime('%B %d, %Y')}",
-            "issuer": issuer,
-            "country": None,
-            "status": "open",
-            "deadline": None,
-            "amount_min": None,
-            "amount_max": None,
-            "sector_tags": [],
-            "eligibility_rules": [],
-            "required_documents": []
+        return create_fallback_grant_info(title, issuer)
+
+def split_text_into_chunks(text: str, chunk_size: int = PROMPT_TEXT_BUDGET,
+                           overlap: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """
+    Split text into windows of chunk_size characters, each sharing overlap
+    characters with the previous one so facts on a boundary are not cut in half
+    """
+    if len(text) <= chunk_size:
+        return [text]
+    
+    step = max(1, chunk_size - overlap)
+    chunks = []
+    for start in range(0, len(text), step):
+        chunks.append(text[start:start + chunk_size])
+        if start + chunk_size >= len(text):
+            break
+    
+    return chunks
+
+def extract_grant_info_chunked(text: str, title: str, issuer: str, strict: bool = False) -> Dict[str, Any]:
+    """
+    Map-reduce extraction for documents longer than the prompt window
+    
+    Each overlapping chunk goes through the regular extraction prompt, with
+    at most BEDROCK_MAX_CONCURRENCY calls in flight; the raw partial results
+    are merged in chunk order and validated once, so a chunk that says nothing
+    about a field does not contribute validation defaults. Failed chunks are
+    skipped; if every chunk fails the fallback structure is returned (or the
+    error raised when strict is set).
+    """
+    chunks = split_text_into_chunks(text)
+    if len(chunks) == 1:
+        return extract_grant_info_with_bedrock(text, title, issuer, strict=strict)
+    
+    if len(chunks) > MAX_EXTRACTION_CHUNKS:
+        logger.warning(f"Document needs {len(chunks)} chunks, analysing only the first {MAX_EXTRACTION_CHUNKS}")
+        chunks = chunks[:MAX_EXTRACTION_CHUNKS]
+    
+    logger.info(f"Analysing {len(chunks)} chunks with up to {BEDROCK_MAX_CONCURRENCY} concurrent Bedrock calls")
+    
+    partials = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(BEDROCK_MAX_CONCURRENCY, len(chunks)))) as executor:
+        futures = {
+            executor.submit(extract_grant_info_with_bedrock, chunk, title, issuer, True, False): index
+            for index, chunk in enumerate(chunks)
         }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                partials[index] = future.result()
+            except Exception as e:
+                logger.warning(f"Extraction failed for chunk {index + 1}/{len(chunks)}: {str(e)}")
+    
+    results = [partial for partial in partials if partial is not None]
+    if not results:
+        if strict:
+            raise ValueError("Bedrock extraction failed for every chunk")
+        return create_fallback_grant_info(title, issuer)
+    
+    logger.info(f"Merging {len(results)} partial extractions")
+    return merge_partial_grant_info(results, title, issuer)
+
+def merge_partial_grant_info(partials: List[Dict[str, Any]], title: str, issuer: str) -> Dict[str, Any]:
+    """
+    Deterministically merge raw per-chunk results (given in chunk order)
+    
+    Each field is cleaned with the usual validators first, and fields a chunk
+    left out or got wrong are ignored rather than defaulted. Defaults are
+    applied once, to the merged record.
+    
+    - title: first chunk that found one
+    - country, status, deadline: most frequent value, ties go to the earliest chunk
+    - amount_min / amount_max: smallest minimum and largest maximum
+    - sector_tags, eligibility_rules, required_documents: union, de-duplicated
+      case-insensitively, in order of first appearance
+    """
+    def first_value(field):
+        return next((partial[field].strip() for partial in partials
+                     if isinstance(partial.get(field), str) and partial[field].strip()), None)
+    
+    def most_common(field, clean=lambda value: value):
+        values = [clean(partial.get(field)) for partial in partials]
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        counts = Counter(values)
+        top_count = max(counts.values())
+        return next(value for value in values if counts[value] == top_count)
+    
+    def union(field, validator, key_func):
+        merged, seen = [], set()
+        for partial in partials:
+            for item in validator(partial.get(field, [])):
+                key = key_func(item)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(item)
+        return merged
+    
+    def amounts(field):
+        values = [validate_number(partial.get(field)) for partial in partials]
+        return [value for value in values if value is not None]
+    
+    amounts_min, amounts_max = amounts('amount_min'), amounts('amount_max')
+    
+    merged = {
+        "issuer": issuer,
+        "country": most_common('country', lambda country: (country.strip() or None) if isinstance(country, str) else None),
+        "status": most_common('status', lambda status: status if status in GRANT_STATUSES else None),
+        "deadline": most_common('deadline', validate_date),
+        "amount_min": min(amounts_min) if amounts_min else None,
+        "amount_max": max(amounts_max) if amounts_max else None,
+        "sector_tags": union('sector_tags', validate_sector_tags, lambda tag: tag.lower()),
+        "eligibility_rules": union('eligibility_rules', validate_eligibility_rules,
+                                   lambda rule: (rule['key'].lower(), rule['value'].lower())),
+        "required_documents": union('required_documents', validate_list, lambda document: document.lower())
+    }
+    
+    # Leave title out when no chunk found one so validation applies the usual default
+    merged_title = first_value('title')
+    if merged_title:
+        merged["title"] = merged_title
+    
+    return validate_and_clean_grant_info(merged, title, issuer)
+
+def create_fallback_grant_info(title: str, issuer: str) -> Dict[str, Any]:
+    """
+    Basic grant structure used when Bedrock analysis fails
+    """
+    return {
+        "title": title or f"Grant Document - {datetime.utcnow().strftime('%B %d, %Y')}",
+        "issuer": issuer,
+        "country": None,
+        "status": "open",
+        "deadline": None,
+        "amount_min": None,
+        "amount_max": None,
+        "sector_tags": [],
+        "eligibility_rules": [],
+        "required_documents": []
+    }
 
 def validate_and_clean_grant_info(grant_info: Dict, title: str, issuer: str) -> Dict[str, Any]:
     """
@@ -314,8 +1214,7 @@ def validate_and_clean_grant_info(grant_info: Dict, title: str, issuer: str) ->
     }
     
     # Validate status
-    valid_statuses = ["open", "closed", "upcoming"]
-    if validated_info["status"] not in valid_statuses:
+    if validated_info["status"] not in GRANT_STATUSES:
         validated_info["status"] = "open"
     
     # Ensure amount_min <= amount_max if both exist
@@ -417,7 +1316,7 @@ def validate_sector_tags(value) -> List[str]:
     # Log invalid sectors for debugging
     if invalid_sectors:
         logger.warning(f"Invalid sectors found (not in predefined list): {invalid_sectors}")
-        logger.info(f"Valid sectors that were accepted: {validated_sectors}")
+        logger.debug("Valid sectors that were accepted: %s", validated_sectors)
     
     return validated_sectors
 
@@ -436,50 +1335,63 @@ def validate_eligibility_rules(rules) -> List[Dict[str, str]]:
     
     return validated_rules
 
+def build_grant_item(grant_id: str, grant_data: Dict[str, Any], s3_key: str) -> Dict[str, Any]:
+    """
+    Build the Grants table item for validated grant data
+    """
+    # Log the sector_tags before saving for debugging
+    logger.debug("Sector tags before saving to DynamoDB: %s", grant_data['sector_tags'])
+    
+    # Ensure sector_tags is a proper list for DynamoDB
+    sector_tags = grant_data.get('sector_tags', [])
+    if not isinstance(sector_tags, list):
+        sector_tags = []
+    
+    # Prepare the item for DynamoDB
+    item = {
+        'grant_id': grant_id,
+        'title': grant_data['title'],
+        'issuer': grant_data['issuer'],
+        'status': grant_data['status'],
+        'sector_tags': sector_tags,  # Ensure this is a proper list
+        'eligibility_rules': grant_data['eligibility_rules'],
+        'required_documents': grant_data['required_documents'],
+        'document_s3_key': s3_key,
+        'created_at': datetime.utcnow().isoformat(),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+    
+    # Add optional fields only if they have values
+    optional_fields = ['country', 'deadline', 'amount_min', 'amount_max']
+    for field in optional_fields:
+        if grant_data[field] is not None:
+            # Convert numeric values to Decimal for DynamoDB
+            if field in ['amount_min', 'amount_max'] and isinstance(grant_data[field], (int, float)):
+                item[field] = Decimal(str(grant_data[field]))
+            else:
+                item[field] = grant_data[field]
+    
+    # Index the item by updated_at so matchmaking can refresh its catalog incrementally
+    item.update(grant_catalog.catalog_attributes())
+    
+    # Embed once here so matchmaking only has to embed the SME's goals
+    item.update(grant_embeddings.embedding_attributes(grant_embedder, item))
+    
+    # Log the final item structure before saving
+    logger.debug("Final DynamoDB item structure: %s", Payload(item))
+    return item
+
 def save_grant_to_dynamodb(grant_id: str, grant_data: Dict[str, Any], s3_key: str):
     """
     Save grant information to DynamoDB
     """
     try:
         table = dynamodb.Table(GRANTS_TABLE)
-        
-        # Log the sector_tags before saving for debugging
-        logger.info(f"Sector tags before saving to DynamoDB: {grant_data['sector_tags']} (type: {type(grant_data['sector_tags'])})")
-        
-        # Ensure sector_tags is a proper list for DynamoDB
-        sector_tags = grant_data.get('sector_tags', [])
-        if not isinstance(sector_tags, list):
-            sector_tags = []
-        
-        # Prepare the item for DynamoDB
-        item = {
-            'grant_id': grant_id,
-            'title': grant_data['title'],
-            'issuer': grant_data['issuer'],
-            'status': grant_data['status'],
-            'sector_tags': sector_tags,  # Ensure this is a proper list
-            'eligibility_rules': grant_data['eligibility_rules'],
-            'required_documents': grant_data['required_documents'],
-            'document_s3_key': s3_key,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Add optional fields only if they have values
-        optional_fields = ['country', 'deadline', 'amount_min', 'amount_max']
-        for field in optional_fields:
-            if grant_data[field] is not None:
-                # Convert numeric values to Decimal for DynamoDB
-                if field in ['amount_min', 'amount_max'] and isinstance(grant_data[field], (int, float)):
-                    item[field] = Decimal(str(grant_data[field]))
-                else:
-                    item[field] = grant_data[field]
-        
-        # Log the final item structure before saving
-        logger.info(f"Final DynamoDB item structure: {json.dumps(item, default=str)}")
+        item = build_grant_item(grant_id, grant_data, s3_key)
         
         # Save to DynamoDB
-        table.put_item(Item=item)
+        with metrics.stage('dynamodb_put'):
+            table.put_item(Item=item)
         
         logger.info(f"Successfully saved grant {grant_id} to DynamoDB")
         
@@ -494,6 +1406,8 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create API Gateway response with proper CORS headers
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, default=str)
     return {
         'statusCode': status_code,
         'headers': {
@@ -504,7 +1418,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Credentials': 'false',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body, default=str)
+        'body': response_body
     }
 
 # Test function for local development
@@ -1,25 +1,40 @@
+import io
 import json
-import boto3
+import os
 import base64
 import uuid
 from datetime import datetime
 from botocore.exceptions import ClientError
+import bedrock_cache
+import aws_clients
+import metrics
+import pdf_classifier
+import textract_extraction
 
 # Initialize AWS clients
-textract_client = boto3.client('textract')
-bedrock_runtime = boto3.client('bedrock-runtime')
-s3_client = boto3.client('s3')
+textract_client = aws_clients.lazy_client('textract')
+bedrock_runtime = aws_clients.lazy_client('bedrock-runtime')
+s3_client = aws_clients.lazy_client('s3')
+aws_clients.prewarm()
 
 # Configuration
-TEMP_S3_BUCKET = 'sme-funding-bucket-sg-1'  # For temporary PDF storage
+TEMP_S3_BUCKET = os.environ.get('TEMP_S3_BUCKET', 'sme-funding-bucket-sg-1')  # For temporary PDF storage
+RESULTS_PREFIX = os.environ.get('GRANT_RESULTS_PREFIX', 'grant-results/')  # Status of async uploads, one object per grant
 BEDROCK_MODEL_ID = 'amazon.nova-pro-v1:0'  # Nova Pro
+PROMPT_VERSION = 'grant-analysis-v1'  # Bump whenever the analysis prompt changes
 
+@metrics.instrument_handler
 def lambda_function(event, context):
     """
     Main Lambda handler for grant information upload with AI analysis
     """
     
     try:
+        # Textract completion notifications are delivered through SNS
+        records = event.get('Records') or []
+        if records and records[0].get('EventSource') == 'aws:sns':
+            return handle_textract_notifications(records)
+        
         # Parse the incoming request
         http_method = event.get('httpMethod', '')
         path = event.get('path', '')
@@ -36,8 +51,10 @@ def lambda_function(event, context):
         # Route based on HTTP method and path
         if http_method == 'POST' and '/upload-grant' in path:
             return handle_grant_upload(request_body)
+        elif http_method == 'GET' and '/upload-grant' in path:
+            return handle_grant_status(event.get('queryStringParameters') or {})
         else:
-            return create_response(400, {'error': 'Invalid endpoint. Use POST /upload-grant'})
+            return create_response(400, {'error': 'Invalid endpoint. Use POST /upload-grant or GET /upload-grant?grant_id=...'})
     
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -63,46 +80,69 @@ def handle_grant_upload(request_body):
         grant_id = f"grant_{str(uuid.uuid4())[:8]}"
         temp_s3_key = f"temp-pdfs/{grant_id}/{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        # Step 1: Decode and upload PDF to S3 (required for Textract)
+        # Step 1: Decode the PDF
         try:
-            pdf_bytes = base64.b64decode(pdf_file)
+            with metrics.stage('base64_decode'):
+                pdf_bytes = base64.b64decode(pdf_file)
+            metrics.record_size('pdf', len(pdf_bytes))
         except Exception as e:
             return create_response(400, {'error': 'Invalid base64 PDF content'})
         
-        # Upload to S3 for Textract processing
-        s3_client.put_object(
-            Bucket=TEMP_S3_BUCKET,
-            Key=temp_s3_key,
-            Body=pdf_bytes,
-            ContentType='application/pdf'
-        )
+        # Step 2: Extract text. PDFs with a text layer are read directly;
+        # the rest go to Amazon Textract, inline for small single-page PDFs
+        # and staged in S3 otherwise.
+        extracted_text = None
+        classification = pdf_classifier.classify_pdf(pdf_bytes)
+        if pdf_classifier.has_text_layer(classification):
+            with metrics.stage('text_layer'):
+                extracted_text = extract_text_layer(pdf_bytes)
         
-        # Step 2: Extract text using Amazon Textract
-        extracted_text = extract_text_from_pdf(TEMP_S3_BUCKET, temp_s3_key)
+        if extracted_text:
+            route = 'text_layer'
+        else:
+            route = textract_extraction.choose_route(pdf_bytes)
         
-        if not extracted_text:
-            return create_response(400, {'error': 'Could not extract text from PDF'})
+        if route == textract_extraction.ROUTE_INLINE:
+            with metrics.stage('textract'):
+                extracted_text = extract_text_sync({'Bytes': pdf_bytes})
+            if extracted_text is None:
+                route = textract_extraction.ROUTE_ASYNC  # Page count was probably wrong
         
-        # Step 3: Analyze extracted text using Bedrock (Claude)
-        grant_data = analyze_grant_with_bedrock(extracted_text, title, grant_id)
+        if route in (textract_extraction.ROUTE_SYNC_S3, textract_extraction.ROUTE_ASYNC):
+            stage_temp_pdf(temp_s3_key, pdf_bytes)
+            keep_staged = False
+            try:
+                # Multi-page documents return 202 right away and the SNS
+                # notification finishes the job, unless "mode": "sync" asks to wait
+                if (route == textract_extraction.ROUTE_ASYNC and request_body.get('mode') != 'sync'
+                        and textract_extraction.notifications_enabled()):
+                    response = start_async_grant_upload(grant_id, title, description, temp_s3_key)
+                    keep_staged = True  # Deleted once the notification is handled
+                    return response
+                
+                # Otherwise poll, but only for as long as API Gateway waits
+                with metrics.stage('textract'):
+                    if route == textract_extraction.ROUTE_SYNC_S3:
+                        extracted_text = extract_text_sync({'S3Object': {'Bucket': TEMP_S3_BUCKET, 'Name': temp_s3_key}})
+                    if extracted_text is None:
+                        try:
+                            extracted_text = extract_text_from_pdf(TEMP_S3_BUCKET, temp_s3_key, job_tag=grant_id,
+                                                                   timeout=textract_extraction.TEXTRACT_REQUEST_POLL_TIMEOUT)
+                        except TimeoutError as e:
+                            print(f"Textract job error: {str(e)}")
+                            return create_response(504, {'error': 'Text extraction did not finish in time, retry without "mode": "sync"'})
+            finally:
+                # Clean up temporary S3 file, whatever went wrong above
+                if not keep_staged:
+                    delete_temp_pdf(temp_s3_key)
         
-        # Step 4: Clean up temporary S3 file
-        try:
-            s3_client.delete_object(Bucket=TEMP_S3_BUCKET, Key=temp_s3_key)
-        except:
-            pass  # Don't fail if cleanup fails
+        if not extracted_text:
+            return create_response(400, {'error': 'Could not extract text from PDF'})
         
-        # Additional metadata for the response
-        processing_info = {
-            "processing_status": "completed",
-            "processed_at": datetime.now().isoformat(),
-            "original_title": title,
-            "has_description": bool(description),
-            "pdf_received": True,
-            "text_extracted": True,
-            "analysis_method": "bedrock_claude",
-            "characters_extracted": len(extracted_text)
-        }
+        # Step 3: Analyze extracted text using Bedrock
+        grant_data, processing_info = analyze_extracted_text(extracted_text, title, description, grant_id)
+        processing_info['extraction_route'] = route
+        processing_info['pdf_kind'] = classification['kind']
         
         return create_response(200, {
             "message": "Grant information processed successfully",
@@ -114,31 +154,221 @@ def handle_grant_upload(request_body):
         print(f"Grant upload error: {str(e)}")
         return create_response(500, {'error': f'Grant processing failed: {str(e)}'})
 
-def extract_text_from_pdf(bucket, key):
+def start_async_grant_upload(grant_id, title, description, temp_s3_key):
+    """
+    Start a Textract job that reports completion through SNS and return 202
+    """
+    # Written before the job starts so the notification always finds it
+    save_grant_result(grant_id, {
+        "grant_id": grant_id,
+        "status": "processing",
+        "title": title,
+        "description": description,
+        "temp_s3_key": temp_s3_key,
+        "submitted_at": datetime.now().isoformat()
+    })
+    
+    with metrics.stage('textract_start'):
+        job_id = textract_extraction.start_text_detection(
+            textract_client, TEMP_S3_BUCKET, temp_s3_key, job_tag=grant_id, notify=True
+        )
+    print(f"Started Textract job {job_id} for {grant_id}")
+    
+    return create_response(202, {
+        "message": "Grant document accepted for processing",
+        "grant_id": grant_id,
+        "status": "processing",
+        "status_url": f"/upload-grant?grant_id={grant_id}"
+    })
+
+def handle_textract_notifications(records):
+    """
+    Finish async uploads whose Textract jobs have completed
+    """
+    for record in records:
+        message = {}
+        try:
+            message = json.loads(record['Sns']['Message'])
+            complete_async_grant_upload(message)
+        except Exception as e:
+            # Record the failure so status polling doesn't wait forever
+            print(f"Async grant processing error for job {message.get('JobId')}: {str(e)}")
+            grant_id = message.get('JobTag')
+            if grant_id:
+                save_grant_result(grant_id, {"grant_id": grant_id, "status": "failed", "error": str(e)})
+    
+    return create_response(200, {'processed': len(records)})
+
+def complete_async_grant_upload(message):
+    """
+    Collect the text of a finished job, analyze it and store the result
+    """
+    job_id = message['JobId']
+    grant_id = message.get('JobTag')
+    pending = load_grant_result(grant_id) if grant_id else None
+    if not pending or pending.get('status') != 'processing':
+        print(f"Ignoring notification for job {job_id}: no pending upload for {grant_id}")
+        return
+    
+    result = {
+        "grant_id": grant_id,
+        "job_id": job_id,
+        "title": pending['title'],
+        "submitted_at": pending.get('submitted_at')
+    }
+    
+    extracted_text = None
+    if message.get('Status') in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+        blocks = textract_extraction.get_text_detection_blocks(textract_client, job_id)
+        extracted_text = textract_extraction.assemble_page_text(blocks)
+    else:
+        print(f"Textract job {job_id} finished with status {message.get('Status')}")
+    
+    if extracted_text:
+        grant_data, processing_info = analyze_extracted_text(
+            extracted_text, pending['title'], pending.get('description', ''), grant_id
+        )
+        result.update(status="completed", grant_data=grant_data, processing_info=processing_info)
+    else:
+        result.update(status="failed", error="Could not extract text from PDF")
+    
+    save_grant_result(grant_id, result)
+    delete_temp_pdf(pending['temp_s3_key'])
+
+def handle_grant_status(query_params):
+    """
+    Return the status, and once completed the analysis, of an async upload
+    """
+    grant_id = query_params.get('grant_id')
+    if not grant_id:
+        return create_response(400, {'error': 'grant_id is required'})
+    
+    result = load_grant_result(grant_id)
+    if not result:
+        return create_response(404, {'error': f'No upload found for {grant_id}'})
+    
+    result.pop('temp_s3_key', None)
+    result.pop('description', None)
+    return create_response(200, result)
+
+def analyze_extracted_text(extracted_text, title, description, grant_id):
+    """
+    Run the Bedrock analysis and build the processing metadata
     """
-    Extract text from PDF using Amazon Textract
+    grant_data = analyze_grant_with_bedrock(extracted_text, title, grant_id)
+    
+    # Additional metadata for the response
+    processing_info = {
+        "processing_status": "completed",
+        "processed_at": datetime.now().isoformat(),
+        "original_title": title,
+        "has_description": bool(description),
+        "pdf_received": True,
+        "text_extracted": True,
+        "analysis_method": "bedrock_claude",
+        "characters_extracted": len(extracted_text)
+    }
+    return grant_data, processing_info
+
+def save_grant_result(grant_id, result):
+    """
+    Store the status document of an async upload
+    """
+    with metrics.stage('s3_put'):
+        s3_client.put_object(
+            Bucket=TEMP_S3_BUCKET,
+            Key=f"{RESULTS_PREFIX}{grant_id}.json",
+            Body=json.dumps(result),
+            ContentType='application/json'
+        )
+
+def load_grant_result(grant_id):
+    """
+    Read the status document of an async upload, or None if there is none
     """
     try:
-        response = textract_client.detect_document_text(
-            Document={
-                'S3Object': {
-                    'Bucket': bucket,
-                    'Name': key
-                }
-            }
+        with metrics.stage('s3_get'):
+            response = s3_client.get_object(Bucket=TEMP_S3_BUCKET, Key=f"{RESULTS_PREFIX}{grant_id}.json")
+        return json.loads(response['Body'].read())
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+
+def stage_temp_pdf(temp_s3_key, pdf_bytes):
+    """
+    Upload a PDF for the S3-based Textract calls
+    """
+    with metrics.stage('s3_put'):
+        s3_client.put_object(
+            Bucket=TEMP_S3_BUCKET,
+            Key=temp_s3_key,
+            Body=pdf_bytes,
+            ContentType='application/pdf'
         )
+
+def delete_temp_pdf(temp_s3_key):
+    """
+    Remove a staged PDF once Textract is done with it
+    """
+    try:
+        s3_client.delete_object(Bucket=TEMP_S3_BUCKET, Key=temp_s3_key)
+    except:
+        pass  # Don't fail if cleanup fails
+
+def extract_text_layer(pdf_bytes):
+    """
+    Read the embedded text layer with PyPDF2, skipping OCR entirely
+
+    Returns None if PyPDF2 is not bundled with the function or the
+    document has no extractable text.
+    """
+    try:
+        import PyPDF2  # Deferred: optional for this function
+    except ImportError:
+        return None
+    
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        extracted_text = "\n".join(page.extract_text() or '' for page in pdf_reader.pages)
+        return extracted_text.strip() or None
+    except Exception as e:
+        print(f"Text layer extraction error: {str(e)}")
+        return None
+
+def extract_text_sync(document):
+    """
+    Extract text from a single-page PDF with synchronous Amazon Textract
+
+    Returns None if Textract rejects the document, so the caller can retry
+    with the asynchronous API.
+    """
+    try:
+        return textract_extraction.detect_text(textract_client, document)
         
-        # Combine all text blocks
-        extracted_text = ""
-        for item in response['Blocks']:
-            if item['BlockType'] == 'LINE':
-                extracted_text += item['Text'] + "\n"
-        
-        return extracted_text.strip()
+    except ClientError as e:
+        print(f"Synchronous Textract error: {str(e)}")
+        return None
+
+def extract_text_from_pdf(bucket, key, job_tag=None, timeout=textract_extraction.TEXTRACT_POLL_TIMEOUT):
+    """
+    Extract text from a PDF of any length using asynchronous Amazon Textract
+
+    detect_document_text only accepts single-page documents, so the
+    multi-page job API is used and polled with capped exponential backoff.
+    Raises TimeoutError if the job is still running after timeout seconds.
+    """
+    try:
+        return textract_extraction.extract_text_async(textract_client, bucket, key, job_tag=job_tag, timeout=timeout)
         
     except ClientError as e:
         print(f"Textract error: {str(e)}")
         return None
+    except TimeoutError:
+        raise
+    except RuntimeError as e:
+        print(f"Textract job error: {str(e)}")
+        return None
     except Exception as e:
         print(f"Text extraction error: {str(e)}")
         return None
@@ -182,11 +412,10 @@ Respond ONLY with valid JSON in this exact format:
 """
 
     try:
-        response = bedrock_runtime.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            contentType='application/json',
-            accept='application/json',
-            body=json.dumps({
+        response_body = bedrock_cache.invoke_model_cached(
+            bedrock_runtime,
+            BEDROCK_MODEL_ID,
+            {
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 2000,
                 "temperature": 0.1,
@@ -196,10 +425,11 @@ Respond ONLY with valid JSON in this exact format:
                         "content": prompt
                     }
                 ]
-            })
+            },
+            PROMPT_VERSION,
+            accept='application/json'
         )
         
-        response_body = json.loads(response['body'].read())
         analysis_text = response_body['content'][0]['text']
         
         # Parse the JSON response from Claude
@@ -285,13 +515,15 @@ def create_response(status_code, body):
     """
     Create a properly formatted HTTP response for API Gateway
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, indent=2)
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS'
+            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
         },
-        'body': json.dumps(body, indent=2)
+        'body': response_body
     }
\ No newline at end of file
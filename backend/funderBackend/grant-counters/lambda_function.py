@@ -0,0 +1,75 @@
+import json
+import logging
+from typing import Dict, Any
+import aws_clients
+import metrics
+from grant_counters import GrantCounters, DUPLICATE, UNINITIALIZED, batch_id, deltas_from_stream
+from grants_repository import GrantsRepository
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Initialize AWS clients
+dynamodb = aws_clients.lazy_resource('dynamodb')
+counters = GrantCounters()
+grants_repository = GrantsRepository()
+aws_clients.prewarm()
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    Keep the grant counters in step with the Grants table
+
+    Invoked by the table's DynamoDB stream with batches of records, or on a
+    schedule with {"action": "repair"} to recount from the table.
+    """
+
+    if event.get('action') == 'repair':
+        return repair_counters()
+
+    records = event.get('Records', [])
+    deltas = deltas_from_stream(records)
+    metrics.record_count('stream_records', len(records))
+
+    # One atomic update per batch; a failure makes Lambda retry the whole
+    # batch, and a retry of a batch already applied is skipped
+    outcome = counters.apply(deltas, batch=batch_id(records))
+    if outcome == DUPLICATE:
+        logger.info(f"Skipped {len(records)} stream records already applied")
+        metrics.record_count('duplicate_batches')
+    elif outcome == UNINITIALIZED:
+        # Nothing to add to yet; the repair job counts these grants
+        logger.warning(f"Grant counters not initialised, dropped changes {deltas}; run the repair job")
+        metrics.record_count('uninitialized_batches')
+    else:
+        logger.info(f"Applied counter changes {deltas} from {len(records)} stream records")
+    return {'outcome': outcome, 'deltas': deltas}
+
+def repair_counters() -> Dict[str, Any]:
+    """
+    Recount grants from the table and overwrite the counters
+
+    Creates the counter item on the first run and corrects drift, e.g. from
+    batches dropped before the item existed or lost by the stream. Writes
+    that land during the scan can still be off by a few until the next run.
+    """
+
+    with metrics.stage('repair_scan'):
+        status_counts = grants_repository.status_counts()
+    total = sum(status_counts.values())
+    by_status = {status: count for status, count in status_counts.items() if status}
+
+    previous = counters.get_counts()
+    counters.replace(total, by_status)
+
+    if previous:
+        statuses = set(by_status) | set(previous['by_status'])
+        drift = abs(total - previous['total']) + sum(
+            abs(by_status.get(status, 0) - previous['by_status'].get(status, 0)) for status in statuses
+        )
+        if drift:
+            logger.warning(f"Grant counters drifted: {previous} -> total {total}, {by_status}")
+            metrics.record_count('counter_drift', drift)
+    logger.info(f"Repaired grant counters: total {total}, by status {json.dumps(by_status)}")
+    return {'total': total, 'by_status': by_status, 'previous': previous}
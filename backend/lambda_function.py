@@ -1,13 +1,23 @@
 import json
-from upload_fund import upload_fund
+from upload_fund import upload_fund, create_presigned_upload
 from utils import make_response
+import aws_clients
+import metrics
 
+aws_clients.prewarm()
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     try:
         body = json.loads(event.get("body", "{}"))
         title = body.get("title", "untitled")
         file_base64 = body.get("file_base64")
 
+        # Presigned mode: the client PUTs the file straight to S3
+        if body.get("upload_mode") == "presigned":
+            upload = create_presigned_upload(title)
+            return make_response(200, {"message": "Upload URL created", **upload})
+
         if not file_base64:
             return make_response(400, {"message": "No file provided"})
 
@@ -0,0 +1,156 @@
+import os
+import logging
+import threading
+from typing import Dict, Optional
+
+import boto3
+from botocore.config import Config
+
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '25'))  # botocore default is 10
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', '3'))  # Seconds
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', '30'))  # Seconds
+BEDROCK_READ_TIMEOUT = float(os.environ.get('BEDROCK_READ_TIMEOUT', '120'))  # Long completions exceed the default
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '4'))  # Including the first call
+AWS_PREWARM_CLIENTS = os.environ.get('AWS_PREWARM_CLIENTS', 'true').lower() == 'true'
+
+SLOW_SERVICES = {'bedrock-runtime': BEDROCK_READ_TIMEOUT}
+
+_session = boto3.session.Session()
+_clients = {}  # (kind, service, region, endpoint) -> client or resource
+_lock = threading.Lock()
+
+def client_config(service_name: str) -> Config:
+    """
+    Pooling, keep-alive, timeout and retry settings for a service
+    """
+    return Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=SLOW_SERVICES.get(service_name, AWS_READ_TIMEOUT),
+        retries={'mode': 'adaptive', 'max_attempts': AWS_MAX_ATTEMPTS}
+    )
+
+def _get_or_create(kind: str, service_name: str, region_name: Optional[str], endpoint_url: Optional[str] = None):
+    key = (kind, service_name, region_name, endpoint_url)
+    instance = _clients.get(key)
+    if instance is not None:
+        return instance
+
+    # boto3 sessions are not thread-safe, so creation is serialized
+    with _lock:
+        instance = _clients.get(key)
+        if instance is None:
+            factory = _session.client if kind == 'client' else _session.resource
+            instance = factory(service_name, region_name=region_name, endpoint_url=endpoint_url,
+                               config=client_config(service_name))
+            _clients[key] = instance
+    return instance
+
+def client(service_name: str, region_name: Optional[str] = None, endpoint_url: Optional[str] = None):
+    """
+    Container-wide client for a service and region, created on first use
+
+    endpoint_url is for per-deployment endpoints such as the API Gateway
+    management API of a WebSocket stage.
+    """
+    return _get_or_create('client', service_name, region_name, endpoint_url)
+
+def resource(service_name: str, region_name: Optional[str] = None):
+    """
+    Container-wide resource for a service and region, created on first use
+    """
+    return _get_or_create('resource', service_name, region_name)
+
+_registered = set()  # Specs of lazy clients, built by prewarm()
+
+class LazyClient:
+    """
+    Module-level stand-in for a client or resource: nothing is built until
+    the first attribute access, so preflight and validation-only requests
+    never pay for it
+    """
+
+    def __init__(self, kind: str, service_name: str, region_name: Optional[str] = None):
+        self._spec = (kind, service_name, region_name)
+        _registered.add(self._spec)
+
+    def __getattr__(self, name: str):
+        return getattr(_get_or_create(*self._spec), name)
+
+def lazy_client(service_name: str, region_name: Optional[str] = None) -> LazyClient:
+    """Lazily built client, e.g. bedrock = lazy_client('bedrock-runtime', region_name=BEDROCK_REGION)"""
+    return LazyClient('client', service_name, region_name)
+
+def lazy_resource(service_name: str, region_name: Optional[str] = None) -> LazyClient:
+    """Lazily built resource, e.g. dynamodb = lazy_resource('dynamodb')"""
+    return LazyClient('resource', service_name, region_name)
+
+def prewarm() -> None:
+    """
+    Build every registered client and resolve credentials up front.
+
+    Called at module import; during the Lambda INIT phase this runs at full
+    CPU before the first request. No-op when AWS_PREWARM_CLIENTS is false.
+    """
+    if not AWS_PREWARM_CLIENTS:
+        return
+    try:
+        _session.get_credentials()
+        for spec in list(_registered):
+            _get_or_create(*spec)
+    except Exception as e:
+        # Clients are still built on first use
+        logger.warning(f"Client prewarm failed: {str(e)}")
+
+def _pools_of(instance):
+    low_level = instance.meta.client if hasattr(instance.meta, 'client') else instance
+    manager = low_level._endpoint.http_session._manager
+    return [manager.pools[key] for key in manager.pools.keys()]
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Cumulative urllib3 pool counters per service since the container started.
+
+    requests - connections_opened is the number of requests that reused a
+    kept-alive connection.
+    """
+    stats = {}
+    for (kind, service_name, region_name, endpoint_url), instance in list(_clients.items()):
+        try:
+            pools = _pools_of(instance)
+        except Exception:
+            # Relies on botocore internals; skip clients that don't expose them
+            continue
+        entry = stats.setdefault(service_name, {'connections_opened': 0, 'requests': 0})
+        for pool in pools:
+            entry['connections_opened'] += pool.num_connections
+            entry['requests'] += pool.num_requests
+    return stats
+
+_last_totals = {'connections_opened': 0, 'requests': 0}
+
+def _record_connection_stats(invocation: metrics.InvocationMetrics) -> None:
+    """
+    Add this invocation's new connections and pooled requests to its metrics
+    """
+    totals = {'connections_opened': 0, 'requests': 0}
+    for entry in connection_stats().values():
+        totals['connections_opened'] += entry['connections_opened']
+        totals['requests'] += entry['requests']
+
+    # Pools evicted from the PoolManager take their counts with them; clamp at zero
+    new_connections = max(0, totals['connections_opened'] - _last_totals['connections_opened'])
+    requests = max(0, totals['requests'] - _last_totals['requests'])
+    _last_totals.update(totals)
+
+    invocation.add_count('aws_requests', requests)
+    invocation.add_count('aws_new_connections', new_connections)
+
+metrics.register_collector(_record_connection_stats)
@@ -0,0 +1,251 @@
+import json
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import aws_clients
+
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+BEDROCK_CACHE_BACKEND = os.environ.get('BEDROCK_CACHE_BACKEND', 'dynamodb')  # dynamodb | file | memory | none
+BEDROCK_CACHE_TABLE = os.environ.get('BEDROCK_CACHE_TABLE', 'BedrockResponseCache')
+BEDROCK_CACHE_DIR = os.environ.get('BEDROCK_CACHE_DIR', '/tmp/bedrock-cache')
+BEDROCK_CACHE_TTL_SECONDS = int(os.environ.get('BEDROCK_CACHE_TTL_SECONDS', str(24 * 3600)))
+BEDROCK_CACHE_MAX_ENTRIES = int(os.environ.get('BEDROCK_CACHE_MAX_ENTRIES', '256'))  # Per-container LRU size
+
+def make_cache_key(model_id: str, body: Dict[str, Any], prompt_version: str) -> str:
+    """
+    Cache key for an invoke_model request: model ID, canonicalized body and prompt version
+    """
+    canonical = json.dumps(
+        {'model_id': model_id, 'body': body, 'prompt_version': prompt_version},
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class MemoryTier:
+    """
+    Per-container LRU with TTL; safe to share between threads
+    """
+
+    def __init__(self, max_entries: int = BEDROCK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, response_body)
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response_body = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return response_body
+
+    def put(self, key: str, response_body: Dict[str, Any], expires_at: float) -> None:
+        with self.lock:
+            self.entries[key] = (expires_at, response_body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class DynamoDBTier:
+    """
+    Persistent tier. Table key: cache_key (string), TTL attribute: expires_at.
+
+    DynamoDB deletes expired items lazily, so expiry is also checked on read.
+    """
+
+    def __init__(self, table_name: str = BEDROCK_CACHE_TABLE, dynamodb_resource=None):
+        self.table = (dynamodb_resource or aws_clients.resource('dynamodb')).Table(table_name)
+
+    def get(self, key: str):
+        item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        if not item or int(item['expires_at']) <= time.time():
+            return None
+        return int(item['expires_at']), json.loads(item['response_body'])
+
+    def put(self, key: str, response_body: Dict[str, Any], expires_at: float) -> None:
+        self.table.put_item(Item={
+            'cache_key': key,
+            'response_body': json.dumps(response_body, default=str),
+            'expires_at': int(expires_at)
+        })
+
+class FileTier:
+    """
+    Local JSON-file stand-in for the persistent tier, one file per key
+    """
+
+    def __init__(self, directory: str = BEDROCK_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        if entry['expires_at'] <= time.time():
+            os.remove(self._path(key))
+            return None
+        return entry['expires_at'], entry['response_body']
+
+    def put(self, key: str, response_body: Dict[str, Any], expires_at: float) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'expires_at': expires_at, 'response_body': response_body}, f, default=str)
+        os.replace(tmp_path, path)
+
+class BedrockResponseCache:
+    """
+    Two-tier cache of Bedrock response bodies: an in-memory LRU in front of
+    an optional persistent tier. Persistent-tier failures are logged and
+    counted but never raised.
+    """
+
+    def __init__(self, persistent=None, ttl_seconds: int = BEDROCK_CACHE_TTL_SECONDS,
+                 max_entries: int = BEDROCK_CACHE_MAX_ENTRIES):
+        self.memory = MemoryTier(max_entries)
+        self.persistent = persistent
+        self.ttl_seconds = ttl_seconds
+        self.counters = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'errors': 0}
+        self.lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        response_body = self.memory.get(key)
+        if response_body is not None:
+            self._count('memory_hits')
+            return response_body
+
+        if self.persistent is not None:
+            try:
+                entry = self.persistent.get(key)
+            except Exception as e:
+                logger.warning(f"Bedrock cache read failed: {str(e)}")
+                self._count('errors')
+                entry = None
+            if entry is not None:
+                expires_at, response_body = entry
+                self.memory.put(key, response_body, expires_at)
+                self._count('persistent_hits')
+                return response_body
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, response_body: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self.memory.put(key, response_body, expires_at)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, response_body, expires_at)
+            except Exception as e:
+                logger.warning(f"Bedrock cache write failed: {str(e)}")
+                self._count('errors')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since the container started"""
+        with self.lock:
+            stats = dict(self.counters)
+        lookups = stats['memory_hits'] + stats['persistent_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        return stats
+
+def create_bedrock_cache(backend: str = BEDROCK_CACHE_BACKEND) -> Optional[BedrockResponseCache]:
+    """
+    Build the configured cache; None disables caching
+    """
+    backend = (backend or 'none').lower()
+    if backend == 'none':
+        return None
+    if backend == 'dynamodb':
+        return BedrockResponseCache(DynamoDBTier())
+    if backend == 'file':
+        return BedrockResponseCache(FileTier())
+    if backend != 'memory':
+        logger.warning(f"Unknown BEDROCK_CACHE_BACKEND '{backend}', using the in-memory tier only")
+    return BedrockResponseCache()
+
+_default_cache = None
+_default_cache_built = False
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> Optional[BedrockResponseCache]:
+    """
+    Container-wide cache, built on first use
+    """
+    global _default_cache, _default_cache_built
+    with _default_cache_lock:
+        if not _default_cache_built:
+            _default_cache = create_bedrock_cache()
+            _default_cache_built = True
+    return _default_cache
+
+def is_complete_response(response_body: Dict[str, Any]) -> bool:
+    """
+    Responses cut off by the token limit are usually unusable and are not cached
+    """
+    stop_reason = response_body.get('stop_reason') or response_body.get('stopReason')
+    return stop_reason not in ('max_tokens', 'length')
+
+def invoke_model_cached(client, model_id: str, body: Dict[str, Any], prompt_version: str,
+                        cache: Optional[BedrockResponseCache] = None, **invoke_kwargs) -> Dict[str, Any]:
+    """
+    invoke_model with memoization; returns the parsed response body
+
+    prompt_version should change whenever the caller's prompt template
+    changes, so stale completions are not served for a new prompt.
+    """
+    cache = cache or get_default_cache()
+    key = make_cache_key(model_id, body, prompt_version) if cache else None
+
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"Bedrock cache hit for model {model_id} ({prompt_version})")
+            metrics.record_count('bedrock_cache_hits')
+            return cached
+
+    with metrics.stage('bedrock_invoke'):
+        response = client.invoke_model(
+            modelId=model_id,
+            body=json.dumps(body),
+            contentType='application/json',
+            **invoke_kwargs
+        )
+        response_body = json.loads(response['body'].read())
+    metrics.record_bedrock_usage(response_body)
+
+    if cache and is_complete_response(response_body):
+        cache.put(key, response_body)
+
+    return response_body
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the container-wide cache"""
+    cache = get_default_cache()
+    return cache.stats() if cache else {}
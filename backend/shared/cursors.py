@@ -0,0 +1,59 @@
+import os
+import hmac
+import json
+import base64
+import hashlib
+import logging
+from decimal import Decimal
+from typing import Dict, Any
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+PAGINATION_CURSOR_SECRET = os.environ.get('PAGINATION_CURSOR_SECRET')  # Shared by every container serving the same API
+
+# A per-container key would only verify cursors in the container that issued
+# them, so a missing secret fails the function's init instead
+if not PAGINATION_CURSOR_SECRET:
+    raise RuntimeError("PAGINATION_CURSOR_SECRET must be set to sign pagination cursors")
+_key = PAGINATION_CURSOR_SECRET.encode('utf-8')
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _default(value):
+    # LastEvaluatedKey values can be Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    Opaque continuation token: base64url JSON plus an HMAC-SHA256 signature
+    """
+    payload = json.dumps(state, sort_keys=True, separators=(',', ':'), default=_default).encode('utf-8')
+    signature = hmac.new(_key, payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}"
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    State from a token made by encode_cursor; ValueError if malformed or altered
+    """
+    try:
+        payload_text, signature_text = cursor.split('.')
+        payload = _b64decode(payload_text)
+        signature = _b64decode(signature_text)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+
+    expected = hmac.new(_key, payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("Invalid cursor signature")
+    state = json.loads(payload)
+    if not isinstance(state, dict):
+        raise ValueError("Malformed cursor")
+    return state
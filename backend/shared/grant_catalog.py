@@ -0,0 +1,146 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+
+from boto3.dynamodb.conditions import Key
+
+import metrics
+from grants_repository import GrantsRepository
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANT_CATALOG_UPDATED_INDEX = os.environ.get('GRANT_CATALOG_UPDATED_INDEX', 'catalog-updated_at-index')
+GRANT_CATALOG_MAX_STALENESS_SECONDS = float(os.environ.get('GRANT_CATALOG_MAX_STALENESS_SECONDS', '60'))  # Snapshot age served without any read
+GRANT_CATALOG_FULL_REFRESH_SECONDS = float(os.environ.get('GRANT_CATALOG_FULL_REFRESH_SECONDS', '3600'))  # Full reload picks up deletes
+GRANT_CATALOG_SYNC_OVERLAP_SECONDS = float(os.environ.get('GRANT_CATALOG_SYNC_OVERLAP_SECONDS', '5'))  # Re-read window for clock skew and index lag
+
+CATALOG_PARTITION = 'grants'  # Constant partition key of the updated_at index
+
+def catalog_attributes() -> Dict[str, Any]:
+    """
+    Attributes that put a grant item in the updated_at index
+
+    Index: partition key `catalog` (String), sort key `updated_at` (String),
+    projection ALL.
+    """
+    return {'catalog': CATALOG_PARTITION}
+
+def _plain(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep the requested fields and turn amount Decimals into floats once"""
+    grant = {key: item[key] for key in fields if key in item} if fields else dict(item)
+    for key in ['amount_min', 'amount_max']:
+        if isinstance(grant.get(key), Decimal):
+            grant[key] = float(grant[key])
+    return grant
+
+class GrantCatalog:
+    """
+    Per-container snapshot of grants with one status, refreshed incrementally
+
+    get_grants() serves the snapshot with no DynamoDB read while it is younger
+    than max_staleness. After that, one Query on the updated_at index fetches
+    only grants written since the newest updated_at already seen. Incremental
+    queries cannot see deletions, so the snapshot is rebuilt in full every
+    full_refresh seconds, or on the next call after invalidate().
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None, status: str = 'open', repository: Optional[GrantsRepository] = None,
+                 max_staleness: float = GRANT_CATALOG_MAX_STALENESS_SECONDS,
+                 full_refresh: float = GRANT_CATALOG_FULL_REFRESH_SECONDS):
+        self.fields = fields
+        self.status = status
+        self.repository = repository or GrantsRepository()
+        self.max_staleness = max_staleness
+        self.full_refresh = full_refresh
+        self.grants = {}  # grant_id -> grant
+        self.watermark = None  # Newest updated_at in the snapshot
+        self.synced_at = 0.0
+        self.loaded_at = 0.0
+        self.version = 0  # Bumped whenever the snapshot's contents change
+        self._ordered = []
+        self.lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Force a full reload on the next get_grants() in this container"""
+        with self.lock:
+            self.loaded_at = 0.0
+            self.synced_at = 0.0
+
+    def get_grants(self) -> List[Dict[str, Any]]:
+        """Grants in the snapshot, refreshed first if it is older than max_staleness"""
+        with self.lock:
+            now = time.time()
+            if self.loaded_at and now - self.synced_at < self.max_staleness:
+                metrics.record_count('catalog_cache_hits')
+                return self._ordered
+
+            try:
+                if not self.loaded_at or now - self.loaded_at >= self.full_refresh:
+                    self._load_all(now)
+                else:
+                    self._load_changes(now)
+            except Exception as e:
+                if not self.loaded_at:
+                    raise
+                # Serve the previous snapshot; the next call tries again
+                logger.error(f"Grant catalog refresh failed, serving snapshot from {self.watermark}: {str(e)}")
+                metrics.record_count('catalog_refresh_failures')
+            return self._ordered
+
+    def _projected_fields(self) -> Optional[List[str]]:
+        return list(self.fields) + ['grant_id', 'status', 'updated_at'] if self.fields else None
+
+    def _load_all(self, now: float) -> None:
+        with metrics.stage('catalog_full_load'):
+            items = self.repository.list_by_status(self.status, fields=self._projected_fields())
+
+        self.grants = {item['grant_id']: _plain(item, self.fields) for item in items}
+        self.watermark = max((item['updated_at'] for item in items if item.get('updated_at')), default=None) \
+            or datetime.utcnow().isoformat()
+        self.loaded_at = self.synced_at = now
+        self._publish()
+        metrics.record_count('catalog_full_loads')
+        logger.info(f"Loaded grant catalog: {len(self.grants)} {self.status} grants, watermark {self.watermark}")
+
+    def _load_changes(self, now: float) -> None:
+        try:
+            since = (datetime.fromisoformat(self.watermark.rstrip('Z'))
+                     - timedelta(seconds=GRANT_CATALOG_SYNC_OVERLAP_SECONDS)).isoformat()
+        except ValueError:
+            since = self.watermark  # Not an ISO timestamp; compare as stored
+        with metrics.stage('catalog_incremental_load'):
+            changed = self.repository.query_index(
+                GRANT_CATALOG_UPDATED_INDEX,
+                Key('catalog').eq(CATALOG_PARTITION) & Key('updated_at').gt(since),
+                fields=self._projected_fields(),
+                newest_first=False
+            )
+
+        modified = False
+        for item in changed:
+            grant_id = item['grant_id']
+            if item.get('status') == self.status:
+                grant = _plain(item, self.fields)
+                if self.grants.get(grant_id) != grant:
+                    self.grants[grant_id] = grant
+                    modified = True
+            elif self.grants.pop(grant_id, None) is not None:
+                modified = True  # No longer has the catalog's status
+            if item.get('updated_at') and item['updated_at'] > self.watermark:
+                self.watermark = item['updated_at']
+
+        self.synced_at = now
+        metrics.record_count('catalog_incremental_items', len(changed))
+        if modified:
+            self._publish()
+            logger.info(f"Grant catalog updated from {len(changed)} changed items, now {len(self.grants)} grants")
+
+    def _publish(self) -> None:
+        self._ordered = list(self.grants.values())
+        self.version += 1
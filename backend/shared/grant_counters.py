@@ -0,0 +1,152 @@
+import os
+import time
+import hashlib
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANT_COUNTERS_TABLE = os.environ.get('GRANT_COUNTERS_TABLE', 'GrantCounters')
+GRANT_COUNTERS_BATCH_TTL_SECONDS = int(os.environ.get('GRANT_COUNTERS_BATCH_TTL_SECONDS', str(2 * 24 * 3600)))  # Outlives stream retention
+
+COUNTER_ID = 'grants'  # Single item holding the total and every per-status count
+BATCH_PREFIX = 'batch#'  # Markers of applied stream batches, expired by TTL
+TOTAL = 'total'
+STATUS_PREFIX = 'status_'
+
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'  # Batch already applied, e.g. a Lambda retry
+UNINITIALIZED = 'uninitialized'  # No counter item yet; the repair job creates it
+
+def _status(image: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Status from a stream image in DynamoDB JSON, None if the item had none"""
+    return ((image or {}).get('status') or {}).get('S')
+
+def deltas_from_stream(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Net counter changes for a batch of Grants table stream records
+
+    Needs the NEW_AND_OLD_IMAGES stream view. Inserts add one to the total
+    and to their status; removals subtract; modifications move a grant
+    between statuses when its status changed.
+    """
+    deltas = Counter()
+    for record in records:
+        event = record.get('eventName')
+        change = record.get('dynamodb', {})
+        old_status, new_status = _status(change.get('OldImage')), _status(change.get('NewImage'))
+        if event == 'INSERT':
+            deltas[TOTAL] += 1
+            if new_status:
+                deltas[STATUS_PREFIX + new_status] += 1
+        elif event == 'REMOVE':
+            deltas[TOTAL] -= 1
+            if old_status:
+                deltas[STATUS_PREFIX + old_status] -= 1
+        elif event == 'MODIFY' and old_status != new_status:
+            if old_status:
+                deltas[STATUS_PREFIX + old_status] -= 1
+            if new_status:
+                deltas[STATUS_PREFIX + new_status] += 1
+    return {name: value for name, value in deltas.items() if value}
+
+def batch_id(records: List[Dict[str, Any]]) -> str:
+    """
+    Stable ID of a batch of stream records; Lambda retries carry the same eventIDs
+    """
+    event_ids = '\n'.join(record.get('eventID', '') for record in records)
+    return hashlib.sha256(event_ids.encode('utf-8')).hexdigest()
+
+class GrantCounters:
+    """
+    Grant counts kept in one item of the counters table (key: counter_id)
+
+    The stream consumer applies deltas with ADD, only to an existing item
+    and at most once per batch; the repair job creates the item and
+    overwrites it with counts recomputed from the Grants table.
+    """
+
+    def __init__(self, table=None):
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = aws_clients.resource('dynamodb').Table(GRANT_COUNTERS_TABLE)
+        return self._table
+
+    def get_counts(self) -> Optional[Dict[str, Any]]:
+        """{'total': n, 'by_status': {status: n}}, or None before the first repair"""
+        with metrics.stage('counters_get'):
+            item = self.table.get_item(Key={'counter_id': COUNTER_ID}).get('Item')
+        if not item:
+            return None
+        return {
+            'total': int(item.get(TOTAL, 0)),
+            'by_status': {
+                name[len(STATUS_PREFIX):]: int(value)
+                for name, value in item.items() if name.startswith(STATUS_PREFIX)
+            }
+        }
+
+    def apply(self, deltas: Dict[str, int], batch: Optional[str] = None) -> str:
+        """
+        Add deltas to the counters; returns APPLIED, DUPLICATE or UNINITIALIZED
+
+        The ADD is conditional on the counter item existing, so deltas never
+        create an item holding one batch's changes as if they were totals.
+        With a batch ID, a marker item is written in the same transaction and
+        a batch whose marker already exists is skipped.
+        """
+        if not deltas:
+            return APPLIED
+        update = {
+            'Key': {'counter_id': COUNTER_ID},
+            'UpdateExpression': 'ADD ' + ', '.join(f"#c{i} :c{i}" for i in range(len(deltas))),
+            'ConditionExpression': 'attribute_exists(counter_id)',
+            'ExpressionAttributeNames': {f"#c{i}": name for i, name in enumerate(deltas)},
+            'ExpressionAttributeValues': {f":c{i}": value for i, value in enumerate(deltas.values())}
+        }
+        try:
+            with metrics.stage('counters_update'):
+                if batch is None:
+                    self.table.update_item(**update)
+                    return APPLIED
+                marker = {
+                    'counter_id': BATCH_PREFIX + batch,
+                    'expires_at': int(time.time()) + GRANT_COUNTERS_BATCH_TTL_SECONDS
+                }
+                self.table.meta.client.transact_write_items(TransactItems=[
+                    {'Put': {'TableName': self.table.name, 'Item': marker,
+                             'ConditionExpression': 'attribute_not_exists(counter_id)'}},
+                    {'Update': dict(update, TableName=self.table.name)}
+                ])
+                return APPLIED
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code == 'ConditionalCheckFailedException':
+                return UNINITIALIZED
+            if code != 'TransactionCanceledException':
+                raise
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+            if reasons[:1] == ['ConditionalCheckFailed']:
+                return DUPLICATE
+            if reasons[1:2] == ['ConditionalCheckFailed']:
+                return UNINITIALIZED
+            raise
+
+    def replace(self, total: int, by_status: Dict[str, int]) -> None:
+        """Overwrite every counter; statuses not in by_status are dropped"""
+        item = {'counter_id': COUNTER_ID, TOTAL: total, 'repaired_at': datetime.utcnow().isoformat()}
+        item.update({STATUS_PREFIX + status: count for status, count in by_status.items()})
+        with metrics.stage('counters_put'):
+            self.table.put_item(Item=item)
@@ -0,0 +1,192 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+import aws_clients
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANT_EMBEDDING_BACKEND = os.environ.get('GRANT_EMBEDDING_BACKEND', 'titan')  # titan | hashing
+GRANT_EMBEDDING_MODEL_ID = os.environ.get('GRANT_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v2:0')
+GRANT_EMBEDDING_REGION = os.environ.get('GRANT_EMBEDDING_REGION', os.environ.get('BEDROCK_REGION', 'us-east-1'))
+GRANT_EMBEDDING_DIMENSIONS = int(os.environ.get('GRANT_EMBEDDING_DIMENSIONS', '256'))  # Titan v2 accepts 256, 512 or 1024
+GRANT_EMBEDDING_MAX_CHARS = int(os.environ.get('GRANT_EMBEDDING_MAX_CHARS', '8000'))  # Text sent per embedding call
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+def grant_embedding_text(grant: Dict[str, Any]) -> str:
+    """
+    The text a grant is embedded from
+
+    Built only from fields every grant item carries and matchmaking
+    projects, so vectors computed at ingest and on the fly agree.
+    """
+    parts = [
+        grant.get('title') or '',
+        f"Issuer: {grant.get('issuer') or ''}",
+        f"Country: {grant.get('country') or ''}",
+        f"Sectors: {', '.join(grant.get('sector_tags') or [])}",
+        "Eligibility: " + "; ".join(
+            f"{rule.get('key', '')}: {rule.get('value', '')}" for rule in grant.get('eligibility_rules') or []
+        ),
+        f"Required documents: {', '.join(grant.get('required_documents') or [])}"
+    ]
+    return "\n".join(parts)[:GRANT_EMBEDDING_MAX_CHARS]
+
+class TitanEmbedder:
+    """
+    Amazon Titan text embeddings through Bedrock, normalized to unit length
+    """
+
+    def __init__(self, model_id: str = GRANT_EMBEDDING_MODEL_ID,
+                 dimensions: int = GRANT_EMBEDDING_DIMENSIONS, client=None):
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.client = client or aws_clients.lazy_client('bedrock-runtime', region_name=GRANT_EMBEDDING_REGION)
+
+    @property
+    def model_tag(self) -> str:
+        return f"{self.model_id}/{self.dimensions}"
+
+    def embed(self, text: str) -> List[float]:
+        with metrics.stage('embed'):
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                contentType='application/json',
+                accept='application/json',
+                body=json.dumps({
+                    'inputText': text[:GRANT_EMBEDDING_MAX_CHARS],
+                    'dimensions': self.dimensions,
+                    'normalize': True
+                })
+            )
+            response_body = json.loads(response['body'].read())
+        metrics.record_count('embedding_calls')
+        metrics.record_count('embedding_input_tokens', response_body.get('inputTextTokenCount', 0))
+        return response_body['embedding']
+
+class HashingEmbedder:
+    """
+    Deterministic local stand-in: signed feature hashing of words and word pairs
+
+    Needs no network or model; similar wording gives similar vectors, which
+    is enough for development and tests.
+    """
+
+    def __init__(self, dimensions: int = GRANT_EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    @property
+    def model_tag(self) -> str:
+        return f"hashing/{self.dimensions}"
+
+    def embed(self, text: str) -> List[float]:
+        words = TOKEN.findall(text.lower())
+        features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        vector = [0.0] * self.dimensions
+        for feature in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector] if norm else vector
+
+def create_embedder(backend: str = GRANT_EMBEDDING_BACKEND):
+    """
+    Build the configured embedding backend
+    """
+    backend = (backend or 'hashing').lower()
+    if backend == 'titan':
+        return TitanEmbedder()
+    if backend != 'hashing':
+        logger.warning(f"Unknown GRANT_EMBEDDING_BACKEND '{backend}', using the hashing stand-in")
+    return HashingEmbedder()
+
+def encode_vector(vector: List[float]) -> bytes:
+    """Little-endian float32 bytes, stored as a DynamoDB Binary attribute"""
+    packed = array('f', vector)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def embedding_attributes(embedder, grant: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Grant item attributes holding its embedding, or {} if embedding failed
+
+    Grants stored without an embedding are still matched; matchmaking
+    embeds them on the fly.
+    """
+    try:
+        vector = embedder.embed(grant_embedding_text(grant))
+    except Exception as e:
+        logger.error(f"Could not embed grant {grant.get('grant_id')}: {str(e)}")
+        return {}
+    return {'embedding': encode_vector(vector), 'embedding_model': embedder.model_tag}
+
+def stored_vector(grant: Dict[str, Any], model_tag: str) -> Optional[bytes]:
+    """The grant's stored embedding bytes if they come from model_tag"""
+    if grant.get('embedding_model') != model_tag or grant.get('embedding') is None:
+        return None
+    value = grant['embedding']
+    return bytes(value.value if hasattr(value, 'value') else value)  # boto3 wraps Binary attributes
+
+class GrantEmbeddingIndex:
+    """
+    Grant embeddings as one row-normalized float32 matrix for cosine top-K search
+    """
+
+    def __init__(self, grant_ids: List[str], matrix):
+        self.grant_ids = grant_ids
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, grants: List[Dict[str, Any]], embedder) -> 'GrantEmbeddingIndex':
+        """
+        Stack stored embeddings; grants without a current one are embedded now
+        """
+        import numpy as np  # Deferred: only matchmaking searches embeddings
+
+        rows = []
+        backfilled = 0
+        for grant in grants:
+            raw = stored_vector(grant, embedder.model_tag)
+            if raw is not None:
+                rows.append(np.frombuffer(raw, dtype='<f4'))
+            else:
+                rows.append(np.asarray(embedder.embed(grant_embedding_text(grant)), dtype=np.float32))
+                backfilled += 1
+        if backfilled:
+            metrics.record_count('grant_embeddings_backfilled', backfilled)
+            logger.warning(f"{backfilled} grants had no {embedder.model_tag} embedding and were embedded on the fly")
+
+        matrix = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, embedder.dimensions), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return cls([grant['grant_id'] for grant in grants], matrix)
+
+    def top_k(self, query: List[float], k: int) -> List[Tuple[str, float]]:
+        """
+        The k grants most similar to query, best first, as (grant_id, cosine)
+        """
+        import numpy as np
+
+        if k <= 0 or not self.grant_ids:
+            return []
+        vector = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        scores = self.matrix @ vector
+        if k < len(scores):
+            best = np.argpartition(-scores, k - 1)[:k]  # Unordered top k in linear time
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(self.grant_ids[i], float(scores[i])) for i in best]
@@ -0,0 +1,166 @@
+import os
+import heapq
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+import aws_clients
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
+GRANTS_STATUS_INDEX = os.environ.get('GRANTS_STATUS_INDEX', 'status-created_at-index')  # status (HASH) + created_at (RANGE)
+GRANTS_ISSUER_INDEX = os.environ.get('GRANTS_ISSUER_INDEX', 'issuer-created_at-index')  # issuer (HASH) + created_at (RANGE)
+GRANT_STATUSES = [status.strip() for status in os.environ.get('GRANT_STATUSES', 'open,closed,upcoming').split(',') if status.strip()]
+
+def projection_params(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    ProjectionExpression with placeholder names; `status` is a reserved word
+
+    Placeholders are #p<n> so they cannot collide with the #n<n> names boto3
+    generates for condition builders.
+    """
+    if not fields:
+        return {}
+    names = list(dict.fromkeys(fields))
+    return {
+        'ProjectionExpression': ', '.join(f"#p{i}" for i in range(len(names))),
+        'ExpressionAttributeNames': {f"#p{i}": name for i, name in enumerate(names)}
+    }
+
+class GrantsRepository:
+    """
+    Read paths over the Grants table
+
+    Listings by status or issuer are Queries on the two created_at-sorted
+    GSIs, so they read only the matching grants. Both indexes project ALL
+    attributes; grants without a created_at are not in them.
+    """
+
+    def __init__(self, table=None):
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = aws_clients.resource('dynamodb').Table(GRANTS_TABLE)
+        return self._table
+
+    def _pages(self, operation: str, params: Dict[str, Any], limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Follow LastEvaluatedKey, asking each page for at most what is still needed"""
+        read = 0
+        while True:
+            if limit is not None:
+                params['Limit'] = limit - read
+            with metrics.stage(f'dynamodb_{operation}'):
+                response = getattr(self.table, operation)(**params)
+            metrics.record_count('dynamodb_pages')
+            read += len(response.get('Items', []))
+            yield response
+            if 'LastEvaluatedKey' not in response or (limit is not None and read >= limit):
+                return
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def query_index(self, index: str, key_condition, limit: Optional[int] = None,
+                    fields: Optional[List[str]] = None, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Every item of a key condition on an index, following pagination up to limit"""
+        params = dict(
+            projection_params(fields),
+            IndexName=index,
+            KeyConditionExpression=key_condition,
+            ScanIndexForward=not newest_first
+        )
+        items = []
+        for response in self._pages('query', params, limit):
+            items.extend(response.get('Items', []))
+        return items
+
+    def list_by_status(self, status: str, limit: Optional[int] = None, fields: Optional[List[str]] = None,
+                       newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Grants with a status, ordered by created_at"""
+        return self.query_index(GRANTS_STATUS_INDEX, Key('status').eq(status), limit, fields, newest_first)
+
+    def list_by_issuer(self, issuer: str, limit: Optional[int] = None, fields: Optional[List[str]] = None,
+                       newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Grants from one issuer, ordered by created_at"""
+        return self.query_index(GRANTS_ISSUER_INDEX, Key('issuer').eq(issuer), limit, fields, newest_first)
+
+    def page_by_statuses(self, statuses: List[str], limit: int, positions: Optional[Dict[str, Any]] = None,
+                         fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        One page of grants across status partitions, newest first
+
+        positions maps each status still to be read to the status-index key
+        of the last grant already returned from it (None before the first
+        page); statuses missing from it are exhausted. Each status partition
+        is queried for at most `limit` + 1 grants after its position, the results
+        are merged by created_at and the first `limit` kept. Returns the page
+        and the positions for the next one, empty once every status is done.
+        """
+        if positions is None:
+            positions = {status: None for status in statuses}
+        if fields:
+            fields = list(fields) + ['grant_id', 'status', 'created_at']  # Needed for the positions
+
+        fetched = {}
+        for status in statuses:
+            if status not in positions:
+                continue
+            params = dict(
+                projection_params(fields),
+                IndexName=GRANTS_STATUS_INDEX,
+                KeyConditionExpression=Key('status').eq(status),
+                ScanIndexForward=False
+            )
+            if positions[status]:
+                params['ExclusiveStartKey'] = positions[status]
+            items, more = [], False
+            for response in self._pages('query', params, limit + 1):  # One extra shows whether more remain
+                items.extend(response.get('Items', []))
+                more = 'LastEvaluatedKey' in response
+            fetched[status] = (items, more)
+
+        merged = heapq.merge(
+            *([(item['created_at'], status, item) for item in items] for status, (items, _) in fetched.items()),
+            key=lambda entry: entry[0],
+            reverse=True
+        )
+        page = [entry for _, entry in zip(range(limit), merged)]
+
+        taken = {status: 0 for status in fetched}
+        for _, status, _ in page:
+            taken[status] += 1
+        next_positions = {}
+        for status, (items, more) in fetched.items():
+            if taken[status] < len(items) or more:
+                last = items[taken[status] - 1] if taken[status] else None
+                next_positions[status] = (
+                    {'grant_id': last['grant_id'], 'status': last['status'], 'created_at': last['created_at']}
+                    if last else positions[status]
+                )
+        return [item for _, _, item in page], next_positions
+
+    def count_by_status(self, status: str) -> int:
+        """Number of grants with a status; reads only that index partition"""
+        params = {
+            'IndexName': GRANTS_STATUS_INDEX,
+            'KeyConditionExpression': Key('status').eq(status),
+            'Select': 'COUNT'
+        }
+        return sum(response.get('Count', 0) for response in self._pages('query', params))
+
+    def count_all(self) -> int:
+        return sum(response.get('Count', 0) for response in self._pages('scan', {'Select': 'COUNT'}))
+
+    def status_counts(self) -> Dict[str, int]:
+        """Grants per status from a full scan projecting only status; for repair jobs"""
+        counts = {}
+        for response in self._pages('scan', projection_params(['status'])):
+            for item in response.get('Items', []):
+                status = item.get('status')
+                counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,111 @@
+import json
+import os
+import random
+import logging
+from typing import Any, Iterable
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.0'))  # Fraction of invocations logged at DEBUG
+LOG_MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', '500'))
+LOG_BYTE_BUDGET = int(os.environ.get('LOG_BYTE_BUDGET', str(64 * 1024)))  # Per invocation, INFO and below
+
+REDACTED_KEYS = frozenset({
+    'pdf_content', 'pdf_file', 'file_base64', 'body_base64',
+    'authorization', 'password', 'token', 'api_key', 'x-api-key'
+})
+
+def truncate(text: str, max_chars: int = LOG_MAX_FIELD_CHARS) -> str:
+    """
+    Cut text to max_chars, noting how much was dropped
+    """
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+def redact(value: Any, keys: Iterable[str] = REDACTED_KEYS) -> Any:
+    """
+    Copy of value with secrets and bulk payloads replaced by a size marker
+    """
+    if isinstance(value, dict):
+        return {
+            key: (f"<redacted {len(str(item))} chars>" if str(key).lower() in keys else redact(item, keys))
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item, keys) for item in value]
+    return value
+
+class Payload:
+    """
+    Lazy log argument: redacted, serialized and truncated only if the record
+    is actually emitted. Use with %-style logging:
+
+        logger.debug("Raw Bedrock response body: %s", Payload(response_body))
+    """
+
+    __slots__ = ('value', 'max_chars')
+
+    def __init__(self, value: Any, max_chars: int = LOG_MAX_FIELD_CHARS):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, (dict, list, tuple)):
+            text = json.dumps(redact(value), default=str)
+        else:
+            text = str(value)
+        return truncate(text, self.max_chars)
+
+class InvocationBudgetFilter(logging.Filter):
+    """
+    Drops INFO/DEBUG records once an invocation has logged LOG_BYTE_BUDGET
+    bytes; warnings and errors always pass
+    """
+
+    def __init__(self, budget: int = LOG_BYTE_BUDGET):
+        super().__init__()
+        self.budget = budget
+        self.used = 0
+        self.dropped = 0
+
+    def reset(self) -> None:
+        self.used = 0
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.used >= self.budget:
+            if self.dropped == 0:
+                # Let one notice through so truncated logs are recognisable
+                record.msg, record.args = "Log budget of %d bytes exhausted, dropping INFO/DEBUG records", (self.budget,)
+                self.dropped += 1
+                return True
+            self.dropped += 1
+            return False
+        # Format once here and hand the result on, so handlers don't format again
+        message = record.getMessage()
+        record.msg, record.args = message, None
+        self.used += len(message)
+        return True
+
+_budget_filter = InvocationBudgetFilter()
+
+def begin_invocation() -> None:
+    """
+    Reset the byte budget and pick this invocation's log level (DEBUG for
+    a LOG_DEBUG_SAMPLE_RATE sample, LOG_LEVEL otherwise)
+    """
+    if _budget_filter not in logger.filters:
+        logger.addFilter(_budget_filter)
+    _budget_filter.reset()
+
+    if LOG_DEBUG_SAMPLE_RATE > 0 and random.random() < LOG_DEBUG_SAMPLE_RATE:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(LOG_LEVEL)
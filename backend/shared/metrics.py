@@ -0,0 +1,190 @@
+import json
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Callable, Optional
+
+import log_utils
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'Keystone')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+_cold_start = True
+_collectors = []  # Called with the InvocationMetrics just before it is emitted
+
+class InvocationMetrics:
+    """
+    Stage durations, payload sizes and counters for one Lambda invocation.
+
+    Stages that run more than once (or on several threads) accumulate.
+    """
+
+    def __init__(self, function_name: str, request_id: Optional[str] = None):
+        self.function_name = function_name
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.stages = {}  # name -> milliseconds
+        self.sizes = {}  # name -> bytes
+        self.counts = {}  # name -> count
+        self.properties = {}
+        self.lock = threading.Lock()
+
+    def add_stage(self, name: str, elapsed_ms: float) -> None:
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def add_size(self, name: str, size_bytes: int) -> None:
+        with self.lock:
+            self.sizes[name] = self.sizes.get(name, 0) + size_bytes
+
+    def add_count(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def to_emf(self) -> Dict[str, Any]:
+        """
+        CloudWatch Embedded Metric Format record
+        """
+        record = {
+            'FunctionName': self.function_name,
+            'request_id': self.request_id,
+            **self.properties
+        }
+        definitions = []
+
+        with self.lock:
+            record['duration_ms'] = round((time.perf_counter() - self.started) * 1000, 2)
+            definitions.append({'Name': 'duration_ms', 'Unit': 'Milliseconds'})
+            for name, value in self.stages.items():
+                record[f"{name}_ms"] = round(value, 2)
+                definitions.append({'Name': f"{name}_ms", 'Unit': 'Milliseconds'})
+            for name, value in self.sizes.items():
+                record[f"{name}_bytes"] = value
+                definitions.append({'Name': f"{name}_bytes", 'Unit': 'Bytes'})
+            for name, value in self.counts.items():
+                record[name] = value
+                definitions.append({'Name': name, 'Unit': 'Count'})
+
+        record['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': definitions
+            }]
+        }
+        return record
+
+# Module-global rather than a contextvar so stages on executor threads are
+# recorded too; Lambda runs one invocation per container at a time.
+_current: Optional[InvocationMetrics] = None
+
+def current() -> Optional[InvocationMetrics]:
+    """Metrics of the invocation in progress, if any"""
+    return _current
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block as a named stage; the time is recorded even if the block raises
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current
+        if metrics is not None:
+            metrics.add_stage(name, (time.perf_counter() - started) * 1000)
+
+def record_stage(name: str, elapsed_ms: float) -> None:
+    """Record a duration that doesn't fit a with-block, e.g. time to first token"""
+    if _current is not None:
+        _current.add_stage(name, elapsed_ms)
+
+def record_size(name: str, size_bytes: int) -> None:
+    """Record a payload size in bytes"""
+    if _current is not None:
+        _current.add_size(name, size_bytes)
+
+def record_count(name: str, value: int = 1) -> None:
+    """Increment a counter"""
+    if _current is not None:
+        _current.add_count(name, value)
+
+def record_bedrock_usage(response_body: Dict[str, Any]) -> None:
+    """
+    Record token usage from a Bedrock response body (Claude or Nova format)
+    """
+    usage = response_body.get('usage') or {}
+    input_tokens = usage.get('input_tokens', usage.get('inputTokens'))
+    output_tokens = usage.get('output_tokens', usage.get('outputTokens'))
+    record_count('bedrock_calls')
+    if input_tokens is not None:
+        record_count('bedrock_input_tokens', int(input_tokens))
+    if output_tokens is not None:
+        record_count('bedrock_output_tokens', int(output_tokens))
+
+def register_collector(collector: Callable[[InvocationMetrics], None]) -> None:
+    """
+    Register a function that adds values to each invocation's record before it is emitted
+    """
+    _collectors.append(collector)
+
+def emit(metrics: InvocationMetrics) -> None:
+    """
+    Print the EMF record; CloudWatch extracts the metrics from the log line
+    """
+    for collector in _collectors:
+        try:
+            collector(metrics)
+        except Exception as e:
+            logger.warning(f"Metrics collector failed: {str(e)}")
+    try:
+        print(json.dumps(metrics.to_emf(), default=str))
+    except Exception as e:
+        logger.warning(f"Could not emit metrics: {str(e)}")
+
+def instrument_handler(handler: Callable) -> Callable:
+    """
+    Decorator for Lambda handlers: opens a metrics scope for the invocation
+    and emits one structured record when it returns or raises. Also resets
+    the per-invocation log budget and debug sampling (see log_utils).
+    """
+
+    @wraps(handler)
+    def wrapper(event, context):
+        global _current, _cold_start
+        log_utils.begin_invocation()
+        if not METRICS_ENABLED:
+            return handler(event, context)
+
+        function_name = getattr(context, 'function_name', None) or handler.__module__
+        metrics = InvocationMetrics(function_name, getattr(context, 'aws_request_id', None))
+        metrics.properties['cold_start'] = _cold_start
+        _cold_start = False
+        _current = metrics
+        if isinstance(event, dict) and isinstance(event.get('body'), str):
+            metrics.add_size('request', len(event['body']))
+
+        try:
+            response = handler(event, context)
+            if isinstance(response, dict) and 'statusCode' in response:
+                metrics.properties['status_code'] = response['statusCode']
+                if isinstance(response.get('body'), str):
+                    metrics.add_size('response', len(response['body']))
+            return response
+        except Exception:
+            metrics.properties['status_code'] = 500
+            raise
+        finally:
+            _current = None
+            emit(metrics)
+
+    return wrapper
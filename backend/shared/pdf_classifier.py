@@ -0,0 +1,162 @@
+import io
+import os
+import re
+import time
+import logging
+from typing import Dict, Any, List
+
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+PDF_CLASSIFIER_SAMPLE_PAGES = int(os.environ.get('PDF_CLASSIFIER_SAMPLE_PAGES', '3'))  # First, last and evenly spaced pages between
+PDF_SCANNED_IMAGE_COVERAGE = float(os.environ.get('PDF_SCANNED_IMAGE_COVERAGE', '0.5'))  # Image share of the page that marks a scan
+
+KIND_TEXT = 'text'  # Every sampled page has a text layer; PyPDF2 will succeed
+KIND_SCANNED = 'scanned'  # Page images without text; needs OCR
+KIND_MIXED = 'mixed'  # Some of each; try PyPDF2, OCR if it comes back empty
+KIND_UNKNOWN = 'unknown'  # Nothing conclusive
+
+# Text-showing operators: (string) Tj, [array] TJ, (string) ' and (string) "
+TEXT_SHOWING = re.compile(rb'[)\]>]\s*(?:Tj|TJ|\'|")')
+NUMBER = rb'(-?\d*\.?\d+)'
+TRANSFORM = re.compile(rb'\s+'.join([NUMBER] * 6) + rb'\s+cm\b')
+DRAW_XOBJECT = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do\b')
+
+def sample_page_indexes(page_count: int, sample_size: int = PDF_CLASSIFIER_SAMPLE_PAGES) -> List[int]:
+    """
+    Evenly spaced page indexes, always including the first and last page
+    """
+    if page_count <= sample_size:
+        return list(range(page_count))
+    if sample_size <= 1:
+        return [0]
+    return sorted({round(i * (page_count - 1) / (sample_size - 1)) for i in range(sample_size)})
+
+def inspect_page(page) -> Dict[str, Any]:
+    """
+    Count fonts, text-showing operators and image coverage on one page
+
+    Only the page's own resource dictionary and content stream are read;
+    no text is extracted.
+    """
+    try:
+        embedded, unembedded = page._get_fonts()
+        font_count = len(embedded | unembedded)
+    except Exception:
+        font_count = 0  # No /Resources, or a malformed font dictionary
+
+    images = set()
+    try:
+        xobjects = page['/Resources'].get_object().get('/XObject')
+        for name, xobject in (xobjects.get_object().items() if xobjects else []):
+            if xobject.get_object().get('/Subtype') == '/Image':
+                images.add(name.lstrip('/'))
+    except Exception:
+        pass
+
+    contents = page.get_contents()
+    data = contents.get_data() if contents is not None else b''
+
+    # Images are drawn as "a b c d e f cm /Name Do"; the area of the unit
+    # square under the nearest preceding transform is the image's footprint
+    image_area = 0.0
+    if images:
+        transforms = list(TRANSFORM.finditer(data))
+        for match in DRAW_XOBJECT.finditer(data):
+            if match.group(1).decode('latin-1') not in images:
+                continue
+            preceding = [t for t in transforms if t.end() <= match.start()]
+            if preceding:
+                a, b, c, d = (float(value) for value in preceding[-1].groups()[:4])
+                image_area += abs(a * d - b * c)
+
+    try:
+        page_area = float(page.mediabox.width) * float(page.mediabox.height)
+    except Exception:
+        page_area = 0.0
+
+    return {
+        'fonts': font_count,
+        'text_operators': len(TEXT_SHOWING.findall(data)),
+        'images': len(images),
+        'image_coverage': min(1.0, image_area / page_area) if page_area else 0.0
+    }
+
+def classify_page(stats: Dict[str, Any]) -> str:
+    if stats['fonts'] and stats['text_operators']:
+        return KIND_TEXT
+    if stats['images'] and stats['image_coverage'] >= PDF_SCANNED_IMAGE_COVERAGE:
+        return KIND_SCANNED
+    return KIND_UNKNOWN
+
+def combine(page_kinds: List[str]) -> str:
+    kinds = set(page_kinds) - {KIND_UNKNOWN}
+    if not kinds:
+        return KIND_UNKNOWN
+    if len(kinds) == 1:
+        return kinds.pop()
+    return KIND_MIXED
+
+def classify_with_pypdf2(pdf_bytes: bytes) -> Dict[str, Any]:
+    import PyPDF2  # Deferred: not every function bundles it
+
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(reader.pages)
+    indexes = sample_page_indexes(page_count)
+    page_kinds = [classify_page(inspect_page(reader.pages[i])) for i in indexes]
+    return {'kind': combine(page_kinds), 'page_count': page_count, 'pages_sampled': len(indexes), 'method': 'pypdf2'}
+
+def classify_from_bytes(pdf_bytes: bytes) -> Dict[str, Any]:
+    """
+    Cruder fallback without PyPDF2: look for font and image dictionaries
+
+    Dictionaries inside compressed object streams are not visible, so this
+    more often answers KIND_UNKNOWN.
+    """
+    has_fonts = re.search(rb'/Type\s*/Font\b', pdf_bytes) is not None
+    has_images = re.search(rb'/Subtype\s*/Image\b', pdf_bytes) is not None
+    if has_fonts and has_images:
+        kind = KIND_MIXED
+    elif has_fonts:
+        kind = KIND_TEXT
+    elif has_images:
+        kind = KIND_SCANNED
+    else:
+        kind = KIND_UNKNOWN
+    return {'kind': kind, 'page_count': None, 'pages_sampled': 0, 'method': 'bytes'}
+
+def classify_pdf(pdf_bytes: bytes) -> Dict[str, Any]:
+    """
+    Decide whether a PDF has a usable text layer or needs OCR
+
+    Returns a dict with 'kind' (one of the KIND_* values), 'page_count',
+    'pages_sampled', 'method' and 'elapsed_ms'. Never raises: documents
+    PyPDF2 cannot read get the raw-byte scan, which answers KIND_UNKNOWN
+    when it finds nothing.
+    """
+    started = time.perf_counter()
+    with metrics.stage('pdf_classify'):
+        try:
+            result = classify_with_pypdf2(pdf_bytes)
+        except ImportError:
+            result = classify_from_bytes(pdf_bytes)
+        except Exception as e:
+            # Damaged files PyPDF2 rejects can still show their font and image dictionaries
+            logger.warning(f"PyPDF2 could not classify the PDF, scanning raw bytes: {str(e)}")
+            result = classify_from_bytes(pdf_bytes)
+
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    metrics.record_count(f'pdf_kind_{result["kind"]}')
+    logger.info(f"Classified PDF as {result['kind']} ({result['method']}, {result['pages_sampled']} pages sampled, {result['elapsed_ms']} ms)")
+    return result
+
+def needs_ocr(classification: Dict[str, Any]) -> bool:
+    """Whether the text layer can be skipped entirely"""
+    return classification['kind'] == KIND_SCANNED
+
+def has_text_layer(classification: Dict[str, Any]) -> bool:
+    """Whether PyPDF2 is worth trying first"""
+    return classification['kind'] in (KIND_TEXT, KIND_MIXED)
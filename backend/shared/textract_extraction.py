@@ -0,0 +1,241 @@
+import os
+import re
+import time
+import uuid
+import logging
+from typing import Dict, Any, Callable, List, Optional
+
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+TEXTRACT_POLL_INITIAL_DELAY = float(os.environ.get('TEXTRACT_POLL_INITIAL_DELAY', '1.0'))  # Seconds
+TEXTRACT_POLL_MAX_DELAY = float(os.environ.get('TEXTRACT_POLL_MAX_DELAY', '8.0'))  # Seconds
+TEXTRACT_POLL_TIMEOUT = float(os.environ.get('TEXTRACT_POLL_TIMEOUT', '240'))  # Seconds, keep below the Lambda timeout
+TEXTRACT_REQUEST_POLL_TIMEOUT = float(os.environ.get('TEXTRACT_REQUEST_POLL_TIMEOUT', '20'))  # Seconds, for polling inside an API Gateway request (29 s limit)
+TEXTRACT_SNS_TOPIC_ARN = os.environ.get('TEXTRACT_SNS_TOPIC_ARN')  # Completion notifications (optional)
+TEXTRACT_SNS_ROLE_ARN = os.environ.get('TEXTRACT_SNS_ROLE_ARN')  # Role Textract assumes to publish to the topic
+TEXTRACT_INLINE_MAX_BYTES = int(os.environ.get('TEXTRACT_INLINE_MAX_BYTES', str(5 * 1024 * 1024)))  # Largest PDF sent as Document Bytes
+TEXTRACT_SYNC_MAX_BYTES = int(os.environ.get('TEXTRACT_SYNC_MAX_BYTES', str(10 * 1024 * 1024)))  # Synchronous API document limit
+
+ROUTE_INLINE = 'inline'  # detect_document_text with Document Bytes, no S3 staging
+ROUTE_SYNC_S3 = 'sync_s3'  # detect_document_text with an S3Object
+ROUTE_ASYNC = 'async'  # start_document_text_detection, any page count
+
+# Page objects, not the /Pages tree nodes
+PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?!s)\b')
+
+def assemble_page_text(blocks: List[Dict[str, Any]]) -> str:
+    """
+    Join LINE blocks page by page, in page order
+
+    Textract returns lines in reading order within a page, but pages can be
+    interleaved across result pages, so lines are grouped by their Page
+    number before joining.
+    """
+    pages = {}
+    for block in blocks:
+        if block.get('BlockType') == 'LINE':
+            pages.setdefault(block.get('Page', 1), []).append(block['Text'])
+    return "\n".join("\n".join(pages[page]) for page in sorted(pages)).strip()
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """
+    Count page objects in a PDF without parsing it
+
+    Pages stored inside compressed object streams are invisible to this
+    scan, so 0 means "unknown" rather than "empty".
+    """
+    return len(PAGE_OBJECT.findall(pdf_bytes))
+
+def choose_route(pdf_bytes: bytes) -> str:
+    """
+    Pick the cheapest Textract call that can handle the document
+
+    Single-page documents use the synchronous API, inline when small enough
+    to skip the S3 upload and delete. Multi-page documents, documents whose
+    page count is unknown and anything over the synchronous size limit use
+    the asynchronous API.
+    """
+    size = len(pdf_bytes)
+    if count_pdf_pages(pdf_bytes) != 1 or size > TEXTRACT_SYNC_MAX_BYTES:
+        route = ROUTE_ASYNC
+    elif size <= TEXTRACT_INLINE_MAX_BYTES:
+        route = ROUTE_INLINE
+    else:
+        route = ROUTE_SYNC_S3
+    metrics.record_count(f'textract_route_{route}')
+    return route
+
+def detect_text(client, document: Dict[str, Any]) -> str:
+    """
+    Synchronous single-page detection; document is {'Bytes': ...} or {'S3Object': {...}}
+    """
+    with metrics.stage('textract_sync'):
+        response = client.detect_document_text(Document=document)
+    return assemble_page_text(response['Blocks'])
+
+def notifications_enabled() -> bool:
+    """Whether async jobs report completion through SNS"""
+    return bool(TEXTRACT_SNS_TOPIC_ARN and TEXTRACT_SNS_ROLE_ARN)
+
+def start_text_detection(client, bucket: str, key: str, job_tag: Optional[str] = None,
+                         notify: bool = False) -> str:
+    """
+    Start an asynchronous multi-page text detection job and return its JobId
+    """
+    params = {'DocumentLocation': {'S3Object': {'Bucket': bucket, 'Name': key}}}
+    if job_tag:
+        params['JobTag'] = job_tag
+    if notify:
+        if not notifications_enabled():
+            raise ValueError("TEXTRACT_SNS_TOPIC_ARN and TEXTRACT_SNS_ROLE_ARN must be set for notifications")
+        params['NotificationChannel'] = {
+            'SNSTopicArn': TEXTRACT_SNS_TOPIC_ARN,
+            'RoleArn': TEXTRACT_SNS_ROLE_ARN
+        }
+
+    response = client.start_document_text_detection(**params)
+    logger.info(f"Started Textract job {response['JobId']} for s3://{bucket}/{key}")
+    return response['JobId']
+
+def wait_for_text_detection(client, job_id: str, timeout: float = TEXTRACT_POLL_TIMEOUT,
+                            initial_delay: float = TEXTRACT_POLL_INITIAL_DELAY,
+                            max_delay: float = TEXTRACT_POLL_MAX_DELAY,
+                            sleep: Callable[[float], None] = time.sleep) -> Dict[str, Any]:
+    """
+    Poll a job with capped exponential backoff until it leaves IN_PROGRESS
+
+    Returns the first result page. Raises RuntimeError if the job failed and
+    TimeoutError if it is still running after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+
+    with metrics.stage('textract_wait'):
+        while True:
+            response = client.get_document_text_detection(JobId=job_id)
+            status = response['JobStatus']
+            metrics.record_count('textract_polls')
+
+            if status == 'SUCCEEDED':
+                return response
+            if status == 'PARTIAL_SUCCESS':
+                logger.warning(f"Textract job {job_id} partially succeeded: {response.get('StatusMessage')}")
+                return response
+            if status == 'FAILED':
+                raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage', 'no reason given')}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Textract job {job_id} still running after {timeout:.0f}s")
+            sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+def get_text_detection_blocks(client, job_id: str,
+                              first_page: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Collect every block of a finished job, following NextToken pagination
+    """
+    response = first_page or client.get_document_text_detection(JobId=job_id)
+    blocks = list(response.get('Blocks', []))
+
+    with metrics.stage('textract_results'):
+        while response.get('NextToken'):
+            response = client.get_document_text_detection(JobId=job_id, NextToken=response['NextToken'])
+            blocks.extend(response.get('Blocks', []))
+
+    pages = (first_page or response).get('DocumentMetadata', {}).get('Pages')
+    if pages:
+        metrics.record_count('textract_pages', pages)
+    return blocks
+
+def extract_text_async(client, bucket: str, key: str, job_tag: Optional[str] = None,
+                       timeout: float = TEXTRACT_POLL_TIMEOUT) -> str:
+    """
+    Multi-page text detection for a PDF in S3: start the job, poll until it
+    finishes and return the text of all pages in order
+
+    Callers answering an API Gateway request should pass
+    TEXTRACT_REQUEST_POLL_TIMEOUT; TimeoutError is raised when it runs out.
+    """
+    job_id = start_text_detection(client, bucket, key, job_tag=job_tag)
+    first_page = wait_for_text_detection(client, job_id, timeout=timeout)
+    return assemble_page_text(get_text_detection_blocks(client, job_id, first_page))
+
+class LocalTextractClient:
+    """
+    In-process stand-in for the Textract text-detection APIs, for tests and
+    local development. Register documents with add_document(); async jobs
+    report IN_PROGRESS for the first polls_until_done polls and return
+    their blocks max_results at a time, or FAILED for documents registered
+    with a failure message.
+    """
+
+    def __init__(self, polls_until_done: int = 2, max_results: int = 50):
+        self.polls_until_done = polls_until_done
+        self.max_results = max_results
+        self.documents = {}  # (bucket, key) -> list of page texts
+        self.failures = {}  # (bucket, key) -> StatusMessage of the failed job
+        self.jobs = {}
+
+    def add_document(self, bucket: str, key: str, pages: List[str], failure: Optional[str] = None) -> None:
+        self.documents[(bucket, key)] = pages
+        if failure:
+            self.failures[(bucket, key)] = failure
+
+    def add_document_bytes(self, data: bytes, pages: List[str]) -> None:
+        self.documents[('bytes', data)] = pages
+
+    def _blocks(self, pages: List[str]) -> List[Dict[str, Any]]:
+        blocks = []
+        for page_number, page_text in enumerate(pages, start=1):
+            blocks.append({'BlockType': 'PAGE', 'Page': page_number})
+            for line in page_text.splitlines():
+                if line.strip():
+                    blocks.append({'BlockType': 'LINE', 'Page': page_number, 'Text': line.strip()})
+        return blocks
+
+    def detect_document_text(self, Document: Dict[str, Any]) -> Dict[str, Any]:
+        if 'S3Object' in Document:
+            location = Document['S3Object']
+            pages = self.documents[(location['Bucket'], location['Name'])]
+        else:
+            pages = self.documents[('bytes', Document['Bytes'])]
+        if len(pages) > 1:
+            from botocore.exceptions import ClientError
+            raise ClientError({'Error': {'Code': 'UnsupportedDocumentException',
+                                         'Message': 'Synchronous detection handles single-page documents'}},
+                              'DetectDocumentText')
+        return {'Blocks': self._blocks(pages), 'DocumentMetadata': {'Pages': len(pages)}}
+
+    def start_document_text_detection(self, DocumentLocation: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        location = DocumentLocation['S3Object']
+        pages = self.documents[(location['Bucket'], location['Name'])]
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {'pages': pages, 'polls': 0, 'job_tag': kwargs.get('JobTag'),
+                             'failure': self.failures.get((location['Bucket'], location['Name']))}
+        return {'JobId': job_id}
+
+    def get_document_text_detection(self, JobId: str, NextToken: Optional[str] = None,
+                                    MaxResults: Optional[int] = None) -> Dict[str, Any]:
+        job = self.jobs[JobId]
+        job['polls'] += 1
+        if job['polls'] <= self.polls_until_done:
+            return {'JobStatus': 'IN_PROGRESS'}
+        if job['failure']:
+            return {'JobStatus': 'FAILED', 'StatusMessage': job['failure']}
+
+        blocks = self._blocks(job['pages'])
+        start = int(NextToken or 0)
+        end = start + (MaxResults or self.max_results)
+        response = {
+            'JobStatus': 'SUCCEEDED',
+            'Blocks': blocks[start:end],
+            'DocumentMetadata': {'Pages': len(job['pages'])}
+        }
+        if end < len(blocks):
+            response['NextToken'] = str(end)
+        return response
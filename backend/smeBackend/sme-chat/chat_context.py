@@ -0,0 +1,94 @@
+import math
+import os
+import logging
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+CHAT_PROMPT_TOKEN_BUDGET = int(os.environ.get('CHAT_PROMPT_TOKEN_BUDGET', '6000'))  # Grant context + history + message
+CHAT_MIN_VERBATIM_MESSAGES = int(os.environ.get('CHAT_MIN_VERBATIM_MESSAGES', '2'))  # Kept verbatim even over budget
+CHAT_SUMMARY_MIN_NEW_MESSAGES = int(os.environ.get('CHAT_SUMMARY_MIN_NEW_MESSAGES', '4'))  # Unsummarized messages that trigger a refresh
+CHAT_SUMMARY_MAX_TOKENS = int(os.environ.get('CHAT_SUMMARY_MAX_TOKENS', '400'))  # Length asked of the summarizer
+CHARS_PER_TOKEN = 4  # Rough average for English text with Claude and Nova tokenizers
+PROMPT_OVERHEAD_TOKENS = 250  # Instructions and section headings around the context
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; good enough for budgeting, not for billing"""
+    return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    # "User: " / "Assistant: " prefix plus newline
+    return estimate_tokens(str(message.get('content', ''))) + 3
+
+def history_budget(grant_context: str, user_message: str,
+                   total_budget: int = CHAT_PROMPT_TOKEN_BUDGET) -> int:
+    """Tokens left for history once the fixed parts of the prompt are counted"""
+    fixed = estimate_tokens(grant_context) + estimate_tokens(user_message) + PROMPT_OVERHEAD_TOKENS
+    return max(0, total_budget - fixed)
+
+def select_history(messages: List[Dict[str, Any]], summary: Optional[Dict[str, Any]],
+                   budget: int) -> Dict[str, Any]:
+    """
+    Choose what of the conversation goes into the prompt
+
+    messages are the newest stored messages (oldest first, each with a
+    seq). The newest ones are kept verbatim while they fit in the budget
+    (after reserving room for the summary); everything older is
+    represented by the running summary. Returns a dict with 'summary'
+    (text or None), 'messages' (verbatim, oldest first) and
+    'refresh_through_seq': when set, at least CHAT_SUMMARY_MIN_NEW_MESSAGES
+    left-out messages are not in the summary yet and it should be refreshed
+    up to that seq. Fewer than that are simply left out until the next
+    refresh, so a long conversation triggers one refresh every few turns
+    rather than on every turn.
+    """
+    summary_text = summary['summary'] if summary else None
+    covered_through = summary['through_seq'] if summary else 0
+    remaining = budget - (estimate_tokens(summary_text) if summary_text else 0)
+
+    verbatim = []
+    for message in reversed(messages):
+        if message.get('seq', 0) <= covered_through:
+            break  # Already folded into the summary
+        cost = message_tokens(message)
+        if cost > remaining and len(verbatim) >= CHAT_MIN_VERBATIM_MESSAGES:
+            break
+        verbatim.append(message)
+        remaining -= cost
+    verbatim.reverse()
+
+    # Left out but not summarized yet: messages between the summary and the
+    # verbatim window, plus any older than the loaded window
+    first_verbatim_seq = verbatim[0]['seq'] if verbatim else (messages[-1]['seq'] + 1 if messages else 1)
+    refresh_through_seq = None
+    if first_verbatim_seq - 1 - covered_through >= CHAT_SUMMARY_MIN_NEW_MESSAGES:
+        refresh_through_seq = first_verbatim_seq - 1
+        logger.info(f"Summary covers messages through {covered_through}, "
+                    f"context starts at {first_verbatim_seq}; refresh needed")
+
+    return {
+        'summary': summary_text,
+        'messages': verbatim,
+        'refresh_through_seq': refresh_through_seq
+    }
+
+def build_summary_prompt(previous_summary: Optional[str], messages: List[Dict[str, Any]]) -> str:
+    """Prompt that folds messages into the running summary"""
+    transcript = "\n".join(
+        f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+        for message in messages
+    )
+    previous = previous_summary or "(none yet)"
+    return f"""You maintain a running summary of a conversation between an SME and a grant assistant.
+
+CURRENT SUMMARY:
+{previous}
+
+NEW MESSAGES:
+{transcript}
+
+Rewrite the summary so it also covers the new messages. Keep the facts the SME shared about their company, the questions they asked and the answers and commitments the assistant gave. Use plain sentences, no markdown, at most {CHAT_SUMMARY_MAX_TOKENS * 3 // 4} words.
+
+SUMMARY:"""
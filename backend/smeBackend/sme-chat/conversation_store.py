@@ -0,0 +1,288 @@
+import json
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import aws_clients
+import metrics
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+CONVERSATION_BACKEND = os.environ.get('CONVERSATION_BACKEND', 'dynamodb')  # dynamodb | local
+CONVERSATION_TABLE = os.environ.get('CONVERSATION_TABLE', 'ChatConversations')
+CONVERSATION_TTL_SECONDS = int(os.environ.get('CONVERSATION_TTL_SECONDS', str(30 * 24 * 3600)))  # DynamoDB TTL
+CONVERSATION_HISTORY_LIMIT = int(os.environ.get('CONVERSATION_HISTORY_LIMIT', '20'))  # Newest messages loaded and cached
+CONVERSATION_CACHE_MAX_ENTRIES = int(os.environ.get('CONVERSATION_CACHE_MAX_ENTRIES', '500'))
+CONVERSATION_CACHE_MAX_BYTES = int(os.environ.get('CONVERSATION_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+CONVERSATION_CACHE_TTL_SECONDS = int(os.environ.get('CONVERSATION_CACHE_TTL_SECONDS', '300'))  # Bounds staleness across containers
+APPEND_MAX_ATTEMPTS = 3  # Conditional-put retries when another container appended first
+
+SUMMARY_SEQ = 0  # Messages start at seq 1; the running summary item sits before them
+
+class BoundedCache:
+    """
+    Per-container LRU with TTL, bounded by entry count and by the
+    approximate serialized size of the cached values
+    """
+
+    def __init__(self, max_entries: int = CONVERSATION_CACHE_MAX_ENTRIES,
+                 max_bytes: int = CONVERSATION_CACHE_MAX_BYTES,
+                 ttl_seconds: int = CONVERSATION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> (expires_at, size, value)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        size = len(json.dumps(value, default=str))
+        with self.lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return  # Larger than the whole cache; always read through
+            self.entries[key] = (time.time() + self.ttl_seconds, size, value)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+
+    def discard(self, key: str) -> None:
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+class DynamoDBConversationTier:
+    """
+    One item per message. Table key: conversation_id (string, partition) +
+    seq (number, sort), TTL attribute: expires_at.
+
+    Messages are only ever added, each with a put conditioned on its seq
+    being unused, so two containers appending to the same conversation
+    cannot overwrite each other. The running summary of older messages is
+    the item at SUMMARY_SEQ and is only replaced by one covering more
+    messages.
+    """
+
+    def __init__(self, table_name: str = CONVERSATION_TABLE, dynamodb_resource=None):
+        self.table = (dynamodb_resource or aws_clients.resource('dynamodb')).Table(table_name)
+
+    def load(self, conversation_id: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Newest `limit` messages in order, plus the highest seq (0 if none)"""
+        with metrics.stage('conversation_query'):
+            response = self.table.query(
+                KeyConditionExpression='conversation_id = :id AND seq > :summary',
+                ExpressionAttributeValues={':id': conversation_id, ':summary': SUMMARY_SEQ},
+                ScanIndexForward=False,
+                Limit=limit
+            )
+        items = list(reversed(response.get('Items', [])))
+        last_seq = int(items[-1]['seq']) if items else 0
+        return [self._message(item) for item in items], last_seq
+
+    def load_range(self, conversation_id: str, after_seq: int, through_seq: int) -> List[Dict[str, Any]]:
+        """Messages with after_seq < seq <= through_seq, oldest first"""
+        items = []
+        params = {
+            'KeyConditionExpression': 'conversation_id = :id AND seq BETWEEN :first AND :last',
+            'ExpressionAttributeValues': {':id': conversation_id, ':first': after_seq + 1, ':last': through_seq}
+        }
+        with metrics.stage('conversation_query'):
+            while True:
+                response = self.table.query(**params)
+                items.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return [self._message(item) for item in items]
+
+    def get_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with metrics.stage('conversation_get_summary'):
+            item = self.table.get_item(Key={'conversation_id': conversation_id, 'seq': SUMMARY_SEQ}).get('Item')
+        if not item:
+            return None
+        return {'summary': item['summary'], 'through_seq': int(item['through_seq'])}
+
+    def put_summary(self, conversation_id: str, summary: Dict[str, Any]) -> bool:
+        """Store a summary unless one covering more messages is already stored"""
+        client = self.table.meta.client
+        try:
+            self.table.put_item(
+                Item={
+                    'conversation_id': conversation_id,
+                    'seq': SUMMARY_SEQ,
+                    'summary': summary['summary'],
+                    'through_seq': summary['through_seq'],
+                    'created_at': datetime.utcnow().isoformat(),
+                    'expires_at': int(time.time()) + CONVERSATION_TTL_SECONDS
+                },
+                ConditionExpression='attribute_not_exists(through_seq) OR through_seq < :through',
+                ExpressionAttributeValues={':through': summary['through_seq']}
+            )
+            return True
+        except client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    @staticmethod
+    def _message(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {'seq': int(item['seq']), 'role': item['role'], 'content': item['content']}
+
+    def put_message(self, conversation_id: str, seq: int, message: Dict[str, Any]) -> bool:
+        """Store a message at seq; False if that seq is already taken"""
+        client = self.table.meta.client
+        try:
+            with metrics.stage('conversation_put'):
+                self.table.put_item(
+                    Item={
+                        'conversation_id': conversation_id,
+                        'seq': seq,
+                        'role': message['role'],
+                        'content': message['content'],
+                        'created_at': datetime.utcnow().isoformat(),
+                        'expires_at': int(time.time()) + CONVERSATION_TTL_SECONDS
+                    },
+                    ConditionExpression='attribute_not_exists(seq)'
+                )
+            return True
+        except client.exceptions.ConditionalCheckFailedException:
+            return False
+
+class InMemoryConversationTier:
+    """Dict-backed stand-in for DynamoDBConversationTier, for tests and local development"""
+
+    def __init__(self):
+        self.items = {}  # conversation_id -> {seq: message}
+        self.summaries = {}  # conversation_id -> summary
+        self.lock = threading.Lock()
+
+    def load(self, conversation_id: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        with self.lock:
+            stored = self.items.get(conversation_id, {})
+            seqs = sorted(stored)[-limit:] if limit > 0 else []
+            return [dict(stored[seq], seq=seq) for seq in seqs], max(stored, default=0)
+
+    def load_range(self, conversation_id: str, after_seq: int, through_seq: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            stored = self.items.get(conversation_id, {})
+            return [dict(stored[seq], seq=seq) for seq in sorted(stored) if after_seq < seq <= through_seq]
+
+    def get_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            summary = self.summaries.get(conversation_id)
+            return dict(summary) if summary else None
+
+    def put_summary(self, conversation_id: str, summary: Dict[str, Any]) -> bool:
+        with self.lock:
+            current = self.summaries.get(conversation_id)
+            if current and current['through_seq'] >= summary['through_seq']:
+                return False
+            self.summaries[conversation_id] = {'summary': summary['summary'], 'through_seq': summary['through_seq']}
+            return True
+
+    def put_message(self, conversation_id: str, seq: int, message: Dict[str, Any]) -> bool:
+        with self.lock:
+            stored = self.items.setdefault(conversation_id, {})
+            if seq in stored:
+                return False
+            stored[seq] = {'role': message['role'], 'content': message['content']}
+            return True
+
+class ConversationStore:
+    """
+    Conversation history: bounded in-memory cache over a persistent tier
+
+    Reads hit the cache or query a single conversation; appends write only
+    the new message. Each container keeps at most history_limit messages
+    per conversation and evicts whole conversations by LRU.
+    """
+
+    def __init__(self, tier, cache: Optional[BoundedCache] = None,
+                 history_limit: int = CONVERSATION_HISTORY_LIMIT):
+        self.tier = tier
+        self.cache = cache or BoundedCache()
+        self.history_limit = history_limit
+
+    def _load(self, conversation_id: str) -> Tuple[List[Dict[str, Any]], int]:
+        cached = self.cache.get(conversation_id)
+        if cached is not None:
+            metrics.record_count('conversation_cache_hits')
+            return cached
+        metrics.record_count('conversation_cache_misses')
+        messages, last_seq = self.tier.load(conversation_id, self.history_limit)
+        self.cache.put(conversation_id, (messages, last_seq))
+        return messages, last_seq
+
+    def get_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Newest messages of a conversation, oldest first, each with its seq"""
+        messages, _ = self._load(conversation_id)
+        return list(messages)
+
+    def get_messages(self, conversation_id: str, after_seq: int, through_seq: int) -> List[Dict[str, Any]]:
+        """Messages with after_seq < seq <= through_seq, read from the persistent tier"""
+        return self.tier.load_range(conversation_id, after_seq, through_seq)
+
+    def get_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Running summary {'summary', 'through_seq'} of older messages, if any"""
+        key = f"{conversation_id}#summary"
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None  # {} records "no summary yet"
+        summary = self.tier.get_summary(conversation_id)
+        self.cache.put(key, summary or {})
+        return summary
+
+    def put_summary(self, conversation_id: str, summary: str, through_seq: int) -> bool:
+        """Store a summary of messages up to through_seq; False if a newer one exists"""
+        stored = self.tier.put_summary(conversation_id, {'summary': summary, 'through_seq': through_seq})
+        self.cache.discard(f"{conversation_id}#summary")
+        return stored
+
+    def append(self, conversation_id: str, role: str, content: str) -> None:
+        """Add a message after the newest stored one"""
+        message = {'role': role, 'content': content}
+        messages, last_seq = self._load(conversation_id)
+
+        for attempt in range(APPEND_MAX_ATTEMPTS):
+            if self.tier.put_message(conversation_id, last_seq + 1, message):
+                messages = (list(messages) + [dict(message, seq=last_seq + 1)])[-self.history_limit:]
+                self.cache.put(conversation_id, (messages, last_seq + 1))
+                return
+            # Another container appended since this one cached the conversation
+            logger.info(f"Conversation {conversation_id} changed elsewhere, reloading")
+            self.cache.discard(conversation_id)
+            messages, last_seq = self._load(conversation_id)
+
+        raise RuntimeError(f"Could not append to conversation {conversation_id} after {APPEND_MAX_ATTEMPTS} attempts")
+
+def create_conversation_store(backend: str = CONVERSATION_BACKEND) -> ConversationStore:
+    """
+    Build the configured conversation store
+    """
+    backend = (backend or 'local').lower()
+    if backend == 'dynamodb':
+        return ConversationStore(DynamoDBConversationTier())
+    if backend != 'local':
+        logger.warning(f"Unknown CONVERSATION_BACKEND '{backend}', using the in-memory stand-in")
+    return ConversationStore(InMemoryConversationTier())
@@ -17,6 +17,8 @@ def deploy_lambda():
     REGION = "ap-southeast-1"
     RUNTIME = "python3.9"
     HANDLER = "lambda_function.lambda_handler"
+    SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared")
+    SHARED_MODULES = ["aws_clients.py", "bedrock_cache.py", "log_utils.py", "metrics.py"]
     
     # Create deployment package
     print("📦 Creating deployment package...")
@@ -26,6 +28,13 @@ def deploy_lambda():
     with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
         # Add lambda function
         zipf.write("lambda_function.py", "lambda_function.py")
+        zipf.write("conversation_store.py", "conversation_store.py")
+        zipf.write("chat_context.py", "chat_context.py")
+        zipf.write("grant_context.py", "grant_context.py")
+        
+        # Add shared modules (see backend/shared/README.md)
+        for module in SHARED_MODULES:
+            zipf.write(os.path.join(SHARED_DIR, module), module)
         
         # Add any other dependencies if needed
         # Note: boto3 is already available in Lambda runtime
@@ -60,10 +69,12 @@ def deploy_lambda():
                     'Variables': {
                         'BEDROCK_MODEL_ID': 'anthropic.claude-3-haiku-20240307-v1:0',
                         'BEDROCK_REGION': 'ap-southeast-1',
-                        'GRANTS_TABLE': 'Grants'
+                        'GRANTS_TABLE': 'Grants',
+                        'BEDROCK_CACHE_TABLE': 'BedrockResponseCache',
+                        'CONVERSATION_TABLE': 'ChatConversations'
                     }
                 },
-                Timeout=30,
+                Timeout=60,  # Streamed replies run past the API Gateway integration timeout
                 MemorySize=256
             )
             print(f"✅ Updated function configuration")
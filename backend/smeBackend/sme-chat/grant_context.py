@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+from typing import Dict, Any, Callable, Optional
+
+import aws_clients
+import metrics
+from conversation_store import BoundedCache
+
+# Configure logging
+logger = logging.getLogger()
+
+# Environment variables
+GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
+GRANT_CONTEXT_CACHE_MAX_ENTRIES = int(os.environ.get('GRANT_CONTEXT_CACHE_MAX_ENTRIES', '200'))
+GRANT_CONTEXT_CACHE_MAX_BYTES = int(os.environ.get('GRANT_CONTEXT_CACHE_MAX_BYTES', str(2 * 1024 * 1024)))
+GRANT_CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('GRANT_CONTEXT_CACHE_TTL_SECONDS', '3600'))  # Hard limit on a cached context
+GRANT_CONTEXT_REVALIDATE_SECONDS = int(os.environ.get('GRANT_CONTEXT_REVALIDATE_SECONDS', '60'))  # updated_at re-check interval
+
+class GrantContextLoader:
+    """
+    Read-through cache of rendered grant contexts for the chat prompt
+
+    Each entry holds the context string rendered from one version of a
+    grant, identified by grant_id and updated_at. Within
+    GRANT_CONTEXT_REVALIDATE_SECONDS a turn uses the cached string with no
+    DynamoDB call; after that a GetItem projecting only updated_at confirms
+    the grant is unchanged before the string is reused. Only a changed or
+    uncached grant is fetched in full and re-rendered.
+    """
+
+    def __init__(self, render: Callable[[Dict[str, Any]], str], table=None,
+                 cache: Optional[BoundedCache] = None):
+        self.render = render
+        self._table = table
+        self.cache = cache or BoundedCache(
+            max_entries=GRANT_CONTEXT_CACHE_MAX_ENTRIES,
+            max_bytes=GRANT_CONTEXT_CACHE_MAX_BYTES,
+            ttl_seconds=GRANT_CONTEXT_CACHE_TTL_SECONDS
+        )
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = aws_clients.resource('dynamodb').Table(GRANTS_TABLE)
+        return self._table
+
+    def get_context(self, grant_id: str) -> Optional[str]:
+        """Rendered context for a grant, or None if the grant does not exist"""
+        cached = self.cache.get(grant_id)
+        now = time.time()
+
+        if cached is not None:
+            if now - cached['checked_at'] < GRANT_CONTEXT_REVALIDATE_SECONDS:
+                metrics.record_count('grant_context_cache_hits')
+                return cached['context']
+
+            with metrics.stage('grant_revalidate'):
+                current = self.table.get_item(
+                    Key={'grant_id': grant_id},
+                    ProjectionExpression='updated_at'
+                ).get('Item')
+            if current and current.get('updated_at') == cached['updated_at']:
+                metrics.record_count('grant_context_revalidated')
+                self.cache.put(grant_id, dict(cached, checked_at=now))
+                return cached['context']
+
+        metrics.record_count('grant_context_cache_misses')
+        with metrics.stage('grant_get'):
+            grant = self.table.get_item(Key={'grant_id': grant_id}).get('Item')
+        if not grant:
+            self.cache.discard(grant_id)
+            return None
+
+        context = self.render(grant)
+        self.cache.put(grant_id, {
+            'updated_at': grant.get('updated_at'),
+            'checked_at': now,
+            'context': context
+        })
+        logger.info(f"Rendered context for grant {grant_id} (updated_at {grant.get('updated_at')})")
+        return context
+
+    def invalidate(self, grant_id: str) -> None:
+        self.cache.discard(grant_id)
@@ -1,28 +1,46 @@
 import json
-import boto3
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 import os
 import re
+import time
+import bedrock_cache
+import aws_clients
+import metrics
+import chat_context
+import conversation_store
+import grant_context
+from log_utils import Payload
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize AWS services
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+bedrock = aws_clients.lazy_client('bedrock-runtime', region_name='us-east-1')
+lambda_client = aws_clients.lazy_client('lambda')  # Asynchronous summary refreshes
+aws_clients.prewarm()
 
 # Environment variables with defaults
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
 BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')  # Default to us-east-1
+PROMPT_VERSION = 'sme-chat-v3'  # Bump whenever the chat prompt changes
+SUMMARY_REFRESH_MODE = os.environ.get('SUMMARY_REFRESH_MODE', 'async')  # async (self-invoke) | inline (local testing) | off
+STREAM_FLUSH_CHARS = int(os.environ.get('STREAM_FLUSH_CHARS', '40'))  # Buffered characters that trigger a WebSocket frame
+STREAM_FLUSH_INTERVAL = float(os.environ.get('STREAM_FLUSH_INTERVAL', '0.1'))  # Seconds; upper bound on buffering delay
 
-# In-memory conversation storage (in production, use DynamoDB or similar)
-conversation_history = {}
+# Conversation history: bounded per-container cache over DynamoDB
+conversations = conversation_store.create_conversation_store()
+# Rendered grant contexts, cached per container (prepare_grant_context is defined below)
+grant_contexts = grant_context.GrantContextLoader(render=lambda grant: prepare_grant_context(grant))
+summary_refreshes_requested = set()  # (conversation_id, through_seq) already requested by this container
 
 
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """Create a standardized API Gateway response"""
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body)
     return {
         'statusCode': status_code,
         'headers': {
@@ -32,53 +50,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Methods': 'POST,OPTIONS,GET',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body)
-    }
-
-def get_hardcoded_grant_data() -> Dict[str, Any]:
-    """Return hardcoded grant data"""
-    return {
-        "grant_id": "3bbf836b-78e1-4e26-b5a6-eb3672c16fc5",
-        "amount_max": 2500000,
-        "amount_min": 500000,
-        "country": "Malaysia",
-        "created_at": "2025-09-21T10:56:48.471261",
-        "deadline": "2025-09-30",
-        "document_s3_key": "grants/innovation-foundation-001/3bbf836b-78e1-4e26-b5a6-eb3672c16fc5/original.pdf",
-        "eligibility_rules": [
-            {
-                "key": "company_type",
-                "value": "Malaysian-incorporated SMEs or startups with minimum 51% Malaysian ownership"
-            },
-            {
-                "key": "technology_level",
-                "value": "Minimum TRL 4-6 for R&D, TRL 6-8 for scaling"
-            },
-            {
-                "key": "business_age",
-                "value": "Minimum 1 year of operations"
-            },
-            {
-                "key": "co-funding_requirement",
-                "value": "Minimum 20% of project cost"
-            }
-        ],
-        "issuer": "innovation-foundation-001",
-        "required_documents": [
-            "Technology Readiness Assessment",
-            "Comprehensive Business Plan"
-        ],
-        "sector_tags": [
-            "Information & Communication Technology (ICT)",
-            "Software & App Development",
-            "Fintech",
-            "Healthcare Services",
-            "Education & Training",
-            "Creative & Media"
-        ],
-        "status": "open",
-        "title": "MDEC Digital Innovation Fund",
-        "updated_at": "2025-09-21T10:56:48.471273"
+        'body': response_body
     }
 
 def convert_markdown_to_plain_text(text: str) -> str:
@@ -117,6 +89,108 @@ def convert_markdown_to_plain_text(text: str) -> str:
     
     return text
 
+# Same inline rules as convert_markdown_to_plain_text, applied per segment
+INLINE_MARKDOWN = [
+    (re.compile(r'\*\*(.*?)\*\*'), r'\1'),
+    (re.compile(r'\*(.*?)\*'), r'\1'),
+    (re.compile(r'__(.*?)__'), r'\1'),
+    (re.compile(r'_(.*?)_'), r'\1'),
+    (re.compile(r'`([^`]+)`'), r'\1'),
+    (re.compile(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),
+]
+LINE_PREFIX = re.compile(r'^\s*(?:#{1,6}\s+|[-*+]\s+|\d+\.\s+)?')
+HORIZONTAL_RULE = re.compile(r'^(?:---+|\*\*\*+)$')
+
+class MarkdownStreamStripper:
+    """
+    Incremental convert_markdown_to_plain_text for streamed text
+
+    feed() returns the plain text that is safe to send so far. Text is held
+    back only while a line prefix (header, list marker) or an inline marker
+    (**, _, `, [..](..)) is still open, so words go out as they arrive
+    rather than once the whole reply is done. finish() flushes the rest.
+    """
+
+    def __init__(self):
+        self.pending = ''  # Unsent text of the current line
+        self.line_started = False  # Line prefix already stripped
+        self.in_code_block = False
+        self.newlines = 0  # Line breaks since the last text
+        self.emitted_any = False
+
+    def feed(self, text: str) -> str:
+        self.pending += text
+        output = []
+        while '\n' in self.pending:
+            line, self.pending = self.pending.split('\n', 1)
+            output.append(self._finish_line(line))
+            self.line_started = False
+        output.append(self._flush_safe_prefix())
+        return ''.join(output)
+
+    def finish(self) -> str:
+        text = self._finish_line(self.pending)
+        self.pending = ''
+        return text
+
+    def _emit(self, text: str) -> str:
+        if not text:
+            return ''
+        # convert_markdown_to_plain_text ends up dropping blank lines too
+        prefix = '\n' if self.newlines and self.emitted_any else ''
+        self.newlines = 0
+        self.emitted_any = True
+        return prefix + text
+
+    def _finish_line(self, line: str) -> str:
+        if line.strip().startswith('```'):
+            if line.strip().count('```') == 1:
+                self.in_code_block = not self.in_code_block
+            return ''
+        if self.in_code_block:
+            return ''
+        if not self.line_started:
+            if HORIZONTAL_RULE.match(line.strip()):
+                line = ''
+            line = LINE_PREFIX.sub('', line, count=1)
+        text = self._emit(strip_inline_markdown(line.rstrip()))
+        self.newlines += 1
+        return text
+
+    def _flush_safe_prefix(self) -> str:
+        if self.in_code_block or not self.pending:
+            return ''
+        if not self.line_started:
+            # Wait until the first token is complete: "-" may become "---" or "- "
+            stripped = self.pending.lstrip()
+            if not stripped or not re.search(r'\s', stripped) or stripped.startswith('`'):
+                return ''
+            self.pending = LINE_PREFIX.sub('', self.pending, count=1)
+            self.line_started = True
+
+        cut = max(self.pending.rfind(' '), self.pending.rfind('\t'))
+        if cut <= 0:
+            return ''
+        segment = self.pending[:cut]
+        if not segment.strip() or not markers_balanced(segment):
+            return ''
+        # The cut whitespace stays at the front of the remainder so words stay separated
+        self.pending = self.pending[cut:]
+        return self._emit(strip_inline_markdown(segment))
+
+def strip_inline_markdown(text: str) -> str:
+    for pattern, replacement in INLINE_MARKDOWN:
+        text = pattern.sub(replacement, text)
+    return text
+
+def markers_balanced(text: str) -> bool:
+    """Whether no bold, italic, code or link marker is left open"""
+    without_bold = text.replace('**', '').replace('__', '')
+    return (text.count('**') % 2 == 0 and text.count('__') % 2 == 0
+            and without_bold.count('*') % 2 == 0 and without_bold.count('_') % 2 == 0
+            and text.count('`') % 2 == 0
+            and text.count('[') == text.count(']') and text.count('(') == text.count(')'))
+
 def convert_json_to_plain_text(data) -> str:
     """Convert JSON response to plain text"""
     if isinstance(data, str):
@@ -166,21 +240,11 @@ def convert_json_to_plain_text(data) -> str:
 
 def get_conversation_history(conversation_id: str) -> list:
     """Get conversation history for a given conversation ID"""
-    return conversation_history.get(conversation_id, [])
+    return conversations.get_history(conversation_id)
 
 def add_to_conversation_history(conversation_id: str, role: str, content: str):
     """Add a message to conversation history"""
-    if conversation_id not in conversation_history:
-        conversation_history[conversation_id] = []
-    
-    conversation_history[conversation_id].append({
-        "role": role,
-        "content": content
-    })
-    
-    # Keep only last 20 messages to prevent memory issues
-    if len(conversation_history[conversation_id]) > 20:
-        conversation_history[conversation_id] = conversation_history[conversation_id][-20:]
+    conversations.append(conversation_id, role, content)
 
 def prepare_grant_context(grant_data: Dict[str, Any]) -> str:
     """Prepare grant context for the AI"""
@@ -196,6 +260,10 @@ def prepare_grant_context(grant_data: Dict[str, Any]) -> str:
         # Format required documents
         documents = ", ".join(grant_data.get('required_documents', []))
         
+        # Free-text description, when the grant has one
+        description = grant_data.get('description')
+        description_text = f"\nDESCRIPTION:\n{description}\n" if description else ""
+        
         context = f"""
 GRANT DETAILS:
 Title: {grant_data.get('title', 'N/A')}
@@ -219,24 +287,7 @@ ELIGIBILITY REQUIREMENTS:
 
 REQUIRED DOCUMENTS:
 {documents}
-
-DESCRIPTION:
-This is a comprehensive digital innovation fund designed to support Malaysian SMEs and startups in developing cutting-edge technology solutions. The fund focuses on companies with strong technological readiness and innovative business models across various sectors including ICT, fintech, healthcare, education, and creative industries.
-
-KEY BENEFITS:
-• Substantial funding support (RM 500K - RM 2.5M)
-• Focus on technology readiness levels 4-8
-• Support for both R&D and scaling phases
-• Government backing through MDEC
-• Comprehensive support for Malaysian tech ecosystem
-
-APPLICATION PROCESS:
-1. Submit Technology Readiness Assessment
-2. Provide comprehensive business plan
-3. Demonstrate minimum 20% co-funding capability
-4. Meet Malaysian ownership requirements
-5. Show minimum 1 year operational history
-"""
+{description_text}"""
         
         logger.info(f"Prepared grant context for: {grant_data.get('title', 'Unknown')}")
         return context.strip()
@@ -245,24 +296,42 @@ APPLICATION PROCESS:
         logger.error(f"Error preparing grant context: {str(e)}")
         return f"Grant: {grant_data.get('title', 'Unknown')}"
 
-def generate_ai_response(message: str, grant_context: str, conversation_id: str = None) -> str:
-    """Generate AI response using Bedrock"""
-    try:
-        # Get conversation history
-        history = get_conversation_history(conversation_id) if conversation_id else []
-        
-        # Build conversation context
-        conversation_context = ""
-        if history:
-            conversation_context = "\n\nPREVIOUS CONVERSATION:\n"
-            for msg in history[-10:]:  # Include last 10 messages
-                role = "User" if msg["role"] == "user" else "Assistant"
-                # Convert content to plain text if it's a dict/object
-                content = convert_json_to_plain_text(msg['content'])
-                conversation_context += f"{role}: {content}\n"
-        
-        # Create the prompt for the AI
-        prompt = f"""You are a helpful AI assistant specialized in helping SMEs understand grant opportunities. You have access to detailed information about a specific grant and should provide professional, accurate, and helpful responses.
+NO_GRANT_CONTEXT = "GRANT DETAILS:\nNo specific grant was selected for this conversation."
+
+def load_grant_context(grant_id: Optional[str]) -> Optional[str]:
+    """
+    Rendered context for the grant a message is about; None if it doesn't exist
+    """
+    if not grant_id:
+        logger.warning("No grant_id in request, answering without grant details")
+        return NO_GRANT_CONTEXT
+    return grant_contexts.get_context(grant_id)
+
+def build_chat_request(message: str, grant_context: str, conversation_id: str = None) -> Dict[str, Any]:
+    """Build the Bedrock request body for a chat turn"""
+    # Get conversation history: the newest turns verbatim within the token
+    # budget, older ones through the running summary
+    history = get_conversation_history(conversation_id) if conversation_id else []
+    summary = conversations.get_summary(conversation_id) if history else None
+    selected = chat_context.select_history(history, summary, chat_context.history_budget(grant_context, message))
+    if selected['refresh_through_seq']:
+        request_summary_refresh(conversation_id, selected['refresh_through_seq'])
+    metrics.record_count('prompt_history_messages', len(selected['messages']))
+    
+    # Build conversation context
+    conversation_context = ""
+    if selected['summary']:
+        conversation_context += f"\n\nEARLIER IN THIS CONVERSATION (SUMMARY):\n{selected['summary']}"
+    if selected['messages']:
+        conversation_context += "\n\nPREVIOUS CONVERSATION:\n"
+        for msg in selected['messages']:
+            role = "User" if msg["role"] == "user" else "Assistant"
+            # Convert content to plain text if it's a dict/object
+            content = convert_json_to_plain_text(msg['content'])
+            conversation_context += f"{role}: {content}\n"
+    
+    # Create the prompt for the AI
+    prompt = f"""You are a helpful AI assistant specialized in helping SMEs understand grant opportunities. You have access to detailed information about a specific grant and should provide professional, accurate, and helpful responses.
 
 {grant_context}{conversation_context}
 
@@ -280,88 +349,302 @@ USER MESSAGE: {message}
 
 RESPONSE:"""
 
-        # Prepare the request for Bedrock (Nova Premier model format)
-        body = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ]
-        }
+    metrics.record_count('prompt_tokens_estimated', chat_context.estimate_tokens(prompt))
 
-        logger.info(f"Using Bedrock model: {BEDROCK_MODEL_ID} in region: {BEDROCK_REGION}")
+    # Prepare the request for Bedrock (Nova Premier model format)
+    body = {
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "text": prompt
+                    }
+                ]
+            }
+        ]
+    }
+    return body
 
-        # Call Bedrock
-        response = bedrock.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(body),
-            contentType="application/json"
+def request_summary_refresh(conversation_id: str, through_seq: int):
+    """
+    Ask for the running summary to be extended through through_seq
+
+    The refresh runs in a separate asynchronous invocation of this function
+    so it never adds latency to the chat turn.
+    """
+    if SUMMARY_REFRESH_MODE == 'off' or (conversation_id, through_seq) in summary_refreshes_requested:
+        return
+    if len(summary_refreshes_requested) > 1000:
+        summary_refreshes_requested.clear()
+    summary_refreshes_requested.add((conversation_id, through_seq))
+    
+    if SUMMARY_REFRESH_MODE == 'inline':
+        refresh_conversation_summary(conversation_id, through_seq)
+        return
+    
+    try:
+        lambda_client.invoke(
+            FunctionName=os.environ['AWS_LAMBDA_FUNCTION_NAME'],
+            InvocationType='Event',
+            Payload=json.dumps({
+                'action': 'summarize_conversation',
+                'conversation_id': conversation_id,
+                'through_seq': through_seq
+            }).encode('utf-8')
         )
+        metrics.record_count('summary_refreshes_requested')
+    except Exception as e:
+        # The next turn asks again; the chat reply is unaffected
+        summary_refreshes_requested.discard((conversation_id, through_seq))
+        logger.warning(f"Could not request summary refresh for {conversation_id}: {str(e)}")
 
-        # Parse the response
-        response_body = json.loads(response['body'].read())
-        logger.info(f"Raw response body: {json.dumps(response_body, indent=2)}")
-        
-        # Handle different response formats for different models
-        if 'content' in response_body and len(response_body['content']) > 0:
-            # Claude format
-            if isinstance(response_body['content'][0], dict) and 'text' in response_body['content'][0]:
-                ai_response = response_body['content'][0]['text']
-            else:
-                ai_response = str(response_body['content'][0])
-        elif 'output' in response_body:
-            # Nova Premier format
-            if 'message' in response_body['output']:
-                ai_response = response_body['output']['message']
-            elif 'content' in response_body['output']:
-                ai_response = response_body['output']['content']
-            else:
-                ai_response = str(response_body['output'])
-        elif 'completion' in response_body:
-            # Alternative format
-            ai_response = response_body['completion']
-        elif 'text' in response_body:
-            # Direct text response
-            ai_response = response_body['text']
+def refresh_conversation_summary(conversation_id: str, through_seq: int) -> bool:
+    """
+    Fold messages up to through_seq into the stored running summary
+    """
+    summary = conversations.get_summary(conversation_id)
+    covered_through = summary['through_seq'] if summary else 0
+    if covered_through >= through_seq:
+        return False
+    
+    messages = conversations.get_messages(conversation_id, covered_through, through_seq)
+    if not messages:
+        return False
+    
+    prompt = chat_context.build_summary_prompt(summary['summary'] if summary else None, messages)
+    body = {"messages": [{"role": "user", "content": [{"text": prompt}]}]}
+    with metrics.stage('summarize'):
+        response_body = bedrock_cache.invoke_model_cached(bedrock, BEDROCK_MODEL_ID, body, f"{PROMPT_VERSION}-summary")
+    new_summary = convert_markdown_to_plain_text(convert_json_to_plain_text(extract_response_text(response_body)))
+    
+    stored = conversations.put_summary(conversation_id, new_summary, through_seq)
+    logger.info(f"Summary of {conversation_id} through message {through_seq} {'stored' if stored else 'superseded'}")
+    return stored
+
+def extract_response_text(response_body: Dict[str, Any]) -> str:
+    """Pull the reply text out of a Bedrock response body"""
+    # Handle different response formats for different models
+    if 'content' in response_body and len(response_body['content']) > 0:
+        # Claude format
+        if isinstance(response_body['content'][0], dict) and 'text' in response_body['content'][0]:
+            ai_response = response_body['content'][0]['text']
         else:
-            # Fallback - try to extract text from any available field
-            logger.warning(f"Unknown response format: {response_body}")
-            ai_response = str(response_body)
-        
-        # Ensure we have a string response, not an object
-        if isinstance(ai_response, dict):
-            logger.info(f"AI response is dict, converting: {ai_response}")
-            ai_response = convert_json_to_plain_text(ai_response)
-        elif not isinstance(ai_response, str):
-            logger.info(f"AI response is not string, converting: {ai_response}")
-            ai_response = str(ai_response)
+            ai_response = str(response_body['content'][0])
+    elif 'output' in response_body:
+        # Nova Premier format
+        if 'message' in response_body['output']:
+            ai_response = response_body['output']['message']
+        elif 'content' in response_body['output']:
+            ai_response = response_body['output']['content']
+        else:
+            ai_response = str(response_body['output'])
+    elif 'completion' in response_body:
+        # Alternative format
+        ai_response = response_body['completion']
+    elif 'text' in response_body:
+        # Direct text response
+        ai_response = response_body['text']
+    else:
+        # Fallback - try to extract text from any available field
+        logger.warning("Unknown response format: %s", Payload(response_body))
+        ai_response = str(response_body)
+    
+    # Ensure we have a string response, not an object
+    if isinstance(ai_response, dict):
+        logger.debug("AI response is dict, converting: %s", Payload(ai_response))
+        ai_response = convert_json_to_plain_text(ai_response)
+    elif not isinstance(ai_response, str):
+        logger.debug("AI response is not string, converting: %s", Payload(ai_response))
+        ai_response = str(ai_response)
+
+    return ai_response
 
-        logger.info(f"AI response after initial conversion: {ai_response}")
-        logger.info(f"AI response type: {type(ai_response)}")
+def generate_ai_response(message: str, grant_context: str, conversation_id: str = None) -> str:
+    """Generate AI response using Bedrock"""
+    try:
+        body = build_chat_request(message, grant_context, conversation_id)
+
+        logger.info(f"Using Bedrock model: {BEDROCK_MODEL_ID} in region: {BEDROCK_REGION}")
+
+        # Call Bedrock; the prompt embeds the history, so only identical turns (retries) hit the cache
+        response_body = bedrock_cache.invoke_model_cached(bedrock, BEDROCK_MODEL_ID, body, PROMPT_VERSION)
+        logger.debug("Raw response body: %s", Payload(response_body))
+        
+        ai_response = extract_response_text(response_body)
+        logger.debug("AI response after initial conversion: %s", Payload(ai_response))
 
         # Convert JSON/object to plain text first, then markdown to plain text
         plain_text_response = convert_json_to_plain_text(ai_response)
         plain_text_response = convert_markdown_to_plain_text(plain_text_response)
         
-        logger.info(f"Final plain text response: {plain_text_response}")
+        logger.debug("Final plain text response: %s", Payload(plain_text_response))
         return plain_text_response
 
     except Exception as e:
         logger.error(f"Error generating AI response: {str(e)}")
         raise e
 
+def extract_stream_text(chunk: Dict[str, Any]) -> str:
+    """Text delta carried by one response-stream chunk (Nova, Claude or legacy completion format)"""
+    if 'contentBlockDelta' in chunk:
+        # Nova
+        return chunk['contentBlockDelta'].get('delta', {}).get('text', '')
+    if chunk.get('type') == 'content_block_delta':
+        # Claude messages API
+        return chunk.get('delta', {}).get('text', '')
+    if 'completion' in chunk:
+        return chunk['completion'] or ''
+    return ''
+
+def stream_ai_response(message: str, grant_context: str, conversation_id: str, send) -> str:
+    """
+    Generate an AI response with invoke_model_with_response_stream
+
+    Plain text is passed to send() as it is produced, coalesced into frames
+    of about STREAM_FLUSH_CHARS characters or STREAM_FLUSH_INTERVAL seconds.
+    Returns the full plain-text response.
+    """
+    body = build_chat_request(message, grant_context, conversation_id)
+    stripper = MarkdownStreamStripper()
+    response_parts = []
+    buffer = ''
+    started = time.perf_counter()
+    last_sent = started
+    first_token = True
+    
+    with metrics.stage('bedrock_stream'):
+        response = bedrock.invoke_model_with_response_stream(
+            modelId=BEDROCK_MODEL_ID,
+            body=json.dumps(body),
+            contentType='application/json',
+            accept='application/json'
+        )
+        
+        for event in response['body']:
+            if 'chunk' not in event:
+                # Modeled stream errors (throttling, validation) arrive as events
+                raise RuntimeError(f"Bedrock stream error: {json.dumps(event, default=str)}")
+            chunk = json.loads(event['chunk']['bytes'])
+            
+            usage = chunk.get('amazon-bedrock-invocationMetrics')
+            if usage:
+                metrics.record_bedrock_usage({'usage': {
+                    'input_tokens': usage.get('inputTokenCount'),
+                    'output_tokens': usage.get('outputTokenCount')
+                }})
+            
+            text = stripper.feed(extract_stream_text(chunk))
+            if not text:
+                continue
+            response_parts.append(text)
+            buffer += text
+            
+            now = time.perf_counter()
+            if first_token or len(buffer) >= STREAM_FLUSH_CHARS or now - last_sent >= STREAM_FLUSH_INTERVAL:
+                if first_token:
+                    metrics.record_stage('time_to_first_token', (now - started) * 1000)
+                    first_token = False
+                send(buffer)
+                buffer = ''
+                last_sent = now
+        
+        text = stripper.finish()
+        response_parts.append(text)
+        buffer += text
+        if buffer:
+            send(buffer)
+    
+    plain_text_response = ''.join(response_parts)
+    logger.debug("Final streamed response: %s", Payload(plain_text_response))
+    return plain_text_response
+
+def is_websocket_event(event: Dict[str, Any]) -> bool:
+    """Check whether the event comes from an API Gateway WebSocket API"""
+    return bool(event.get('requestContext', {}).get('connectionId'))
+
+def handle_websocket_message(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Stream a chat reply over an API Gateway WebSocket connection
+
+    The client sends {"action": "sendMessage", "message", "grant_id",
+    "conversation_id"} and receives "chunk" frames followed by one "done"
+    (or "error") frame. The user message and the reply are added to the
+    conversation history only once the stream has completed.
+    """
+    request_context = event['requestContext']
+    route_key = request_context.get('routeKey')
+    if route_key in ('$connect', '$disconnect'):
+        return {'statusCode': 200}
+    
+    connection_id = request_context['connectionId']
+    management_api = aws_clients.client(
+        'apigatewaymanagementapi',
+        endpoint_url=f"https://{request_context['domainName']}/{request_context['stage']}"
+    )
+    
+    def post(payload: Dict[str, Any]):
+        with metrics.stage('websocket_post'):
+            management_api.post_to_connection(ConnectionId=connection_id, Data=json.dumps(payload).encode('utf-8'))
+    
+    try:
+        body = json.loads(event.get('body') or '{}')
+    except json.JSONDecodeError:
+        post({'type': 'error', 'error': 'Invalid JSON in message'})
+        return {'statusCode': 400}
+    
+    message = body.get('message', '')
+    conversation_id = body.get('conversation_id') or \
+        f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{context.aws_request_id[:8]}"
+    logger.info(f"Streaming reply for conversation {conversation_id} on connection {connection_id}")
+    
+    grant_context_text = load_grant_context(body.get('grant_id'))
+    if grant_context_text is None:
+        post({'type': 'error', 'conversation_id': conversation_id, 'error': 'Grant not found'})
+        return {'statusCode': 404}
+    
+    try:
+        full_response = stream_ai_response(
+            message, grant_context_text, conversation_id,
+            lambda text: post({'type': 'chunk', 'conversation_id': conversation_id, 'text': text})
+        )
+    except management_api.exceptions.GoneException:
+        # Client disconnected mid-stream; nothing is committed
+        logger.info(f"Connection {connection_id} closed during streaming")
+        return {'statusCode': 200}
+    except Exception as e:
+        logger.error(f"Error streaming AI response: {str(e)}")
+        post({'type': 'error', 'conversation_id': conversation_id, 'error': 'Internal server error'})
+        return {'statusCode': 500}
+    
+    add_to_conversation_history(conversation_id, "user", message)
+    add_to_conversation_history(conversation_id, "assistant", full_response)
+    
+    post({
+        'type': 'done',
+        'conversation_id': conversation_id,
+        'message': full_response,
+        'timestamp': datetime.now().isoformat()
+    })
+    return {'statusCode': 200}
+
+@metrics.instrument_handler
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     SME Chat Lambda function that provides AI assistance for grant-related questions
     """
     try:
         # Log the incoming event for debugging
-        logger.info(f"Received event: {json.dumps(event, default=str)}")
+        logger.debug("Received event: %s", Payload(event))
+        
+        # Asynchronous summary refresh requested by an earlier turn
+        if event.get('action') == 'summarize_conversation':
+            stored = refresh_conversation_summary(event['conversation_id'], int(event['through_seq']))
+            return {'statusCode': 200, 'summary_stored': stored}
+        
+        # Streaming replies over the WebSocket API
+        if is_websocket_event(event):
+            return handle_websocket_message(event, context)
         
         # Handle CORS preflight requests
         if event.get('httpMethod') == 'OPTIONS':
@@ -390,12 +673,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.info(f"Grant ID: {grant_id}")
         logger.info(f"Conversation ID: {conversation_id}")
 
-        # Use hardcoded grant data instead of fetching from DynamoDB
-        grant_details = get_hardcoded_grant_data()
-        logger.info(f"Using hardcoded grant: {grant_details.get('title', 'Unknown')}")
-
-        # Prepare the context for the AI
-        grant_context = prepare_grant_context(grant_details)
+        # Grant context from DynamoDB, cached per container
+        grant_context_text = load_grant_context(grant_id)
+        if grant_context_text is None:
+            return create_response(404, {'error': 'Grant not found', 'grant_id': grant_id})
 
         # Generate conversation ID if not provided
         if not conversation_id:
@@ -405,7 +686,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         add_to_conversation_history(conversation_id, "user", message)
 
         # Generate AI response
-        ai_response = generate_ai_response(message, grant_context, conversation_id)
+        ai_response = generate_ai_response(message, grant_context_text, conversation_id)
 
         # Ensure the response is plain text (convert any remaining JSON/objects)
         final_response = convert_json_to_plain_text(ai_response)
@@ -1,12 +1,16 @@
 import json
-import boto3
 import os
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import logging
-from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 from decimal import Decimal
+import aws_clients
+import cursors
+import metrics
+from grant_counters import GrantCounters
+from grants_repository import GrantsRepository, GRANT_STATUSES
+from log_utils import Payload
 
 # Configure logging
 logger = logging.getLogger()
@@ -14,10 +18,19 @@ logger.setLevel(logging.INFO)
 
 # Environment variables
 GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', '100'))  # Largest page a request may ask for
+LISTING_FIELDS = [
+    'grant_id', 'title', 'issuer', 'country', 'deadline', 'amount_min', 'amount_max', 'sector_tags',
+    'eligibility_rules', 'required_documents', 'created_at', 'updated_at', 'status'
+]
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
+dynamodb = aws_clients.lazy_resource('dynamodb')
+grants_repository = GrantsRepository()
+grant_counters = GrantCounters()
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for fetching all available grants for SME dashboard
@@ -28,7 +41,7 @@ def lambda_handler(event, context):
         return create_response(200, {'message': 'CORS preflight successful'})
     
     try:
-        logger.info(f"Received event: {json.dumps(event, default=str)}")
+        logger.debug("Received event: %s", Payload(event))
         
         # Parse query parameters
         query_params = event.get('queryStringParameters') or {}
@@ -36,16 +49,26 @@ def lambda_handler(event, context):
         
         # Optional filters
         status = query_params.get('status', None)  # No default filter
-        limit = int(query_params.get('limit', 100))  # Higher default limit
-        offset = int(query_params.get('offset', 0))  # For pagination
+        limit = min(max(int(query_params.get('limit', 100)), 1), MAX_PAGE_LIMIT)
+        cursor = query_params.get('cursor')  # next_cursor from the previous page
+        if 'offset' in query_params:
+            logger.warning("offset is no longer supported; pass the previous page's next_cursor as cursor")
         
-        logger.info(f"Fetching grants with status: {status}, limit: {limit}, offset: {offset}")
+        try:
+            positions = read_cursor(cursor, status)
+        except ValueError as e:
+            return create_response(400, {'error': 'Invalid cursor', 'message': str(e)})
         
-        # Get grants from database
-        grants = get_grants_from_database(status, limit, offset)
+        logger.info(f"Fetching grants with status: {status}, limit: {limit}, continuing: {cursor is not None}")
+        
+        # Get one page of grants from the status index
+        with metrics.stage('fetch_grants'):
+            grants, next_positions = get_grants_from_database(status, limit, positions)
+        next_cursor = cursors.encode_cursor({'status': status, 'positions': next_positions}) if next_positions else None
         
         # Get total count for pagination
-        total_count = get_total_grants_count(status)
+        with metrics.stage('count_grants'):
+            total_count = get_total_grants_count(status)
         
         logger.info(f"Retrieved {len(grants)} grants out of {total_count} total")
         
@@ -55,12 +78,12 @@ def lambda_handler(event, context):
             'grants': grants,
             'total_count': total_count,
             'returned_count': len(grants),
-            'has_more': (offset + len(grants)) < total_count,
-            'next_offset': offset + len(grants) if (offset + len(grants)) < total_count else None,
+            'has_more': next_cursor is not None,
+            'next_cursor': next_cursor,
             'retrieved_at': datetime.utcnow().isoformat()
         }
         
-        logger.info(f"Response body: {json.dumps(response_body, default=str)}")
+        logger.debug("Response body: %s", Payload(response_body))
         
         # Return the grants
         return create_response(200, response_body)
@@ -72,43 +95,29 @@ def lambda_handler(event, context):
             'message': str(e)
         })
 
-def get_grants_from_database(status: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+def read_cursor(cursor: Optional[str], status: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Index positions carried by a cursor; ValueError if it is invalid or from another listing
+    """
+    if not cursor:
+        return None
+    state = cursors.decode_cursor(cursor)
+    if state.get('status') != status:
+        raise ValueError("Cursor was issued for a different status filter")
+    if not isinstance(state.get('positions'), dict):
+        raise ValueError("Malformed cursor")
+    return state['positions']
+
+def get_grants_from_database(status: str, limit: int,
+                             positions: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
-    Retrieve grants from DynamoDB with optional filtering and pagination
+    Retrieve one page of grants, newest first, and the positions to continue from
     """
     
     try:
-        table = dynamodb.Table(GRANTS_TABLE)
-        
-        # Build filter expression only if status is provided
-        if status:
-            filter_expression = Attr('status').eq(status)
-            response = table.scan(
-                FilterExpression=filter_expression,
-                ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents, created_at, updated_at, status'
-            )
-        else:
-            # No filter - get all grants
-            response = table.scan(
-                ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents, created_at, updated_at, status'
-            )
-        
-        grants = response.get('Items', [])
-        
-        # Handle pagination if needed
-        while 'LastEvaluatedKey' in response and len(grants) < (offset + limit):
-            if status:
-                response = table.scan(
-                    FilterExpression=filter_expression,
-                    ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents, created_at, updated_at, status',
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-            else:
-                response = table.scan(
-                    ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents, created_at, updated_at, status',
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-            grants.extend(response.get('Items', []))
+        # Without a status filter, every status partition is merged by created_at
+        statuses = [status] if status else GRANT_STATUSES
+        grants, next_positions = grants_repository.page_by_statuses(statuses, limit, positions, fields=LISTING_FIELDS)
         
         # Convert Decimal to float for JSON serialization
         for grant in grants:
@@ -116,14 +125,8 @@ def get_grants_from_database(status: str, limit: int, offset: int) -> List[Dict[
                 if key in grant and grant[key] is not None:
                     grant[key] = float(grant[key])
         
-        # Apply pagination
-        paginated_grants = grants[offset:offset + limit]
-        
-        # Sort by created_at (newest first)
-        paginated_grants.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        logger.info(f"Retrieved {len(paginated_grants)} grants after pagination")
-        return paginated_grants
+        logger.info(f"Retrieved {len(grants)} grants, {len(next_positions)} statuses with more")
+        return grants, next_positions
         
     except ClientError as e:
         logger.error(f"DynamoDB error: {str(e)}")
@@ -138,38 +141,16 @@ def get_total_grants_count(status: str) -> int:
     """
     
     try:
-        table = dynamodb.Table(GRANTS_TABLE)
-        
-        # Count items with the specified status
-        if status:
-            response = table.scan(
-                FilterExpression=Attr('status').eq(status),
-                Select='COUNT'
-            )
-            
-            count = response.get('Count', 0)
-            
-            # Handle pagination for count
-            while 'LastEvaluatedKey' in response:
-                response = table.scan(
-                    FilterExpression=Attr('status').eq(status),
-                    Select='COUNT',
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                count += response.get('Count', 0)
+        # Maintained by the grant-counters stream consumer: one GetItem
+        counts = grant_counters.get_counts()
+        if counts is not None:
+            count = counts['by_status'].get(status, 0) if status else counts['total']
+        elif status:
+            logger.warning("Grant counters not initialised; counting the status index")
+            count = grants_repository.count_by_status(status)
         else:
-            # Count all grants
-            response = table.scan(Select='COUNT')
-            
-            count = response.get('Count', 0)
-            
-            # Handle pagination for count
-            while 'LastEvaluatedKey' in response:
-                response = table.scan(
-                    Select='COUNT',
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                count += response.get('Count', 0)
+            logger.warning("Grant counters not initialised; counting with a table scan")
+            count = grants_repository.count_all()
         
         logger.info(f"Total grants with status '{status}': {count}")
         return count
@@ -182,6 +163,8 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create API Gateway response with proper CORS headers
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, default=str)
     return {
         'statusCode': status_code,
         'headers': {
@@ -192,7 +175,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Credentials': 'false',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body, default=str)
+        'body': response_body
     }
 
 # Test function for local development
@@ -205,8 +188,7 @@ def test_local():
         'httpMethod': 'GET',
         'queryStringParameters': {
             'status': 'open',
-            'limit': '10',
-            'offset': '0'
+            'limit': '10'
         }
     }
     
@@ -1,25 +1,41 @@
 import json
-import boto3
 import os
 from datetime import datetime
 from typing import Dict, Any, List
 import logging
-from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
+import bedrock_cache
+import aws_clients
+import grant_catalog
+import grant_embeddings
+import metrics
+from log_utils import Payload
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bedrock = boto3.client('bedrock-runtime')
-
 # Environment variables
 GRANTS_TABLE = os.environ.get('GRANTS_TABLE', 'Grants')
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
 BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')
+PROMPT_VERSION = 'matchmaking-v1'  # Bump whenever the matchmaking prompt changes
+MATCH_CANDIDATES = int(os.environ.get('MATCH_CANDIDATES', '25'))  # Grants retrieved by embedding similarity for Bedrock to rank
+MAX_MATCHES_LIMIT = int(os.environ.get('MAX_MATCHES_LIMIT', '50'))  # Largest max_matches a request may ask for
+
+# Initialize AWS clients (built once per container)
+dynamodb = aws_clients.lazy_resource('dynamodb')
+bedrock = aws_clients.lazy_client('bedrock-runtime', region_name=BEDROCK_REGION)
+embedder = grant_embeddings.create_embedder()
+# Open grants, kept per container and refreshed incrementally
+catalog = grant_catalog.GrantCatalog(fields=[
+    'grant_id', 'title', 'issuer', 'country', 'deadline', 'amount_min', 'amount_max',
+    'sector_tags', 'eligibility_rules', 'required_documents', 'embedding', 'embedding_model'
+])
+candidate_index = {'grants': None, 'index': None}  # Embedding matrix of the current catalog snapshot
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for AI-powered grant matchmaking
@@ -35,18 +51,29 @@ def lambda_handler(event, context):
         # Extract SME goals/description
         sme_goals = body.get('goals', '').strip()
         sme_id = body.get('sme_id')  # Optional for tracking
-        max_matches = body.get('max_matches', 10)
         
         if not sme_goals:
             return create_response(400, {
                 'error': 'Please provide your funding goals and objectives'
             })
         
+        # API Gateway clients often send numbers as strings
+        try:
+            max_matches = min(max(int(body.get('max_matches', 10)), 1), MAX_MATCHES_LIMIT)
+        except (TypeError, ValueError):
+            return create_response(400, {'error': 'max_matches must be an integer'})
+        
         logger.info(f"Processing matchmaking request for SME: {sme_id}")
         logger.info(f"Goals: {sme_goals[:200]}...")
         
-        # Get available grants from database
-        available_grants = get_available_grants()
+        # Explicit invalidation, e.g. by a client that has just published a grant
+        if body.get('refresh_catalog'):
+            catalog.invalidate()
+        
+        # Get available grants from the catalog snapshot
+        with metrics.stage('load_catalog'):
+            available_grants = get_available_grants()
+        metrics.record_count('catalog_grants', len(available_grants))
         logger.info(f"Retrieved {len(available_grants)} grants from database")
         
         if not available_grants:
@@ -58,13 +85,18 @@ def lambda_handler(event, context):
             })
         
         # Log sample grants for debugging
-        logger.info("Sample grants from database:")
-        for i, grant in enumerate(available_grants[:3]):
-            logger.info(f"Grant {i+1}: {grant.get('title', 'No title')} - Status: {grant.get('status', 'No status')} - Sectors: {grant.get('sector_tags', [])}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, grant in enumerate(available_grants[:3]):
+                logger.debug("Sample grant %d: %s - Status: %s - Sectors: %s", i + 1, grant.get('title', 'No title'), grant.get('status', 'No status'), grant.get('sector_tags', []))
+        
+        # Narrow the catalog to the closest grants before the ranking prompt
+        candidates = select_candidates(sme_goals, available_grants, max(MATCH_CANDIDATES, max_matches))
+        metrics.record_count('candidate_grants', len(candidates))
         
         # Use Bedrock to analyze and match grants
-        logger.info("Calling Bedrock for grant analysis...")
-        matches = analyze_grants_with_bedrock(sme_goals, available_grants, max_matches)
+        logger.info(f"Calling Bedrock for grant analysis of {len(candidates)} candidates...")
+        with metrics.stage('analyze_grants'):
+            matches = analyze_grants_with_bedrock(sme_goals, candidates, max_matches)
         logger.info(f"Bedrock returned {len(matches)} matches")
         
         # If Bedrock returns no matches, try enhanced fallback matching
@@ -97,42 +129,50 @@ def lambda_handler(event, context):
 
 def get_available_grants() -> List[Dict[str, Any]]:
     """
-    Retrieve available grants from DynamoDB
+    Retrieve available grants from the container's catalog snapshot
     """
     
     try:
-        table = dynamodb.Table(GRANTS_TABLE)
-        
-        # Scan for open grants (you might want to add GSI for better performance)
-        response = table.scan(
-            FilterExpression=Attr('status').eq('open'),
-            ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents'
-        )
-        
-        grants = response.get('Items', [])
-        
-        # Handle pagination if needed
-        while 'LastEvaluatedKey' in response:
-            response = table.scan(
-                FilterExpression=Attr('status').eq('open'),
-                ProjectionExpression='grant_id, title, issuer, country, deadline, amount_min, amount_max, sector_tags, eligibility_rules, required_documents',
-                ExclusiveStartKey=response['LastEvaluatedKey']
-            )
-            grants.extend(response.get('Items', []))
-        
-        # Convert Decimal to float for JSON serialization
-        for grant in grants:
-            for key in ['amount_min', 'amount_max']:
-                if key in grant and grant[key] is not None:
-                    grant[key] = float(grant[key])
-        
-        logger.info(f"Retrieved {len(grants)} available grants")
+        grants = catalog.get_grants()
+        logger.info(f"Retrieved {len(grants)} available grants (catalog version {catalog.version})")
         return grants
         
     except Exception as e:
         logger.error(f"Error retrieving grants: {str(e)}")
         return []
 
+def get_candidate_index(grants: List[Dict]) -> grant_embeddings.GrantEmbeddingIndex:
+    """
+    Embedding index of the catalog, rebuilt only when the snapshot changes
+    """
+    # The catalog publishes a new list whenever its contents change
+    if candidate_index['grants'] is grants:
+        return candidate_index['index']
+    index = grant_embeddings.GrantEmbeddingIndex.build(grants, embedder)
+    candidate_index.update(grants=grants, index=index)
+    return index
+
+def select_candidates(sme_goals: str, grants: List[Dict], k: int) -> List[Dict[str, Any]]:
+    """
+    The k grants whose embeddings are closest to the SME's goals, best first
+    """
+    
+    if len(grants) <= k:
+        return grants
+    
+    try:
+        with metrics.stage('retrieve_candidates'):
+            ranked = get_candidate_index(grants).top_k(embedder.embed(sme_goals), k)
+        grants_lookup = {grant['grant_id']: grant for grant in grants}
+        logger.info(f"Retrieved {len(ranked)} of {len(grants)} grants, similarity {ranked[-1][1]:.3f} to {ranked[0][1]:.3f}")
+        return [grants_lookup[grant_id] for grant_id, _ in ranked]
+        
+    except Exception as e:
+        # The ranking prompt must stay bounded even without retrieval
+        logger.error(f"Candidate retrieval failed, sending the first {k} grants: {str(e)}")
+        metrics.record_count('retrieval_failures')
+        return grants[:k]
+
 def analyze_grants_with_bedrock(sme_goals: str, grants: List[Dict], max_matches: int = 10) -> List[Dict[str, Any]]:
     """
     Use Bedrock to analyze SME goals against available grants and return matches
@@ -219,7 +259,7 @@ def analyze_grants_with_bedrock(sme_goals: str, grants: List[Dict], max_matches:
         logger.info("Calling Bedrock API...")
         response = call_bedrock(prompt)
         logger.info(f"Bedrock response length: {len(response)} characters")
-        logger.info(f"Bedrock response preview: {response[:200]}...")
+        logger.debug("Bedrock response preview: %s", Payload(response, max_chars=200))
         
         # Parse and validate the response
         logger.info("Parsing Bedrock response...")
@@ -245,9 +285,6 @@ def call_bedrock(prompt: str) -> str:
     """
     
     try:
-        # Initialize bedrock client with correct region
-        bedrock_client = boto3.client('bedrock-runtime', region_name=BEDROCK_REGION)
-        
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 3000,
@@ -260,13 +297,8 @@ def call_bedrock(prompt: str) -> str:
             ]
         }
         
-        response = bedrock_client.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(request_body),
-            contentType='application/json'
-        )
-        
-        response_body = json.loads(response['body'].read())
+        # Repeated goals against an unchanged catalog reuse the previous ranking
+        response_body = bedrock_cache.invoke_model_cached(bedrock, BEDROCK_MODEL_ID, request_body, PROMPT_VERSION)
         return response_body.get('content', [{}])[0].get('text', '[]')
         
     except Exception as e:
@@ -279,7 +311,7 @@ def parse_bedrock_response(bedrock_response: str, original_grants: List[Dict]) -
     """
     
     try:
-        logger.info(f"Parsing Bedrock response: {bedrock_response[:500]}...")
+        logger.debug("Parsing Bedrock response: %s", Payload(bedrock_response))
         
         # Clean the response
         json_text = bedrock_response.strip()
@@ -291,7 +323,7 @@ def parse_bedrock_response(bedrock_response: str, original_grants: List[Dict]) -
             json_text = json_text[:-3]
         json_text = json_text.strip()
         
-        logger.info(f"Cleaned JSON text: {json_text[:200]}...")
+        logger.debug("Cleaned JSON text: %s", Payload(json_text, max_chars=200))
         
         # Parse JSON
         matches = json.loads(json_text)
@@ -361,7 +393,7 @@ def create_fallback_matches(sme_goals: str, grants: List[Dict], max_matches: int
     
     # Simple keyword matching
     goal_words = set(sme_goals.lower().split())
-    logger.info(f"Goal words: {list(goal_words)[:10]}...")
+    logger.debug("Goal words: %s", Payload(sorted(goal_words)[:10]))
     
     scored_grants = []
     for i, grant in enumerate(grants):
@@ -380,7 +412,7 @@ def create_fallback_matches(sme_goals: str, grants: List[Dict], max_matches: int
         if sector_overlap > 0:
             score += sector_overlap * 0.6
         
-        logger.info(f"Grant {i+1}: '{grant['title'][:30]}...' - Title overlap: {title_overlap}, Sector overlap: {sector_overlap}, Score: {score:.2f}")
+        logger.debug("Grant %d: '%.30s' - Title overlap: %s, Sector overlap: %s, Score: %.2f", i + 1, grant['title'], title_overlap, sector_overlap, score)
         
         if score > 0:
             # Calculate more conservative relevance score
@@ -432,7 +464,7 @@ def enhanced_fallback_matching(sme_goals: str, grants: List[Dict], max_matches:
     
     # Extract keywords from SME goals
     goal_words = set(sme_goals.lower().split())
-    logger.info(f"Goal words: {list(goal_words)[:10]}...")
+    logger.debug("Goal words: %s", Payload(sorted(goal_words)[:10]))
     
     # Define sector keyword mappings
     sector_keywords = {
@@ -459,7 +491,7 @@ def enhanced_fallback_matching(sme_goals: str, grants: List[Dict], max_matches:
         sectors = [s.lower() for s in grant.get('sector_tags', [])]
         issuer = grant.get('issuer', '').lower()
         
-        logger.info(f"Grant {i+1}: '{grant.get('title', 'No title')[:30]}...' - Sectors: {sectors}")
+        logger.debug("Grant %d: '%.30s' - Sectors: %s", i + 1, grant.get('title', 'No title'), sectors)
         
         # 1. Direct keyword matching in title
         title_words = set(title.split())
@@ -624,6 +656,8 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create API Gateway response with CORS headers
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, default=str)
     return {
         'statusCode': status_code,
         'headers': {
@@ -634,7 +668,7 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Credentials': 'false',
             'Access-Control-Max-Age': '86400'
         },
-        'body': json.dumps(body, default=str)
+        'body': response_body
     }
 
 def lambda_handler_test():
@@ -1,12 +1,15 @@
 import json
-import boto3
 from botocore.exceptions import ClientError
 from datetime import datetime
+import aws_clients
+import metrics
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
+dynamodb = aws_clients.lazy_resource('dynamodb')
 sme_profiles_table = dynamodb.Table('SMEProfiles')
+aws_clients.prewarm()
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for SME backend operations
@@ -50,7 +53,8 @@ def get_all_sme_profiles():
     """
     try:
         # Scan the entire table
-        response = sme_profiles_table.scan()
+        with metrics.stage('dynamodb_scan'):
+            response = sme_profiles_table.scan()
         
         # Extract items from response
         items = response.get('Items', [])
@@ -96,6 +100,8 @@ def create_response(status_code, body):
     """
     Create a properly formatted HTTP response for API Gateway
     """
+    with metrics.stage('serialize_response'):
+        response_body = json.dumps(body, indent=2)
     return {
         'statusCode': status_code,
         'headers': {
@@ -104,5 +110,5 @@ def create_response(status_code, body):
             'Access-Control-Allow-Headers': 'Content-Type',
             'Access-Control-Allow-Methods': 'GET, OPTIONS'
         },
-        'body': json.dumps(body, indent=2)
+        'body': response_body
     }
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lambda-style imports: shared modules come from the layer, the rest sit next to lambda_function.py
+for directory in ['shared', 'funderBackend/funder-upload', 'smeBackend/sme-chat']:
+    sys.path.insert(0, os.path.join(BACKEND_DIR, directory))
+
+# Offline defaults, set before any module reads its configuration at import
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_PREWARM_CLIENTS', 'false')
+os.environ.setdefault('PAGINATION_CURSOR_SECRET', 'test-cursor-secret')
+
+def load_handler(directory: str, name: str):
+    """
+    Import a function's lambda_function.py under a unique module name
+
+    Every Lambda names its handler module lambda_function, so they cannot all
+    be imported by name. Handlers create boto3 clients at import, so tests
+    using this are skipped where boto3 is not installed.
+    """
+    pytest.importorskip('boto3')
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, directory, 'lambda_function.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
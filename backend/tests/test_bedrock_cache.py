@@ -0,0 +1,103 @@
+import io
+import json
+import time
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import bedrock_cache
+
+class CountingBedrockClient:
+    """Answers invoke_model with a fixed body and counts the calls"""
+
+    def __init__(self, response_body):
+        self.response_body = response_body
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        return {'body': io.BytesIO(json.dumps(self.response_body).encode('utf-8'))}
+
+def test_cache_key_ignores_body_key_order():
+    key = bedrock_cache.make_cache_key('model', {'a': 1, 'b': [1, 2]}, 'v1')
+    assert key == bedrock_cache.make_cache_key('model', {'b': [1, 2], 'a': 1}, 'v1')
+    assert key != bedrock_cache.make_cache_key('model', {'a': 1, 'b': [2, 1]}, 'v1')
+    assert key != bedrock_cache.make_cache_key('model', {'a': 1, 'b': [1, 2]}, 'v2')
+    assert key != bedrock_cache.make_cache_key('other', {'a': 1, 'b': [1, 2]}, 'v1')
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = bedrock_cache.MemoryTier(max_entries=2)
+    expires_at = time.time() + 60
+    tier.put('a', {'n': 1}, expires_at)
+    tier.put('b', {'n': 2}, expires_at)
+    assert tier.get('a') == {'n': 1}  # a is now the most recently used
+    tier.put('c', {'n': 3}, expires_at)
+
+    assert tier.get('b') is None
+    assert tier.get('a') == {'n': 1}
+    assert tier.get('c') == {'n': 3}
+
+def test_memory_tier_drops_expired_entries():
+    tier = bedrock_cache.MemoryTier()
+    tier.put('old', {'n': 1}, time.time() - 1)
+    assert tier.get('old') is None
+    assert 'old' not in tier.entries
+
+def test_file_tier_round_trip_and_expiry(tmp_path):
+    tier = bedrock_cache.FileTier(str(tmp_path))
+    expires_at = time.time() + 60
+    tier.put('key', {'content': 'cached'}, expires_at)
+    assert tier.get('key') == (expires_at, {'content': 'cached'})
+
+    tier.put('stale', {'content': 'old'}, time.time() - 1)
+    assert tier.get('stale') is None
+    assert not (tmp_path / 'stale.json').exists()
+
+def test_persistent_hit_fills_memory_tier(tmp_path):
+    bedrock_cache.FileTier(str(tmp_path)).put('key', {'content': 'cached'}, time.time() + 60)
+
+    # A fresh container: empty memory tier over the shared persistent tier
+    cache = bedrock_cache.BedrockResponseCache(bedrock_cache.FileTier(str(tmp_path)))
+    assert cache.get('key') == {'content': 'cached'}
+    assert cache.get('key') == {'content': 'cached'}
+    assert cache.get('missing') is None
+
+    stats = cache.stats()
+    assert (stats['persistent_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+    assert stats['hit_rate'] == round(2 / 3, 4)
+
+def test_persistent_tier_failures_are_counted_not_raised():
+    class BrokenTier:
+        def get(self, key):
+            raise IOError('unavailable')
+
+        def put(self, key, response_body, expires_at):
+            raise IOError('unavailable')
+
+    cache = bedrock_cache.BedrockResponseCache(BrokenTier())
+    cache.put('key', {'content': 'kept in memory'})
+    assert cache.get('key') == {'content': 'kept in memory'}
+    assert cache.get('other') is None
+    assert cache.stats()['errors'] == 2
+
+def test_invoke_model_cached_calls_bedrock_once():
+    client = CountingBedrockClient({'content': [{'text': 'answer'}], 'stop_reason': 'end_turn'})
+    cache = bedrock_cache.BedrockResponseCache()
+    body = {'messages': [{'role': 'user', 'content': 'question'}]}
+
+    first = bedrock_cache.invoke_model_cached(client, 'model', body, 'v1', cache=cache)
+    second = bedrock_cache.invoke_model_cached(client, 'model', body, 'v1', cache=cache)
+    assert first == second
+    assert client.calls == 1
+
+    bedrock_cache.invoke_model_cached(client, 'model', body, 'v2', cache=cache)
+    assert client.calls == 2  # A new prompt version misses
+
+def test_truncated_responses_are_not_cached():
+    client = CountingBedrockClient({'content': [{'text': 'cut off'}], 'stop_reason': 'max_tokens'})
+    cache = bedrock_cache.BedrockResponseCache()
+    bedrock_cache.invoke_model_cached(client, 'model', {'prompt': 'p'}, 'v1', cache=cache)
+    bedrock_cache.invoke_model_cached(client, 'model', {'prompt': 'p'}, 'v1', cache=cache)
+    assert client.calls == 2
+    assert not bedrock_cache.is_complete_response({'stopReason': 'length'})
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from conftest import load_handler
+
+@pytest.fixture(scope='module')
+def funder_upload():
+    return load_handler('funderBackend/funder-upload', 'funder_upload_handler')
+
+def test_short_text_is_one_chunk(funder_upload):
+    assert funder_upload.split_text_into_chunks('short text', chunk_size=100, overlap=10) == ['short text']
+
+def test_chunks_overlap_and_cover_the_text(funder_upload):
+    text = ''.join(chr(ord('a') + i % 26) for i in range(1000))
+    chunks = funder_upload.split_text_into_chunks(text, chunk_size=300, overlap=50)
+
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous[-50:] == chunk[:50]
+    # Dropping each chunk's overlap reassembles the original
+    assert chunks[0] + ''.join(chunk[50:] for chunk in chunks[1:]) == text
+
+def test_last_chunk_reaches_the_end_without_a_redundant_tail(funder_upload):
+    chunks = funder_upload.split_text_into_chunks('x' * 550, chunk_size=300, overlap=50)
+    assert [len(chunk) for chunk in chunks] == [300, 300]
+
+def test_overlap_not_smaller_than_chunk_still_advances(funder_upload):
+    chunks = funder_upload.split_text_into_chunks('abcdef', chunk_size=2, overlap=5)
+    assert chunks == ['ab', 'bc', 'cd', 'de', 'ef']
+
+def stub_chunk_responses(monkeypatch, funder_upload, responses):
+    """
+    Split the document into one chunk per response and answer each chunk's
+    Bedrock call with that response, as the model's raw JSON text
+    """
+    chunks = [f"chunk-{index}" for index in range(len(responses))]
+    monkeypatch.setattr(funder_upload, 'split_text_into_chunks', lambda text: list(chunks))
+
+    def invoke_model_cached(client, model_id, body, prompt_version, **kwargs):
+        prompt = body['messages'][0]['content']
+        prompt = prompt if isinstance(prompt, str) else prompt[0]['text']
+        index = next(index for index, chunk in enumerate(chunks) if chunk in prompt)
+        return {'content': [{'text': json.dumps(responses[index])}], 'stop_reason': 'end_turn'}
+
+    monkeypatch.setattr(funder_upload.bedrock_cache, 'invoke_model_cached', invoke_model_cached)
+
+def extract(funder_upload, title=None):
+    return funder_upload.extract_grant_info_chunked('whole document', title, 'funder-1', strict=True)
+
+def test_merge_is_deterministic_across_chunks(funder_upload, monkeypatch):
+    stub_chunk_responses(monkeypatch, funder_upload, [
+        {'country': 'Singapore', 'status': 'open', 'deadline': '2025-06-30', 'amount_min': 1000,
+         'amount_max': '$20,000', 'sector_tags': ['fintech', 'Fintech'],
+         'eligibility_rules': [{'key': 'Employees', 'value': 'Under 200'}], 'required_documents': ['Business plan']},
+        {'title': 'Innovation Grant', 'country': 'Malaysia', 'deadline': '31/07/2025', 'amount_min': '500',
+         'sector_tags': ['Fintech', 'E-commerce'], 'eligibility_rules': [{'key': 'employees', 'value': 'under 200'}],
+         'required_documents': ['business plan', 'Financial statements']},
+        {'title': 'Later Title', 'country': 'Malaysia', 'status': 'closed', 'deadline': '2025-06-30',
+         'amount_max': 50000}
+    ])
+    merged = extract(funder_upload)
+
+    assert merged['title'] == 'Innovation Grant'  # First chunk that found one
+    assert merged['issuer'] == 'funder-1'
+    assert merged['country'] == 'Malaysia'  # Most frequent
+    assert merged['status'] == 'open'  # Tie goes to the earliest chunk
+    assert merged['deadline'] == '2025-06-30'  # Tie goes to the earliest chunk
+    assert (merged['amount_min'], merged['amount_max']) == (500.0, 50000.0)
+    assert merged['eligibility_rules'] == [{'key': 'Employees', 'value': 'Under 200'}]
+    assert merged['required_documents'] == ['Business plan', 'Financial statements']
+    # Validated per chunk, so a chunk's invalid spelling does not hide a later valid one
+    assert merged['sector_tags'] == ['Fintech', 'E-commerce']
+
+def test_chunks_that_omit_status_and_title_do_not_outvote_one_that_has_them(funder_upload, monkeypatch):
+    stub_chunk_responses(monkeypatch, funder_upload, [
+        {},
+        {'title': 'Real Grant', 'status': 'closed'},
+        {'country': 'Singapore', 'status': 'unknown'}
+    ])
+    merged = extract(funder_upload, 'Uploaded Title')
+    assert merged['title'] == 'Real Grant'
+    assert merged['status'] == 'closed'
+    assert merged['country'] == 'Singapore'
+
+def test_defaults_apply_only_when_no_chunk_has_the_field(funder_upload, monkeypatch):
+    stub_chunk_responses(monkeypatch, funder_upload, [{}, {'title': '  '}, {'amount_min': 'n/a'}])
+    merged = extract(funder_upload, 'Uploaded Title')
+    assert merged['title'] == 'Uploaded Title'
+    assert merged['status'] == 'open'  # Validation default
+    assert merged['amount_min'] is None and merged['amount_max'] is None
+
+    assert extract(funder_upload)['title'].startswith('Grant Document - ')
+
+def test_failed_chunks_are_skipped(funder_upload, monkeypatch):
+    stub_chunk_responses(monkeypatch, funder_upload, [['not', 'an', 'object'], {'status': 'upcoming'}])
+    assert extract(funder_upload)['status'] == 'upcoming'
@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip('boto3')
+
+import conversation_store
+from conversation_store import BoundedCache, ConversationStore, InMemoryConversationTier
+
+def contents(messages):
+    return [(message['seq'], message['role'], message['content']) for message in messages]
+
+def test_append_and_read_history():
+    store = ConversationStore(InMemoryConversationTier())
+    store.append('conv', 'user', 'Which grants fit a fintech startup?')
+    store.append('conv', 'assistant', 'The Innovation Grant does.')
+
+    assert contents(store.get_history('conv')) == [
+        (1, 'user', 'Which grants fit a fintech startup?'),
+        (2, 'assistant', 'The Innovation Grant does.')
+    ]
+    assert store.get_history('other') == []
+
+def test_history_is_bounded_but_the_tier_keeps_everything():
+    tier = InMemoryConversationTier()
+    store = ConversationStore(tier, history_limit=3)
+    for number in range(1, 6):
+        store.append('conv', 'user', f'message {number}')
+
+    assert [message['seq'] for message in store.get_history('conv')] == [3, 4, 5]
+    assert [message['seq'] for message in store.get_messages('conv', 0, 2)] == [1, 2]
+    # A cold container loads the same newest window from the tier
+    assert store.get_history('conv') == ConversationStore(tier, history_limit=3).get_history('conv')
+
+def test_appends_from_two_containers_do_not_collide():
+    tier = InMemoryConversationTier()
+    first, second = ConversationStore(tier), ConversationStore(tier)
+    first.append('conv', 'user', 'from first')
+    assert len(second.get_history('conv')) == 1  # second now caches seq 1
+
+    first.append('conv', 'assistant', 'first again')
+    second.append('conv', 'user', 'from second')  # Its cached seq is stale; it reloads and retries
+
+    assert contents(ConversationStore(tier).get_history('conv')) == [
+        (1, 'user', 'from first'),
+        (2, 'assistant', 'first again'),
+        (3, 'user', 'from second')
+    ]
+
+def test_summary_only_moves_forward():
+    store = ConversationStore(InMemoryConversationTier())
+    assert store.get_summary('conv') is None
+
+    assert store.put_summary('conv', 'Asked about fintech grants', 4)
+    assert not store.put_summary('conv', 'Older summary', 2)
+    assert store.get_summary('conv') == {'summary': 'Asked about fintech grants', 'through_seq': 4}
+
+def test_bounded_cache_evicts_by_count_and_size():
+    cache = BoundedCache(max_entries=2, max_bytes=1000, ttl_seconds=60)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'x' * 10)
+    cache.get('a')
+    cache.put('c', 'x' * 10)
+    assert cache.get('b') is None  # Least recently used
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+    cache.put('big', 'x' * 900)
+    assert cache.total_bytes <= 1000
+    assert cache.get('big') is not None
+
+    cache.put('huge', 'x' * 2000)
+    assert cache.get('huge') is None  # Larger than the whole cache
+
+def test_bounded_cache_expires_entries():
+    cache = BoundedCache(ttl_seconds=0)
+    cache.put('key', 'value')
+    assert cache.get('key') is None
+    assert cache.total_bytes == 0
+
+def test_local_backend_uses_the_in_memory_tier():
+    store = conversation_store.create_conversation_store('local')
+    assert isinstance(store.tier, InMemoryConversationTier)
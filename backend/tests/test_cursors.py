@@ -0,0 +1,63 @@
+import os
+import importlib.util
+from decimal import Decimal
+
+import pytest
+
+import cursors
+from conftest import BACKEND_DIR, load_handler
+
+def tamper(text):
+    # Flip one base64url character so the bytes change but still decode
+    return ('B' if text[0] == 'A' else 'A') + text[1:]
+
+def test_round_trip():
+    state = {'status': 'open', 'positions': {'grant_id': 'g-1', 'created_at': '2025-01-01T00:00:00'}}
+    assert cursors.decode_cursor(cursors.encode_cursor(state)) == state
+
+def test_decimal_keys_are_encoded():
+    state = cursors.decode_cursor(cursors.encode_cursor({'count': Decimal('3'), 'score': Decimal('0.5')}))
+    assert state == {'count': 3, 'score': '0.5'}
+
+def test_tampered_payload_is_rejected():
+    payload, signature = cursors.encode_cursor({'status': 'open'}).split('.')
+    with pytest.raises(ValueError, match='signature'):
+        cursors.decode_cursor(f"{tamper(payload)}.{signature}")
+
+def test_tampered_signature_is_rejected():
+    payload, signature = cursors.encode_cursor({'status': 'open'}).split('.')
+    with pytest.raises(ValueError, match='signature'):
+        cursors.decode_cursor(f"{payload}.{tamper(signature)}")
+
+def test_cursor_signed_with_another_secret_is_rejected():
+    payload = b'{"status":"open"}'
+    signature = cursors.hmac.new(b'other-secret', payload, cursors.hashlib.sha256).digest()
+    with pytest.raises(ValueError, match='signature'):
+        cursors.decode_cursor(cursors._b64encode(payload) + '.' + cursors._b64encode(signature))
+
+@pytest.mark.parametrize('cursor', ['', 'no-separator', 'a.b.c', 'abc.!!!'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        cursors.decode_cursor(cursor)
+
+def test_signed_non_object_is_rejected():
+    with pytest.raises(ValueError, match='Malformed'):
+        cursors.decode_cursor(cursors.encode_cursor(['not', 'a', 'dict']))
+
+def test_missing_secret_fails_at_import(monkeypatch):
+    monkeypatch.delenv('PAGINATION_CURSOR_SECRET')
+    spec = importlib.util.spec_from_file_location('cursors_without_secret', os.path.join(BACKEND_DIR, 'shared', 'cursors.py'))
+    with pytest.raises(RuntimeError, match='PAGINATION_CURSOR_SECRET'):
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+
+def test_fetch_grants_rejects_cursor_from_another_listing():
+    fetch_grants = load_handler('smeBackend/sme-fetch-grants', 'sme_fetch_grants_handler')
+    positions = {'open': {'grant_id': 'g-1'}}
+    cursor = cursors.encode_cursor({'status': 'open', 'positions': positions})
+
+    assert fetch_grants.read_cursor(cursor, 'open') == positions
+    assert fetch_grants.read_cursor(None, 'open') is None
+    with pytest.raises(ValueError, match='different status'):
+        fetch_grants.read_cursor(cursor, 'closed')
+    with pytest.raises(ValueError, match='Malformed'):
+        fetch_grants.read_cursor(cursors.encode_cursor({'status': 'open', 'positions': 'g-1'}), 'open')
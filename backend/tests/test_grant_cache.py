@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('boto3')
+
+import grant_cache
+
+RECORD = {'extracted_text': 'Grant text', 'grant_data': {'title': 'Seed Fund', 'amount_max': 5000.0}}
+
+def test_cache_key_changes_with_document_model_and_prompt():
+    key = grant_cache.compute_cache_key(b'%PDF-1', 'model-a', 'v1')
+    assert key == grant_cache.compute_cache_key(b'%PDF-1', 'model-a', 'v1')
+    assert key != grant_cache.compute_cache_key(b'%PDF-2', 'model-a', 'v1')
+    assert key != grant_cache.compute_cache_key(b'%PDF-1', 'model-b', 'v1')
+    assert key != grant_cache.compute_cache_key(b'%PDF-1', 'model-a', 'v2')
+
+def test_local_file_store_round_trip(tmp_path):
+    store = grant_cache.LocalFileGrantCacheStore(str(tmp_path))
+    assert store.get('missing') is None
+
+    store.put('key', RECORD)
+    assert store.get('key') == RECORD
+    assert not list(tmp_path.glob('*.tmp'))  # Written through a temp file and renamed
+
+    # A second store on the same directory sees the record, like a later container
+    assert grant_cache.LocalFileGrantCacheStore(str(tmp_path)).get('key') == RECORD
+
+def test_local_file_store_overwrites(tmp_path):
+    store = grant_cache.LocalFileGrantCacheStore(str(tmp_path))
+    store.put('key', RECORD)
+    store.put('key', {'extracted_text': 'Newer', 'grant_data': {}})
+    assert store.get('key')['extracted_text'] == 'Newer'
+
+def test_null_store_never_hits():
+    store = grant_cache.NullGrantCacheStore()
+    store.put('key', RECORD)
+    assert store.get('key') is None
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        grant_cache.GrantCacheStore()
+
+    class GetOnly(grant_cache.GrantCacheStore):
+        def get(self, cache_key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+def test_create_store_disabled_backends():
+    assert isinstance(grant_cache.create_grant_cache_store('none'), grant_cache.NullGrantCacheStore)
+    assert isinstance(grant_cache.create_grant_cache_store('unknown'), grant_cache.NullGrantCacheStore)
+    assert isinstance(grant_cache.create_grant_cache_store(None), grant_cache.NullGrantCacheStore)
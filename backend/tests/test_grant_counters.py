@@ -0,0 +1,102 @@
+import pytest
+
+pytest.importorskip('boto3')
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+import grant_counters
+
+def image(status=None):
+    return {'grant_id': {'S': 'g-1'}, **({'status': {'S': status}} if status else {})}
+
+def record(event, old=None, new=None, event_id='1'):
+    change = {}
+    if old is not None:
+        change['OldImage'] = old
+    if new is not None:
+        change['NewImage'] = new
+    return {'eventID': event_id, 'eventName': event, 'dynamodb': change}
+
+def test_insert_adds_to_total_and_status():
+    deltas = grant_counters.deltas_from_stream([record('INSERT', new=image('open'))])
+    assert deltas == {'total': 1, 'status_open': 1}
+
+def test_insert_without_status_only_counts_total():
+    assert grant_counters.deltas_from_stream([record('INSERT', new=image())]) == {'total': 1}
+
+def test_remove_subtracts_from_total_and_status():
+    deltas = grant_counters.deltas_from_stream([record('REMOVE', old=image('closed'))])
+    assert deltas == {'total': -1, 'status_closed': -1}
+
+def test_modify_moves_between_statuses():
+    deltas = grant_counters.deltas_from_stream([record('MODIFY', old=image('open'), new=image('closed'))])
+    assert deltas == {'status_open': -1, 'status_closed': 1}
+
+def test_modify_without_status_change_is_a_no_op():
+    assert grant_counters.deltas_from_stream([record('MODIFY', old=image('open'), new=image('open'))]) == {}
+
+def test_batch_deltas_net_out():
+    records = [
+        record('INSERT', new=image('open')),
+        record('MODIFY', old=image('open'), new=image('closed')),
+        record('REMOVE', old=image('closed'))
+    ]
+    assert grant_counters.deltas_from_stream(records) == {}
+
+def test_batch_id_is_stable_and_order_sensitive():
+    first, second = record('INSERT', event_id='a'), record('INSERT', event_id='b')
+    assert grant_counters.batch_id([first, second]) == grant_counters.batch_id([dict(first), dict(second)])
+    assert grant_counters.batch_id([first, second]) != grant_counters.batch_id([second, first])
+
+@pytest.fixture
+def stubbed():
+    table = boto3.resource('dynamodb', region_name='us-east-1').Table('GrantCounters')
+    with Stubber(table.meta.client) as stubber:
+        yield grant_counters.GrantCounters(table), stubber
+        stubber.assert_no_pending_responses()
+
+def transaction(deltas):
+    return {'TransactItems': [
+        {'Put': {'TableName': 'GrantCounters', 'Item': ANY, 'ConditionExpression': 'attribute_not_exists(counter_id)'}},
+        {'Update': {
+            'TableName': 'GrantCounters',
+            'Key': {'counter_id': 'grants'},
+            'UpdateExpression': 'ADD ' + ', '.join(f"#c{i} :c{i}" for i in range(len(deltas))),
+            'ConditionExpression': 'attribute_exists(counter_id)',
+            'ExpressionAttributeNames': {f"#c{i}": name for i, name in enumerate(deltas)},
+            'ExpressionAttributeValues': {f":c{i}": value for i, value in enumerate(deltas.values())}
+        }}
+    ]}
+
+def cancelled(*codes):
+    return {'CancellationReasons': [{'Code': code} for code in codes]}
+
+def test_apply_writes_marker_and_update_in_one_transaction(stubbed):
+    counters, stubber = stubbed
+    deltas = {'total': 1, 'status_open': 1}
+    stubber.add_response('transact_write_items', {}, transaction(deltas))
+    assert counters.apply(deltas, 'b-1') == grant_counters.APPLIED
+
+def test_apply_skips_an_already_applied_batch(stubbed):
+    counters, stubber = stubbed
+    deltas = {'total': 1}
+    stubber.add_client_error('transact_write_items', 'TransactionCanceledException',
+                             expected_params=transaction(deltas),
+                             modeled_fields=cancelled('ConditionalCheckFailed', 'None'))
+    assert counters.apply(deltas, 'b-1') == grant_counters.DUPLICATE
+
+def test_apply_reports_a_missing_counter_item(stubbed):
+    counters, stubber = stubbed
+    deltas = {'total': -1}
+    stubber.add_client_error('transact_write_items', 'TransactionCanceledException',
+                             expected_params=transaction(deltas),
+                             modeled_fields=cancelled('None', 'ConditionalCheckFailed'))
+    assert counters.apply(deltas, 'b-1') == grant_counters.UNINITIALIZED
+
+    stubber.add_client_error('update_item', 'ConditionalCheckFailedException')
+    assert counters.apply(deltas) == grant_counters.UNINITIALIZED
+
+def test_apply_without_deltas_does_not_write(stubbed):
+    counters, _ = stubbed
+    assert counters.apply({}, 'b-1') == grant_counters.APPLIED
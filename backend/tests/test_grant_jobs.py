@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip('boto3')
+
+import grant_jobs
+
+def test_new_job_starts_queued():
+    job = grant_jobs.new_job('grant-1', 'funder-1', None, 'grants/funder-1/grant-1/original.pdf')
+    assert job['status'] == 'queued'
+    assert job['grant_id'] == 'grant-1'
+    assert job['s3_key'] == 'grants/funder-1/grant-1/original.pdf'
+    assert job['created_at'] == job['updated_at']
+    assert job['job_id'] != grant_jobs.new_job('grant-1', 'funder-1', None, 'key')['job_id']
+
+def test_in_memory_store_lifecycle():
+    store = grant_jobs.InMemoryJobStore()
+    job = grant_jobs.new_job('grant-1', 'funder-1', 'Title', 'key')
+    store.create(job)
+
+    store.update(job['job_id'], status='extracting', attempts=1)
+    stored = store.get(job['job_id'])
+    assert stored['status'] == 'extracting'
+    assert stored['attempts'] == 1
+    assert stored['title'] == 'Title'
+    assert stored['updated_at'] >= job['updated_at']
+    assert store.get('unknown') is None
+
+def test_in_memory_store_rejects_duplicate_jobs():
+    store = grant_jobs.InMemoryJobStore()
+    job = grant_jobs.new_job('grant-1', 'funder-1', None, 'key')
+    store.create(job)
+    with pytest.raises(ValueError):
+        store.create(job)
+
+def test_in_memory_store_returns_copies():
+    store = grant_jobs.InMemoryJobStore()
+    job = grant_jobs.new_job('grant-1', 'funder-1', None, 'key')
+    store.create(job)
+    job['status'] = 'completed'
+    store.get(job['job_id'])['status'] = 'failed'
+    assert store.get(job['job_id'])['status'] == 'queued'
+
+def test_local_queue_drains_in_order():
+    handled = []
+    queue = grant_jobs.LocalJobQueue(handled.append)
+    queue.send({'job_id': 'a'})
+    queue.send({'job_id': 'b'})
+    assert handled == []  # Nothing runs until drained, like an unpolled queue
+
+    assert queue.drain() == 2
+    assert handled == [{'job_id': 'a'}, {'job_id': 'b'}]
+    assert queue.drain() == 0
+
+def test_local_queue_runs_messages_sent_while_draining():
+    queue = None
+    handled = []
+
+    def worker(message):
+        handled.append(message['job_id'])
+        if message['job_id'] == 'first':
+            queue.send({'job_id': 'follow-up'})
+
+    queue = grant_jobs.LocalJobQueue(worker)
+    queue.send({'job_id': 'first'})
+    assert queue.drain() == 2
+    assert handled == ['first', 'follow-up']
+
+def test_local_backend_wiring():
+    assert isinstance(grant_jobs.create_job_store('local'), grant_jobs.InMemoryJobStore)
+    assert isinstance(grant_jobs.create_job_queue(lambda message: None, 'local'), grant_jobs.LocalJobQueue)
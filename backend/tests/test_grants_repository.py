@@ -0,0 +1,119 @@
+import pytest
+
+pytest.importorskip('boto3')
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+import cursors
+import grants_repository
+
+def grant(status, day):
+    return {'grant_id': f'{status}-{day}', 'status': status, 'created_at': f'2025-01-{day:02d}T00:00:00'}
+
+def typed(item):
+    return {name: {'S': value} for name, value in item.items()}
+
+class StatusIndex:
+    """
+    Answers status-index queries for a fixed set of grants through a Stubber,
+    the way DynamoDB would: newest first after ExclusiveStartKey, at most
+    Limit items, with a LastEvaluatedKey whenever Limit was reached
+    """
+
+    def __init__(self, stubber, grants):
+        self.stubber = stubber
+        self.grants = sorted(grants, key=lambda item: item['created_at'], reverse=True)
+
+    def expect(self, status, start, limit):
+        items = [item for item in self.grants if item['status'] == status]
+        if start:
+            items = [item for item in items if item['created_at'] < start['created_at']]
+        response = {'Items': [typed(item) for item in items[:limit]]}
+        if len(items) >= limit:
+            response['LastEvaluatedKey'] = typed(items[limit - 1])
+        expected = {
+            'TableName': 'Grants',
+            'IndexName': grants_repository.GRANTS_STATUS_INDEX,
+            'KeyConditionExpression': ANY,
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if start:
+            expected['ExclusiveStartKey'] = start
+        self.stubber.add_response('query', response, expected)
+
+    def page(self, repository, statuses, limit, positions):
+        """Queue the queries one page makes, then read it"""
+        for status in statuses:
+            if positions is None or status in positions:
+                self.expect(status, (positions or {}).get(status), limit + 1)
+        result = repository.page_by_statuses(statuses, limit, positions)
+        self.stubber.assert_no_pending_responses()
+        return result
+
+@pytest.fixture
+def stubbed():
+    table = boto3.resource('dynamodb', region_name='us-east-1').Table('Grants')
+    with Stubber(table.meta.client) as stubber:
+        yield grants_repository.GrantsRepository(table), stubber
+
+def ids(page):
+    return [item['grant_id'] for item in page]
+
+def test_interleaved_statuses_merge_newest_first(stubbed):
+    repository, stubber = stubbed
+    index = StatusIndex(stubber, [grant('open', day) for day in (10, 8, 6, 4)] +
+                        [grant('closed', day) for day in (9, 7, 5)])
+
+    page, positions = index.page(repository, ['open', 'closed'], 3, None)
+    assert ids(page) == ['open-10', 'closed-9', 'open-8']
+    assert positions == {'open': grant('open', 8), 'closed': grant('closed', 9)}
+
+    # closed runs out in the middle of this page and is dropped from the positions
+    page, positions = index.page(repository, ['open', 'closed'], 3, positions)
+    assert ids(page) == ['closed-7', 'open-6', 'closed-5']
+    assert positions == {'open': grant('open', 6)}
+
+    page, positions = index.page(repository, ['open', 'closed'], 3, positions)
+    assert ids(page) == ['open-4']
+    assert positions == {}
+
+def test_status_that_contributes_nothing_keeps_its_position(stubbed):
+    repository, stubber = stubbed
+    index = StatusIndex(stubber, [grant('open', day) for day in (10, 9, 8, 7)] + [grant('closed', 1)])
+
+    page, positions = index.page(repository, ['open', 'closed'], 2, None)
+    assert ids(page) == ['open-10', 'open-9']
+    assert positions == {'open': grant('open', 9), 'closed': None}  # closed starts from the top again
+
+    page, positions = index.page(repository, ['open', 'closed'], 2, positions)
+    assert ids(page) == ['open-8', 'open-7']
+    assert positions == {'closed': None}
+
+    page, positions = index.page(repository, ['open', 'closed'], 2, positions)
+    assert ids(page) == ['closed-1']
+    assert positions == {}
+
+def test_paging_to_the_end_returns_every_grant_once(stubbed):
+    repository, stubber = stubbed
+    grants = [grant(status, day) for status, days in
+              [('open', (28, 20, 13, 12, 3)), ('closed', (27, 26, 25, 2)), ('upcoming', (19, 11, 1))]
+              for day in days]
+    index = StatusIndex(stubber, grants)
+
+    seen, positions = [], None
+    while positions != {}:
+        page, positions = index.page(repository, ['open', 'closed', 'upcoming'], 4, positions)
+        assert len(page) <= 4
+        seen.extend(ids(page))
+    assert seen == ids(index.grants)
+
+def test_positions_survive_a_cursor_round_trip(stubbed):
+    repository, stubber = stubbed
+    index = StatusIndex(stubber, [grant('open', day) for day in (5, 3)] + [grant('closed', 4)])
+
+    page, positions = index.page(repository, ['open', 'closed'], 1, None)
+    positions = cursors.decode_cursor(cursors.encode_cursor({'positions': positions}))['positions']
+    page, positions = index.page(repository, ['open', 'closed'], 1, positions)
+    assert ids(page) == ['closed-4']
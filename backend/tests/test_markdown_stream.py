@@ -0,0 +1,44 @@
+import pytest
+
+from conftest import load_handler
+
+REPLIES = [
+    "Plain reply with no formatting at all.",
+    "## Eligibility\n\nYou **must** be a *registered* SME.\n\n- Under 200 staff\n- At least 30% local shareholding\n"
+    "1. Apply online\n2. Upload `financials.pdf`\n\n---\nSee [the portal](https://example.com/apply) for details.",
+    "```python\nprint('hidden')\n```\nAfter the code block, __bold__ and _italic_ text.",
+    "# Title\n\n\n\nToo many blank lines\n   indented line\n***\nEnd",
+    "Amounts range from **$10,000 to $50,000** depending on _project scope_ and `tier`.",
+]
+
+@pytest.fixture(scope='module')
+def sme_chat():
+    return load_handler('smeBackend/sme-chat', 'sme_chat_handler')
+
+def stream(stripper, text, size):
+    return ''.join(stripper.feed(text[i:i + size]) for i in range(0, len(text), size)) + stripper.finish()
+
+@pytest.mark.parametrize('reply', REPLIES)
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 10000])
+def test_stream_matches_whole_reply_conversion(sme_chat, reply, size):
+    expected = sme_chat.convert_markdown_to_plain_text(reply)
+    assert stream(sme_chat.MarkdownStreamStripper(), reply, size) == expected
+
+def test_words_are_sent_before_the_reply_ends(sme_chat):
+    stripper = sme_chat.MarkdownStreamStripper()
+    sent = stripper.feed("You **must** be registered and ")
+    assert sent.startswith("You must be registered")
+    assert stripper.feed("located in") + stripper.finish() == " located in"
+
+def test_open_markers_are_held_back(sme_chat):
+    stripper = sme_chat.MarkdownStreamStripper()
+    sent = stripper.feed("Funding of **up to ")
+    assert '*' not in sent
+    sent += stripper.feed("$50,000** is ") + stripper.finish()
+    assert sent == "Funding of up to $50,000 is"
+
+def test_code_blocks_are_never_sent(sme_chat):
+    stripper = sme_chat.MarkdownStreamStripper()
+    sent = stripper.feed("```\nsecret = 1\n") + stripper.feed("more code\n```\nVisible")
+    assert 'secret' not in sent and 'more code' not in sent
+    assert sent + stripper.finish() == "Visible"
@@ -0,0 +1,119 @@
+import pytest
+
+import pdf_classifier
+from conftest import load_handler
+
+def build_pdf(objects):
+    """Minimal uncompressed PDF with a valid xref table; object numbers start at 1"""
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+def stream(data, dictionary=b''):
+    return b'<< %s /Length %d >>\nstream\n' % (dictionary, len(data)) + data + b'\nendstream'
+
+def page(resources, contents_ref):
+    return b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << %s >> /Contents %d 0 R >>' % (
+        resources, contents_ref)
+
+FONT = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+IMAGE = stream(b'\x80', b'/Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8')
+TEXT_CONTENT = stream(b'BT /F1 12 Tf 72 720 Td (Innovation Grant) Tj ET')
+
+def text_pdf():
+    return build_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        page(b'/Font << /F1 4 0 R >>', 5),
+        FONT,
+        TEXT_CONTENT
+    ])
+
+def image_pdf(width=612, height=792):
+    return build_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        page(b'/XObject << /Im1 4 0 R >>', 5),
+        IMAGE,
+        stream(b'q %d 0 0 %d 0 0 cm /Im1 Do Q' % (width, height))
+    ])
+
+def mixed_pdf():
+    return build_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>',
+        page(b'/Font << /F1 5 0 R >>', 6),
+        page(b'/XObject << /Im1 7 0 R >>', 8),
+        FONT,
+        TEXT_CONTENT,
+        IMAGE,
+        stream(b'q 612 0 0 792 0 0 cm /Im1 Do Q')
+    ])
+
+@pytest.fixture
+def pypdf2():
+    return pytest.importorskip('PyPDF2')
+
+@pytest.mark.parametrize('data, kind', [
+    (text_pdf(), pdf_classifier.KIND_TEXT),
+    (image_pdf(), pdf_classifier.KIND_SCANNED),
+    (image_pdf(100, 100), pdf_classifier.KIND_UNKNOWN),  # A logo, not a page scan
+    (mixed_pdf(), pdf_classifier.KIND_MIXED)
+])
+def test_classify_with_pypdf2(pypdf2, data, kind):
+    result = pdf_classifier.classify_pdf(data)
+    assert (result['kind'], result['method']) == (kind, 'pypdf2')
+
+def test_text_pdf_is_read_with_pypdf2(pypdf2):
+    classification = pdf_classifier.classify_pdf(text_pdf())
+    assert pdf_classifier.has_text_layer(classification)
+    assert not pdf_classifier.needs_ocr(classification)
+
+def test_image_only_pdf_needs_ocr(pypdf2):
+    classification = pdf_classifier.classify_pdf(image_pdf())
+    assert pdf_classifier.needs_ocr(classification)
+    assert not pdf_classifier.has_text_layer(classification)
+
+@pytest.mark.parametrize('data, kind', [
+    (text_pdf()[:len(text_pdf()) // 2], pdf_classifier.KIND_TEXT),
+    (image_pdf()[:len(image_pdf()) // 2], pdf_classifier.KIND_SCANNED),
+    (mixed_pdf()[:-30], pdf_classifier.KIND_MIXED),
+    (b'not a pdf at all', pdf_classifier.KIND_UNKNOWN)
+])
+def test_unparseable_pdf_falls_back_to_raw_bytes(data, kind):
+    result = pdf_classifier.classify_pdf(data)
+    assert (result['kind'], result['method']) == (kind, 'bytes')
+    assert result['page_count'] is None
+
+def test_sample_pages_include_first_and_last():
+    assert pdf_classifier.sample_page_indexes(2) == [0, 1]
+    assert pdf_classifier.sample_page_indexes(10) == [0, 4, 9]
+    assert pdf_classifier.sample_page_indexes(10, 1) == [0]
+
+@pytest.mark.parametrize('data, ocr_calls, pypdf2_calls', [
+    (image_pdf(), 1, 0),  # Straight to OCR
+    (text_pdf(), 0, 1)
+])
+def test_funder_upload_routes_by_classification(monkeypatch, data, ocr_calls, pypdf2_calls):
+    funder_upload = load_handler('funderBackend/funder-upload', 'funder_upload_handler')
+    calls = {'ocr': 0, 'pypdf2': 0}
+
+    def extract_text_from_pdf(pdf_bytes, **kwargs):
+        calls['pypdf2'] += 1
+        return 'Innovation Grant'
+
+    def extract_text_with_textract(pdf_bytes, *args):
+        calls['ocr'] += 1
+        return 'Innovation Grant'
+
+    monkeypatch.setattr(funder_upload, 'extract_text_from_pdf', extract_text_from_pdf)
+    monkeypatch.setattr(funder_upload, 'extract_text_with_textract', extract_text_with_textract)
+    assert funder_upload.extract_document_text(data) == 'Innovation Grant'
+    assert (calls['ocr'], calls['pypdf2']) == (ocr_calls, pypdf2_calls)
@@ -0,0 +1,132 @@
+import pytest
+
+import textract_extraction
+from conftest import load_handler
+from textract_extraction import LocalTextractClient
+
+PAGES = ["Innovation Grant\nFunding for SMEs", "Eligibility\nUnder 200 staff", "Deadline\n30 June 2025"]
+
+def test_multi_page_result_is_assembled_in_page_order():
+    client = LocalTextractClient(polls_until_done=0, max_results=2)
+    client.add_document('bucket', 'grant.pdf', PAGES)
+
+    text = textract_extraction.extract_text_async(client, 'bucket', 'grant.pdf')
+    assert text == "\n".join(PAGES)
+
+def test_every_result_token_is_followed():
+    client = LocalTextractClient(polls_until_done=0, max_results=2)
+    client.add_document('bucket', 'grant.pdf', PAGES)
+    job_id = textract_extraction.start_text_detection(client, 'bucket', 'grant.pdf')
+    first_page = textract_extraction.wait_for_text_detection(client, job_id)
+    assert 'NextToken' in first_page
+
+    blocks = textract_extraction.get_text_detection_blocks(client, job_id, first_page)
+    assert len(blocks) == 9  # A PAGE block and two LINE blocks per page
+    assert client.jobs[job_id]['polls'] == 5  # One status poll, then four more result pages
+
+def test_lines_are_grouped_by_page_across_result_pages():
+    blocks = [
+        {'BlockType': 'PAGE', 'Page': 2},
+        {'BlockType': 'LINE', 'Page': 2, 'Text': 'second page, first line'},
+        {'BlockType': 'LINE', 'Page': 1, 'Text': 'first page, first line'},
+        {'BlockType': 'WORD', 'Page': 1, 'Text': 'ignored'},
+        {'BlockType': 'LINE', 'Page': 2, 'Text': 'second page, second line'},
+        {'BlockType': 'LINE', 'Page': 1, 'Text': 'first page, second line'}
+    ]
+    assert textract_extraction.assemble_page_text(blocks) == (
+        "first page, first line\nfirst page, second line\nsecond page, first line\nsecond page, second line"
+    )
+
+def test_polling_backs_off_up_to_the_cap():
+    client = LocalTextractClient(polls_until_done=5)
+    client.add_document('bucket', 'grant.pdf', PAGES)
+    job_id = textract_extraction.start_text_detection(client, 'bucket', 'grant.pdf')
+
+    delays = []
+    response = textract_extraction.wait_for_text_detection(client, job_id, timeout=60, initial_delay=1,
+                                                           max_delay=4, sleep=delays.append)
+    assert response['JobStatus'] == 'SUCCEEDED'
+    assert delays == [1, 2, 4, 4, 4]
+
+def test_failed_job_raises_with_its_reason():
+    client = LocalTextractClient(polls_until_done=1)
+    client.add_document('bucket', 'broken.pdf', PAGES, failure='Unsupported document format')
+
+    job_id = textract_extraction.start_text_detection(client, 'bucket', 'broken.pdf')
+
+    with pytest.raises(RuntimeError, match='Unsupported document format'):
+        textract_extraction.wait_for_text_detection(client, job_id, sleep=lambda seconds: None)
+
+def test_job_still_running_at_the_deadline_times_out():
+    client = LocalTextractClient(polls_until_done=100)
+    client.add_document('bucket', 'grant.pdf', PAGES)
+
+    with pytest.raises(TimeoutError):
+        textract_extraction.extract_text_async(client, 'bucket', 'grant.pdf', timeout=0)
+    job = next(iter(client.jobs.values()))
+    assert job['polls'] == 1  # No sleep once the deadline has passed
+
+def test_single_page_detection():
+    client = LocalTextractClient()
+    client.add_document_bytes(b'%PDF-1.4 one page', PAGES[:1])
+    assert textract_extraction.detect_text(client, {'Bytes': b'%PDF-1.4 one page'}) == PAGES[0]
+
+def pdf(pages, size=0, tree=True):
+    """Uncompressed PDF-like bytes with the given number of page objects, padded to size"""
+    data = b'%PDF-1.4\n' + (b'1 0 obj << /Type /Pages /Count 0 >> endobj\n' if tree else b'')
+    data += b''.join(b'%d 0 obj << /Type /Page >> endobj\n' % (number + 2) for number in range(pages))
+    return data + b' ' * max(0, size - len(data))
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(textract_extraction, 'TEXTRACT_INLINE_MAX_BYTES', 1000)
+    monkeypatch.setattr(textract_extraction, 'TEXTRACT_SYNC_MAX_BYTES', 2000)
+
+@pytest.mark.parametrize('pages, size, route', [
+    (1, 1000, textract_extraction.ROUTE_INLINE),
+    (1, 1001, textract_extraction.ROUTE_SYNC_S3),
+    (1, 2000, textract_extraction.ROUTE_SYNC_S3),
+    (1, 2001, textract_extraction.ROUTE_ASYNC),
+    (2, 100, textract_extraction.ROUTE_ASYNC),
+    (2, 1500, textract_extraction.ROUTE_ASYNC),
+    (0, 100, textract_extraction.ROUTE_ASYNC)  # Page count unknown, e.g. compressed object streams
+])
+def test_route_at_the_limits(limits, pages, size, route):
+    assert textract_extraction.choose_route(pdf(pages, size)) == route
+
+@pytest.mark.parametrize('data, pages', [
+    (pdf(1), 1),
+    (pdf(3), 3),
+    (pdf(1, tree=False), 1),
+    (b'<< /Type/Page >> << /Type /Pages >> << /Type\n/Page/Parent 1 0 R >>', 2),
+    (b'<< /Type /PageLabel >>', 0)
+])
+def test_count_pdf_pages(data, pages):
+    assert textract_extraction.count_pdf_pages(data) == pages
+
+@pytest.fixture
+def funder_upload(monkeypatch):
+    module = load_handler('funderBackend/funder-upload', 'funder_upload_handler')
+    client = LocalTextractClient(polls_until_done=0)
+    monkeypatch.setattr(module, 'textract', client)
+    return module, client
+
+def test_funder_upload_ocr_failures_name_their_reason(funder_upload):
+    module, client = funder_upload
+    document = pdf(3)
+    client.add_document('bucket', 'slow.pdf', PAGES)
+    client.add_document('bucket', 'broken.pdf', PAGES, failure='Unsupported document format')
+
+    with pytest.raises(ValueError, match='no S3 location'):
+        module.extract_text_with_textract(document)
+    with pytest.raises(RuntimeError, match='Unsupported document format'):
+        module.extract_text_with_textract(document, ('bucket', 'broken.pdf'))
+
+    client.polls_until_done = 100
+    with pytest.raises(TimeoutError, match='did not finish in time'):
+        module.extract_text_with_textract(document, ('bucket', 'slow.pdf'), timeout=0)
+
+def test_funder_upload_ocr_of_a_multi_page_scan(funder_upload):
+    module, client = funder_upload
+    client.add_document('bucket', 'scan.pdf', PAGES)
+    assert module.extract_text_with_textract(pdf(3), ('bucket', 'scan.pdf')) == "\n".join(PAGES)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Put existing grants into the catalog updated_at index
+
+Grants written before grant_catalog.catalog_attributes() existed, or by a
+writer that leaves it out, have no `catalog` attribute and so are missing
+from catalog-updated_at-index. Matchmaking's incremental refresh cannot see
+changes to them until its next full reload. This one-off scan adds the
+attribute, and an updated_at where there is none, to every such grant.
+
+Usage:
+    python tools/backfill_grant_catalog.py --dry-run
+    python tools/backfill_grant_catalog.py --table Grants
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'shared'))
+
+import grant_catalog
+from grants_repository import GRANTS_TABLE, projection_params
+
+def missing_catalog(table):
+    """
+    Yield the key and timestamps of every grant not yet in the index
+    """
+    params = projection_params(['grant_id', 'catalog', 'created_at', 'updated_at'])
+    while True:
+        response = table.scan(**params)
+        for item in response.get('Items', []):
+            if item.get('catalog') != grant_catalog.CATALOG_PARTITION or not item.get('updated_at'):
+                yield item
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill(table, item) -> bool:
+    """
+    Add the catalog attributes to one grant; False if it was deleted meanwhile
+    """
+    attributes = dict(grant_catalog.catalog_attributes())
+    names = {f"#b{i}": name for i, name in enumerate(attributes)}
+    values = {f":b{i}": value for i, value in enumerate(attributes.values())}
+    names['#updated_at'] = 'updated_at'
+    values[':updated_at'] = item.get('created_at') or datetime.utcnow().isoformat()
+    try:
+        table.update_item(
+            Key={'grant_id': item['grant_id']},
+            UpdateExpression='SET ' + ', '.join(f"#b{i} = :b{i}" for i in range(len(attributes)))
+                             + ', #updated_at = if_not_exists(#updated_at, :updated_at)',
+            ConditionExpression='attribute_exists(grant_id)',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--table', default=GRANTS_TABLE, help='Grants table name')
+    parser.add_argument('--dry-run', action='store_true', help='List the grants without updating them')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    updated = skipped = 0
+    for item in missing_catalog(table):
+        if args.dry_run:
+            print(f"would backfill {item['grant_id']}")
+            updated += 1
+        elif backfill(table, item):
+            updated += 1
+        else:
+            skipped += 1
+
+    verb = 'Would backfill' if args.dry_run else 'Backfilled'
+    print(f"{verb} {updated} grants in {args.table}" + (f", {skipped} deleted meanwhile" if skipped else ''))
+
+if __name__ == '__main__':
+    main()
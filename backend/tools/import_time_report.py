@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Report the cold-start import cost of each Lambda entry point
+
+Runs `python -X importtime -c "import <module>"` in each function's
+directory (with backend/shared on the path, like the Lambda layer) and
+reports the cumulative import time plus the heaviest direct imports.
+
+Usage:
+    python tools/import_time_report.py
+    python tools/import_time_report.py --runs 5 --top 10
+    python tools/import_time_report.py --json > import-times.json
+    python tools/import_time_report.py --max-ms 400   # non-zero exit on regression
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_DIR = os.path.join(BACKEND_DIR, 'shared')
+
+# Lambda name -> (directory relative to backend/, handler module)
+ENTRY_POINTS = {
+    'upload-fund': ('.', 'lambda_function'),
+    'funder-upload': ('funderBackend/funder-upload', 'lambda_function'),
+    'funder-upload-url': ('funderBackend/funder-upload-url', 'lambda_function'),
+    'funder-functions': ('funderBackend', 'funderFunctions'),
+    'fetch-grants': ('funderBackend/fetch-grants', 'lambda_function'),
+    'grant-counters': ('funderBackend/grant-counters', 'lambda_function'),
+    'sme-chat': ('smeBackend/sme-chat', 'lambda_function'),
+    'sme-fetch-grants': ('smeBackend/sme-fetch-grants', 'lambda_function'),
+    'sme-matchmaking': ('smeBackend/sme-matchmaking', 'lambda_function'),
+    'sme-function': ('smeBackend', 'smeFunction'),
+}
+
+# "import time: self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$')
+
+def parse_import_times(stderr: str):
+    """
+    Parse -X importtime output into (depth, module, self_us, cumulative_us) rows
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        depth = (len(indent) - 1) // 2  # One leading space, then two per nesting level
+        rows.append((depth, module, int(self_us), int(cumulative_us)))
+    return rows
+
+def measure(name: str, directory: str, module: str):
+    """
+    Import one entry point in a fresh interpreter and summarize the cost
+    """
+    cwd = os.path.join(BACKEND_DIR, directory)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SHARED_DIR, env.get('PYTHONPATH')]))
+    env['AWS_PREWARM_CLIENTS'] = 'false'  # Measure imports only, no credential lookups
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    rows = parse_import_times(result.stderr)
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        return {'name': name, 'error': errors[-1] if errors else f'exit code {result.returncode}'}
+
+    # The entry module is the last top-level row; its direct imports are the
+    # depth-1 rows between the previous top-level row and it. Modules loaded
+    # before the entry module (e.g. by site) are not counted.
+    top_index = max(i for i, row in enumerate(rows) if row[0] == 0 and row[1] == module)
+    start = max((i for i, row in enumerate(rows[:top_index]) if row[0] == 0), default=-1) + 1
+    direct = [row for row in rows[start:top_index] if row[0] == 1]
+
+    return {
+        'name': name,
+        'cumulative_ms': rows[top_index][3] / 1000,
+        'direct_imports': [
+            {'module': module_name, 'cumulative_ms': cumulative_us / 1000}
+            for _, module_name, _, cumulative_us in direct
+        ]
+    }
+
+def run_report(names, runs: int):
+    """
+    Measure each entry point `runs` times and keep the median total
+    """
+    report = []
+    for name in names:
+        directory, module = ENTRY_POINTS[name]
+        samples = [measure(name, directory, module) for _ in range(runs)]
+        failed = [sample for sample in samples if 'error' in sample]
+        if failed:
+            report.append(failed[0])
+            continue
+        samples.sort(key=lambda sample: sample['cumulative_ms'])
+        median = samples[len(samples) // 2]
+        median['runs_ms'] = [round(sample['cumulative_ms'], 1) for sample in samples]
+        median['stdev_ms'] = round(statistics.pstdev(median['runs_ms']), 1)
+        report.append(median)
+    return report
+
+def print_report(report, top: int):
+    for entry in report:
+        if 'error' in entry:
+            print(f"{entry['name']:<20} import failed: {entry['error']}")
+            continue
+        print(f"{entry['name']:<20} {entry['cumulative_ms']:>9.1f} ms  (runs: {entry['runs_ms']}, stdev {entry['stdev_ms']} ms)")
+        heaviest = sorted(entry['direct_imports'], key=lambda item: item['cumulative_ms'], reverse=True)[:top]
+        for item in heaviest:
+            print(f"    {item['module']:<36} {item['cumulative_ms']:>9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start import cost per Lambda entry point')
+    parser.add_argument('names', nargs='*', help=f"Entry points to measure (default: all of {', '.join(sorted(ENTRY_POINTS))})")
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per entry point; the median is reported')
+    parser.add_argument('--top', type=int, default=8, help='Heaviest direct imports to list')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--max-ms', type=float, help='Exit non-zero if any entry point exceeds this total')
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    report = run_report(args.names or sorted(ENTRY_POINTS), max(1, args.runs))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+
+    if args.max_ms is not None:
+        over = [entry for entry in report if entry.get('cumulative_ms', 0) > args.max_ms]
+        for entry in over:
+            print(f"{entry['name']} exceeds {args.max_ms} ms: {entry['cumulative_ms']:.1f} ms", file=sys.stderr)
+        if over:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
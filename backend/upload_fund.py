@@ -1,8 +1,9 @@
 import base64
 import uuid
-import boto3
+import aws_clients
+import metrics
 
-s3 = boto3.client("s3")
+s3 = aws_clients.lazy_client("s3")
 BUCKET_NAME = "YOUR_BUCKET_NAME"
 
 def upload_fund(file_base64: str, title: str) -> str:
@@ -11,12 +12,33 @@ def upload_fund(file_base64: str, title: str) -> str:
     Returns the S3 filename.
     """
     # Decode Base64
-    file_bytes = base64.b64decode(file_base64)
+    with metrics.stage("base64_decode"):
+        file_bytes = base64.b64decode(file_base64)
+    metrics.record_size("file", len(file_bytes))
 
     # Safe filename
     filename = f"{uuid.uuid4()}_{title.replace(' ', '_')}.pdf"
 
     # Upload
-    s3.put_object(Bucket=BUCKET_NAME, Key=filename, Body=file_bytes)
+    with metrics.stage("s3_put"):
+        s3.put_object(Bucket=BUCKET_NAME, Key=filename, Body=file_bytes)
 
     return filename
+
+
+def create_presigned_upload(title: str, expires_in: int = 900) -> dict:
+    """
+    Creates a presigned S3 PUT URL so the client uploads the file directly,
+    instead of sending it through the Lambda as Base64.
+    Returns the S3 filename and the upload URL.
+    """
+    # Safe filename
+    filename = f"{uuid.uuid4()}_{title.replace(' ', '_')}.pdf"
+
+    upload_url = s3.generate_presigned_url(
+        "put_object",
+        Params={"Bucket": BUCKET_NAME, "Key": filename, "ContentType": "application/pdf"},
+        ExpiresIn=expires_in
+    )
+
+    return {"filename": filename, "upload_url": upload_url, "expires_in": expires_in}